@@ -0,0 +1,169 @@
+from datetime import date
+from typing import Dict, Iterable, Optional, Tuple
+
+from utils.validators import Validator
+
+try:
+    import numpy as np
+except ImportError:  # Optional: without numpy product aggregates loop over the records
+    np = None
+
+HAS_NUMPY = np is not None
+
+def expiry_ordinal(expiry_date: Optional[str]) -> int:
+    """Get the proleptic ordinal of a YYYY-MM-DD expiry date, or 0 if it has none or is malformed"""
+    if not Validator.is_iso_date(expiry_date):
+        return 0
+    return date.fromisoformat(expiry_date).toordinal()
+
+def farmer_key(farmer_id) -> int:
+    """Get the farmer id a product's totals go under, or -1 if it has none or it isn't a valid id"""
+    if type(farmer_id) is not int or farmer_id <= 0:
+        return -1
+    return farmer_id
+
+class ProductColumns:
+    """Columnar view of the product lots for vectorized inventory aggregates.
+    
+    Each product is a row across numpy arrays (id, farmer id, category code,
+    quantity, price, expiry ordinal and availability). DatabaseManager keeps it
+    in step with the cache from its index hooks; removing a row moves the last
+    row into its place, so rows are in no particular order. Aggregates are
+    cached until the next write. Requires numpy.
+    """
+    
+    COLUMNS = (
+        ('id', 'i8'),
+        ('farmer_id', 'i8'),
+        ('category', 'i4'),
+        ('quantity', 'f8'),
+        ('price', 'f8'),
+        ('expiry', 'i4'),
+        ('available', '?')
+    )
+    
+    def __init__(self, capacity: int = 1024):
+        self._arrays = {name: np.zeros(max(capacity, 1), dtype) for name, dtype in self.COLUMNS}
+        self._rows: Dict[int, int] = {}
+        self._size = 0
+        self._totals: Dict[Tuple, Dict] = {}
+    
+    @classmethod
+    def from_records(cls, records: Iterable) -> 'ProductColumns':
+        """Build the view of a freshly loaded product collection in one pass"""
+        values = [cls._row(record) for record in records]
+        columns = cls(len(values))
+        if values:
+            for (name, dtype), column in zip(cls.COLUMNS, zip(*values)):
+                columns._arrays[name][:len(values)] = np.array(column, dtype)
+        columns._rows = {row[0]: i for i, row in enumerate(values)}
+        columns._size = len(values)
+        return columns
+    
+    @staticmethod
+    def _row(record) -> tuple:
+        """Get the column values of a product record"""
+        return (
+            record['id'],
+            # Legacy or badly imported ids (0, negative, strings) would break np.bincount
+            farmer_key(record.get('farmer_id')),
+            record.code('category'),
+            record.get('quantity') or 0,
+            record.get('price_per_unit') or 0,
+            expiry_ordinal(record.get('expiry_date')),
+            bool(record.get('available', True))
+        )
+    
+    def add(self, record):
+        """Add a product, replacing its row if it already has one"""
+        self.remove(record['id'])
+        if self._size == len(self._arrays['id']):
+            for name, array in self._arrays.items():
+                grown = np.zeros(len(array) * 2, array.dtype)
+                grown[:self._size] = array
+                self._arrays[name] = grown
+        
+        row = self._size
+        for (name, _), value in zip(self.COLUMNS, self._row(record)):
+            self._arrays[name][row] = value
+        self._rows[record['id']] = row
+        self._size += 1
+        self._totals.clear()
+    
+    def remove(self, record_id: int):
+        """Remove a product's row if it has one"""
+        row = self._rows.pop(record_id, None)
+        if row is None:
+            return
+        
+        last = self._size - 1
+        if row != last:
+            for array in self._arrays.values():
+                array[row] = array[last]
+            self._rows[int(self._arrays['id'][row])] = row
+        self._size = last
+        self._totals.clear()
+    
+    def __len__(self) -> int:
+        return self._size
+    
+    def aggregates(self, category: Optional[int] = None, expiring_by: Optional[int] = None) -> Dict:
+        """Totals of the available products, optionally of one category code.
+        
+        Counts per category and the per-farmer totals are keyed by category code
+        and farmer id. expiring_by is an expiry ordinal; products expiring on or
+        before it are counted in 'expiring'. The result is shared by later calls
+        until the next write, so callers must not modify it.
+        """
+        key = (category, expiring_by)
+        totals = self._totals.get(key)
+        if totals is None:
+            totals = self._totals[key] = self._aggregate(category, expiring_by)
+        return totals
+    
+    def _aggregate(self, category: Optional[int], expiring_by: Optional[int]) -> Dict:
+        """Compute the aggregates of the current rows"""
+        size = self._size
+        available = self._arrays['available'][:size]
+        if category is not None:
+            # An unknown category (code -1) matches nothing, not the products without one
+            if category >= 0:
+                available = available & (self._arrays['category'][:size] == category)
+            else:
+                available = np.zeros_like(available)
+        
+        # Unselected rows weigh 0, which is cheaper than compressing every column with the mask
+        weights = available.astype('f8')
+        quantity = self._arrays['quantity'][:size] * weights
+        price = self._arrays['price'][:size]
+        values = quantity * price
+        
+        expiring = 0
+        if expiring_by is not None:
+            expiry = self._arrays['expiry'][:size]
+            expiring = int(np.count_nonzero(available & (expiry > 0) & (expiry <= expiring_by)))
+        
+        # Category codes and farmer ids are shifted by one so that -1 (none) lands in bin 0
+        category_counts = np.bincount(self._arrays['category'][:size] + 1, weights=weights)[1:]
+        farmer_bins = self._arrays['farmer_id'][:size] + 1
+        farmer_counts = np.bincount(farmer_bins, weights=weights)[1:]
+        farmer_quantities = np.bincount(farmer_bins, weights=quantity)[1:]
+        farmer_values = np.bincount(farmer_bins, weights=values)[1:]
+        
+        codes = np.flatnonzero(category_counts)
+        farmer_ids = np.flatnonzero(farmer_counts)
+        return {
+            'products': int(np.count_nonzero(available)),
+            'quantity': float(quantity.sum()),
+            'value': float(quantity.dot(price)),
+            'price_sum': float(weights.dot(price)),
+            'expiring': expiring,
+            'categories': dict(zip(codes.tolist(), category_counts[codes].astype('i8').tolist())),
+            'farmers': {
+                farmer_id: {'products': count, 'quantity': farmer_quantity, 'value': farmer_value}
+                for farmer_id, count, farmer_quantity, farmer_value in zip(
+                    farmer_ids.tolist(), farmer_counts[farmer_ids].astype('i8').tolist(),
+                    farmer_quantities[farmer_ids].tolist(), farmer_values[farmer_ids].tolist()
+                )
+            }
+        }
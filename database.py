@@ -1,12 +1,121 @@
+import functools
+import heapq
 import json
 import os
-from datetime import datetime
-from typing import List, Dict, Optional, Tuple
+import threading
+import time
+from bisect import bisect_left, bisect_right, insort
+from contextlib import contextmanager, nullcontext
+from datetime import datetime, timedelta
+from itertools import islice
+from typing import Callable, Iterator, List, Dict, Optional, Set, Tuple
 
-class DatabaseManager:
-    def __init__(self, data_dir: str = "data"):
+from columns import HAS_NUMPY, ProductColumns, expiry_ordinal, farmer_key
+from records import RECORD_TYPES, VOCABULARIES, json_default
+from utils.events import ChangeNotifier
+from utils.json_stream import iter_json_array
+from utils.rwlock import ReadWriteLock
+from utils.snapshot import SnapshotError, read_snapshot, read_source, write_snapshot
+from utils.validators import Validator
+
+try:
+    import fcntl
+except ImportError:  # Windows: no advisory locks
+    fcntl = None
+
+def _reader(method):
+    """Run a public read method under the thread read lock (thread-safe mode)"""
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self._reading():
+            return method(self, *args, **kwargs)
+    return wrapper
+
+class DatabaseManager(ChangeNotifier):
+    """JSON-file database.
+    
+    With thread_safe=True a reader/writer lock guards the in-memory collections
+    so work such as reports and exports can run off the Tk thread. In that mode
+    these methods are safe to call from worker threads:
+    
+    - reads: load_json, get_farmer, get_product, get_sales_point, get_driver,
+      get_request, get_delivery, get_farmers, get_products, get_sales_points,
+      get_drivers, get_distribution_requests, get_deliveries, query_products,
+      products_expiring_between, product_aggregates, search, count_by, get_dashboard_stats,
+      get_cache_stats
+    - writes: every add_*, update_*, cancel_* and bulk method, transaction(),
+      reserve_ids, save_json, checkpoint, archive_closed_records, flush and close
+    
+    Reads see the collections as of when they took the read lock and return
+    copies (snapshots) that later writes never change. The iter_* generators
+    hold no lock between items and are not thread-safe; worker threads should
+    page through get_* with limit/after instead. Without thread_safe every
+    method must be called from a single thread.
+    
+    With write_behind (seconds) writes update the caches right away but their
+    journal entries, counters and sequences are buffered and written together
+    once no write has come in for that long (at most WRITE_BEHIND_MAX_WINDOWS
+    windows after the first one), by flush() or by close(). Buffered writes are
+    lost if the process dies first. The instance keeps the data directory lock
+    while it has buffered writes, so other processes wait for the flush instead
+    of reading around it. Write-behind implies thread_safe, since the flush
+    runs on a timer thread.
+    """
+    
+    # Journal checkpoint thresholds
+    JOURNAL_MAX_BYTES = 256 * 1024
+    JOURNAL_MAX_AGE = 300  # seconds
+    
+    # Longest a write-behind instance buffers writes, in windows
+    WRITE_BEHIND_MAX_WINDOWS = 5
+    
+    # Cold storage: statuses after which records can leave the hot files, and how long
+    # closed records stay hot first
+    ARCHIVE_CLOSED_STATUSES = ('entregado', 'cancelado')
+    ARCHIVE_MIN_AGE_DAYS = 90
+    CLOSED_DATE_FIELDS = ('delivered_date', 'cancelled_date', 'status_updated_date', 'created_date')
+    
+    # Fields of the lightweight rows returned by query_products (plus farmer_name)
+    PRODUCT_ROW_FIELDS = ('id', 'name', 'category', 'quantity', 'unit', 'price_per_unit', 'expiry_date', 'farmer_id')
+    PRODUCT_ORDERS = ('expiry_date', 'name', 'category', 'quantity', 'price_per_unit')
+    
+    # Fields matched by search(), best-ranked first (products also match their farmer's name)
+    SEARCH_FIELDS = {
+        'farmers': ('name', 'email', 'phone'),
+        'products': ('name', 'category'),
+        'sales_points': ('name', 'type', 'contact_person', 'address', 'email'),
+        'drivers': ('name', 'phone', 'license_number', 'vehicle_type', 'vehicle_plate')
+    }
+    
+    def __init__(self, data_dir: str = "data", journal_max_bytes: int = JOURNAL_MAX_BYTES,
+                 journal_max_age: float = JOURNAL_MAX_AGE, thread_safe: bool = False,
+                 write_behind: Optional[float] = None, binary_snapshots: bool = True,
+                 columnar_products: bool = True):
         """Initialize JSON database manager"""
         self.data_dir = data_dir
+        
+        # Binary snapshots (<collection>.snap) are written next to the JSON files on
+        # checkpoint and loaded instead of them while they match
+        self.binary_snapshots = binary_snapshots
+        
+        # Columnar numpy view of the products for product_aggregates (needs numpy)
+        self.columnar_products = columnar_products and HAS_NUMPY
+        
+        # Write-behind buffers: journal entries per file path, and 'stats'/'sequences' to save
+        self.write_behind = write_behind
+        self._dirty: Dict[str, List[Dict]] = {}
+        self._dirty_meta: Set[str] = set()
+        self._dirty_since: Optional[float] = None
+        self._last_write: Optional[float] = None
+        self._flush_timer: Optional[threading.Timer] = None
+        self._flushing = False
+        thread_safe = thread_safe or write_behind is not None
+        
+        # Reader/writer lock of thread-safe mode; readers pin the caches per thread
+        self.thread_safe = thread_safe
+        self._rwlock = ReadWriteLock() if thread_safe else None
+        self._pinned = threading.local()
+        self._init_notifier()
         self.ensure_data_directory()
         
         # JSON file paths
@@ -16,9 +125,118 @@ class DatabaseManager:
         self.distribution_requests_file = os.path.join(self.data_dir, "distribution_requests.json")
         self.drivers_file = os.path.join(self.data_dir, "drivers.json")
         self.deliveries_file = os.path.join(self.data_dir, "deliveries.json")
+        self.sequences_file = os.path.join(self.data_dir, "sequences.json")
+        self.stats_file = os.path.join(self.data_dir, "stats.json")
+        self.lock_file = os.path.join(self.data_dir, ".lock")
+        
+        # Cold storage: monthly partitions of closed requests and deliveries, plus an
+        # index of which partition holds each archived id
+        self.archive_dir = os.path.join(self.data_dir, "archive")
+        self.archive_index_file = os.path.join(self.archive_dir, "index.json")
+        self._archive_index_data: Dict[str, Dict[str, str]] = {}
+        self._archive_index_signature = None
+        self._partition_cache: Dict[str, Tuple[Tuple[int, int, int], List[Dict], Dict[int, Dict]]] = {}
+        
+        # Advisory lock shared by every instance using this data directory
+        self._lock_handle = open(self.lock_file, 'a')
+        self._lock_depth = 0
+        self._lock_exclusive = False
+        self._lock_retained = False
+        
+        # In-memory collection cache: file path -> (stat signature, records), with records
+        # held as slotted Record objects rather than dicts
+        self._record_types = {self._collection_file(name): record_type for name, record_type in RECORD_TYPES.items()}
+        self._cache: Dict[str, Tuple[Tuple[int, int, int], List[Dict]]] = {}
+        self.cache_hits = 0
+        self.cache_misses = 0
+        
+        # Primary-key indexes over the cached records: file path -> {id: record}
+        self._id_index: Dict[str, Dict[int, Dict]] = {}
+        
+        # Secondary indexes: status code -> ids, and ids of active/available records
+        self._status_index: Dict[str, Dict[int, Set[int]]] = {
+            self.distribution_requests_file: {},
+            self.deliveries_file: {}
+        }
+        self._flag_fields = {
+            self.farmers_file: 'active',
+            self.products_file: 'available',
+            self.sales_points_file: 'active',
+            self.drivers_file: 'active'
+        }
+        self._flag_index: Dict[str, Set[int]] = {file_path: set() for file_path in self._flag_fields}
+        
+        # Product ids by farmer id, and products with an expiry date as sorted (expiry_date, id)
+        self._farmer_products: Dict[int, Set[int]] = {}
+        self._expiry_index: Optional[List[Tuple[str, int]]] = []
+        self._product_columns: Optional[ProductColumns] = None
+        
+        # List order of each collection: file path -> sorted [(sort key, tiebreak id)]
+        self._sort_keys: Dict[str, Callable[[Dict], Tuple]] = {
+            self.farmers_file: lambda x: (x.get('name', ''),),
+            self.products_file: lambda x: (x.get('expiry_date') or '9999-12-31', x.get('created_date') or ''),
+            self.sales_points_file: lambda x: (x.get('name', ''),),
+            self.distribution_requests_file: lambda x: (x.get('created_date', ''),),
+            self.drivers_file: lambda x: (x.get('name', ''),),
+            self.deliveries_file: lambda x: (x.get('scheduled_date', ''),)
+        }
+        self._descending_orders = {self.distribution_requests_file}
+        self._sort_order: Dict[str, Optional[List[Tuple]]] = {}
+        self._sort_position: Dict[str, Dict[int, Tuple]] = {}
+        
+        # Bumped on every index change, so iterators over an index subset know to re-sort it
+        self._index_versions: Dict[str, int] = {file_path: 0 for file_path in self._sort_keys}
+        
+        # Trigram search indexes (trigram -> ids), built on the first search of a collection,
+        # and the lowercased search fields of every indexed record
+        self._search_fields = {self._collection_file(name): fields for name, fields in self.SEARCH_FIELDS.items()}
+        self._search_index: Dict[str, Optional[Dict[str, Set[int]]]] = {file_path: None for file_path in self._search_fields}
+        self._search_text: Dict[str, Dict[int, Tuple[str, ...]]] = {}
+        self._searched: Set[str] = set()
+        
+        # Dashboard counters each active/available flag or status contributes to
+        self._flag_stats = {
+            self.farmers_file: 'total_farmers',
+            self.products_file: 'total_products',
+            self.sales_points_file: 'total_sales_points'
+        }
+        self._status_stats = {
+            self.distribution_requests_file: {
+                'pendiente': 'pending_requests',
+                'confirmado': 'confirmed_requests',
+                'en_transito': 'in_transit_requests',
+                'entregado': 'delivered_requests'
+            },
+            self.deliveries_file: {
+                'programado': 'pending_deliveries',
+                'en_camino': 'pending_deliveries',
+                'entregado': 'completed_deliveries'
+            }
+        }
+        self._stats: Dict[str, int] = {}
+        self._stats_signature = None
+        
+        # Enriched requests by id, plus the requests each product/sales point feeds into
+        self._enrichment_cache: Dict[int, Dict] = {}
+        self._enrichment_deps: Dict[Tuple[str, int], Set[int]] = {}
+        self._enrichment_sources = (self.distribution_requests_file, self.products_file, self.sales_points_file)
+        
+        self.journal_max_bytes = journal_max_bytes
+        self.journal_max_age = journal_max_age
+        self._journal_started: Dict[str, float] = {}
+        
+        # Staged changes of the open transaction, if any
+        self._transaction: Optional[Dict] = None
+        
+        self._sequences: Dict[str, int] = {}
+        self._sequences_signature = None
         
         # Initialize JSON files
-        self.initialize_json_files()
+        with self._locked(exclusive=True):
+            self.initialize_json_files()
+            self.recover_journals()
+            self.load_sequences()
+            self.load_stats()
     
     def ensure_data_directory(self):
         """Ensure data directory exists"""
@@ -40,18 +258,1144 @@ class DatabaseManager:
             if not os.path.exists(file_path):
                 self.save_json(file_path, initial_data)
     
-    def load_json(self, file_path: str) -> List[Dict]:
-        """Load data from JSON file"""
+    def _journal_path(self, file_path: str) -> str:
+        """Get the append-only journal path for a collection file"""
+        return os.path.splitext(file_path)[0] + ".journal"
+    
+    def _stat_signature(self, file_path: str) -> Optional[Tuple[int, int, int]]:
+        """Get the (mtime, size, inode) signature used to detect file changes"""
         try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                return json.load(f)
-        except (FileNotFoundError, json.JSONDecodeError):
-            return []
+            st = os.stat(file_path)
+        except FileNotFoundError:
+            return None
+        return (st.st_mtime_ns, st.st_size, st.st_ino)
+    
+    def _collection_signature(self, file_path: str) -> Tuple:
+        """Get the combined signature of a collection file and its journal"""
+        return (self._stat_signature(file_path), self._stat_signature(self._journal_path(file_path)))
+    
+    def _read_journal(self, file_path: str) -> List[Dict]:
+        """Read the journal entries of a collection, skipping torn lines"""
+        entries = []
+        try:
+            with open(self._journal_path(file_path), 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        entries.append(json.loads(line))
+                    except json.JSONDecodeError:
+                        # A line torn by a process that died mid-append; writers cut such a
+                        # tail before appending, but keep reading in case one was missed
+                        continue
+        except FileNotFoundError:
+            pass
+        return entries
+    
+    def _build_indexes(self, file_path: str, records: List[Dict]):
+        """Rebuild the in-memory indexes of a freshly loaded collection"""
+        self._id_index[file_path] = {}
+        if file_path in self._status_index:
+            self._status_index[file_path] = {}
+        if file_path in self._flag_index:
+            self._flag_index[file_path] = set()
+        if file_path == self.products_file:
+            self._farmer_products = {}
+            self._expiry_index = None
+            self._product_columns = None
+        if file_path in self._search_index:
+            self._search_index[file_path] = None
+        if file_path in self._enrichment_sources:
+            self._enrichment_cache.clear()
+            self._enrichment_deps.clear()
+        
+        # Sort once after loading instead of inserting record by record
+        self._sort_order[file_path] = None
+        self._sort_position[file_path] = {}
+        
+        for record in records:
+            self._index_record(file_path, record)
+        
+        self._sort_order[file_path] = sorted(self._sort_position[file_path][record['id']] for record in records)
+        if file_path == self.products_file:
+            self._expiry_index = sorted((record['expiry_date'], record['id']) for record in records
+                                        if Validator.is_iso_date(record.get('expiry_date')))
+            if self.columnar_products:
+                self._product_columns = ProductColumns.from_records(records)
+    
+    def _index_record(self, file_path: str, record: Dict):
+        """Add a record to the collection indexes"""
+        self._id_index[file_path][record['id']] = record
+        self._index_versions[file_path] += 1
+        
+        if file_path in self._status_index:
+            self._status_index[file_path].setdefault(record.code('status'), set()).add(record['id'])
+        
+        if file_path in self._flag_index and record.get(self._flag_fields[file_path], True):
+            self._flag_index[file_path].add(record['id'])
+        
+        if file_path == self.products_file:
+            self._farmer_products.setdefault(record.get('farmer_id'), set()).add(record['id'])
+            # Malformed dates stay out of the index rather than sorting among real ones
+            if Validator.is_iso_date(record.get('expiry_date')) and self._expiry_index is not None:
+                insort(self._expiry_index, (record['expiry_date'], record['id']))
+            if self._product_columns is not None:
+                self._product_columns.add(record)
+        
+        if self._search_index.get(file_path) is not None:
+            self._index_search(file_path, record)
+        
+        if file_path in self._enrichment_sources:
+            self._invalidate_enrichment(file_path, record['id'])
+        
+        position = self._list_position(file_path, record)
+        self._sort_position[file_path][record['id']] = position
+        if self._sort_order[file_path] is not None:
+            insort(self._sort_order[file_path], position)
+    
+    def _unindex_record(self, file_path: str, record: Dict):
+        """Remove a record from the collection indexes"""
+        self._id_index[file_path].pop(record['id'], None)
+        self._index_versions[file_path] += 1
+        
+        if file_path in self._status_index:
+            ids = self._status_index[file_path].get(record.code('status'))
+            if ids is not None:
+                ids.discard(record['id'])
+        
+        if file_path in self._flag_index:
+            self._flag_index[file_path].discard(record['id'])
+        
+        if file_path == self.products_file:
+            ids = self._farmer_products.get(record.get('farmer_id'))
+            if ids is not None:
+                ids.discard(record['id'])
+            if record.get('expiry_date'):
+                entry = (record['expiry_date'], record['id'])
+                i = bisect_left(self._expiry_index, entry)
+                if i < len(self._expiry_index) and self._expiry_index[i] == entry:
+                    del self._expiry_index[i]
+            if self._product_columns is not None:
+                self._product_columns.remove(record['id'])
+        
+        if self._search_index.get(file_path) is not None:
+            self._unindex_search(file_path, record)
+        
+        if file_path in self._enrichment_sources:
+            self._invalidate_enrichment(file_path, record['id'])
+        
+        # The position is kept after removal so a deleted record still works as a cursor
+        order = self._sort_order[file_path]
+        position = self._sort_position[file_path].get(record['id'])
+        if position is not None:
+            i = bisect_left(order, position)
+            if i < len(order) and order[i] == position:
+                del order[i]
+    
+    def _list_position(self, file_path: str, record: Dict) -> Tuple:
+        """Get the sort position of a record in its collection's list order"""
+        # Ties keep id order in both directions, as the stable sorts of the list methods did
+        tiebreak = -record['id'] if file_path in self._descending_orders else record['id']
+        return (self._sort_keys[file_path](record), tiebreak)
+    
+    def _iter_sorted(self, file_path: str, include: Optional[Callable[[Dict], bool]] = None,
+                     after: Optional[int] = None, ids: Optional[Callable[[], Set[int]]] = None) -> Iterator[Dict]:
+        """Yield cached records in list order, starting after the record with id `after`.
+        
+        Each step re-seeks from the last yielded position, so writes made while a
+        caller is consuming the iterator do not skip or repeat records. With ids
+        (returning an index set, e.g. the ids with a status) only those records
+        are walked, so the cost follows the result size rather than the collection.
+        """
+        self._records(file_path)
+        descending = file_path in self._descending_orders
+        
+        position = None
+        if after is not None:
+            position = self._sort_position[file_path].get(after)
+            if position is None:
+                raise ValueError(f"Cursor de paginación desconocido: {after}")
+        
+        members, subset, version = None, None, None
+        while True:
+            order = self._sort_order[file_path]
+            if ids is not None:
+                # Sort the subset's positions again only after the indexes changed; a subset
+                # holding a good part of the collection is cheaper to filter out of the full order
+                if self._index_versions[file_path] != version:
+                    version = self._index_versions[file_path]
+                    members = ids()
+                    positions = self._sort_position[file_path]
+                    subset = sorted(positions[record_id] for record_id in members) if len(members) * 4 < len(order) else None
+                if subset is not None:
+                    order = subset
+            if position is None:
+                i = len(order) - 1 if descending else 0
+            elif descending:
+                i = bisect_left(order, position) - 1
+            else:
+                i = bisect_right(order, position)
+            if i < 0 or i >= len(order):
+                return
+            
+            position = order[i]
+            if subset is None and members is not None and abs(position[1]) not in members:
+                continue
+            record = self._id_index[file_path][abs(position[1])]
+            if include is None or include(record):
+                yield record
+    
+    def _status_ids(self, file_path: str, status: Optional[str]) -> Optional[Callable[[], Set[int]]]:
+        """Get an _iter_sorted ids function over the status index, or None without a status"""
+        if not status:
+            return None
+        code = VOCABULARIES['status'].code(status)
+        return lambda: self._status_index[file_path].get(code, ())
+    
+    def _trigrams(self, text: str) -> Set[str]:
+        """Get the trigrams of a lowercased text"""
+        return {text[i:i + 3] for i in range(len(text) - 2)}
+    
+    def _index_search(self, file_path: str, record: Dict):
+        """Add a record to the trigram search index of its collection"""
+        texts = tuple(str(record.get(field) or '').lower() for field in self._search_fields[file_path])
+        self._search_text[file_path][record['id']] = texts
+        
+        index = self._search_index[file_path]
+        for text in texts:
+            for trigram in self._trigrams(text):
+                index.setdefault(trigram, set()).add(record['id'])
+    
+    def _unindex_search(self, file_path: str, record: Dict):
+        """Remove a record from the trigram search index of its collection"""
+        index = self._search_index[file_path]
+        for text in self._search_text[file_path].pop(record['id'], ()):
+            for trigram in self._trigrams(text):
+                ids = index.get(trigram)
+                if ids is not None:
+                    ids.discard(record['id'])
+    
+    def _invalidate_enrichment(self, file_path: str, record_id: int):
+        """Drop the cached enriched requests that depend on a record"""
+        if file_path == self.distribution_requests_file:
+            self._enrichment_cache.pop(record_id, None)
+            return
+        
+        for request_id in self._enrichment_deps.pop((file_path, record_id), ()):
+            self._enrichment_cache.pop(request_id, None)
+    
+    def _count_with_status(self, file_path: str, *statuses: str) -> int:
+        """Count the records of a status-indexed collection in any of the given statuses"""
+        self._records(file_path)
+        index = self._status_index[file_path]
+        return sum(len(index.get(VOCABULARIES['status'].code(status), ())) for status in statuses)
+    
+    def _count_flagged(self, file_path: str) -> int:
+        """Count the active/available records of a flag-indexed collection"""
+        self._records(file_path)
+        return len(self._flag_index[file_path])
+    
+    def _replay_entry(self, file_path: str, records: List[Dict], entry: Dict) -> Optional[Dict]:
+        """Apply a journal entry to a collection, returning the affected record.
+        
+        Replay is idempotent so a journal that survived a checkpoint crash can be
+        applied again on top of the base file without duplicating records.
+        """
+        index = self._id_index[file_path]
+        op = entry['op']
+        if op == 'insert':
+            record = self._record_types[file_path].from_dict(entry['record'])
+            existing = index.get(record['id'])
+            if existing is not None:
+                self._unindex_record(file_path, existing)
+                records[records.index(existing)] = record
+            else:
+                records.append(record)
+            self._index_record(file_path, record)
+            return record
+        
+        record = index.get(entry['id'])
+        if record is None:
+            return None
+        
+        self._unindex_record(file_path, record)
+        if op == 'delete':
+            records.remove(record)
+            return record
+        
+        record.update(entry['changes'])
+        self._index_record(file_path, record)
+        return record
+    
+    def _records(self, file_path: str) -> List[Dict]:
+        """Get the cached records of a collection, reparsing only if the files changed"""
+        if getattr(self._pinned, 'depth', 0):
+            # Thread-safe readers see the caches as they were when the read lock was taken;
+            # an uncached collection at that point had no file
+            cached = self._cache.get(file_path)
+            return cached[1] if cached is not None else []
+        
+        signature = self._collection_signature(file_path)
+        cached = self._cache.get(file_path)
+        if cached is not None and signature[0] is not None and cached[0] == signature:
+            self.cache_hits += 1
+            return cached[1]
+        
+        self.cache_misses += 1
+        
+        # Writers hold the exclusive lock, so this never sees a half-appended
+        # journal or a checkpoint between replacing the base file and its journal
+        with self._locked(exclusive=False):
+            signature = self._collection_signature(file_path)
+            data = self._load_binary_snapshot(file_path, signature[0])
+            if data is None:
+                try:
+                    with open(file_path, 'r', encoding='utf-8') as f:
+                        data = json.load(f)
+                except (FileNotFoundError, json.JSONDecodeError):
+                    data = []
+                
+                record_type = self._record_types[file_path]
+                data = [record_type.from_dict(record) for record in data]
+            self._build_indexes(file_path, data)
+            for entry in self._read_journal(file_path):
+                self._replay_entry(file_path, data, entry)
+        
+        if signature[0] is not None:
+            self._cache[file_path] = (signature, data)
+        else:
+            self._cache.pop(file_path, None)
+        return data
+    
+    def _binary_snapshot_path(self, file_path: str) -> str:
+        """Get the binary snapshot path of a collection file"""
+        return os.path.splitext(file_path)[0] + ".snap"
+    
+    def _load_binary_snapshot(self, file_path: str, base_signature: Optional[Tuple[int, int, int]]) -> Optional[List[Dict]]:
+        """Load a collection from its binary snapshot, or None if there is none matching its JSON file"""
+        snapshot_path = self._binary_snapshot_path(file_path)
+        if not self.binary_snapshots or base_signature is None or not os.path.exists(snapshot_path):
+            return None
+        
+        try:
+            # A snapshot that doesn't match (e.g. the JSON file was edited by hand) is ignored
+            if read_source(snapshot_path) != base_signature:
+                return None
+            source, fields, rows = read_snapshot(snapshot_path)
+        except (OSError, SnapshotError):
+            return None
+        if source != base_signature:
+            return None
+        
+        record_type = self._record_types[file_path]
+        return [record_type.from_row(fields, values, extra) for values, extra in rows]
+    
+    def _load_collections(self, *file_paths: str):
+        """Make sure the cache and indexes of several collections are current"""
+        for file_path in file_paths:
+            self._records(file_path)
+    
+    def _get_by_id(self, file_path: str, record_id: int) -> Optional[Dict]:
+        """Get a cached record by id in O(1)"""
+        self._records(file_path)
+        return self._id_index[file_path].get(record_id)
+    
+    @_reader
+    def load_json(self, file_path: str) -> List[Dict]:
+        """Load data from JSON file (served from the in-memory cache when unchanged)"""
+        # Callers are free to mutate what they get back, so hand out copies
+        return [self._snapshot(record) for record in self._records(file_path)]
+    
+    def stream_records(self, collection: str, archived: bool = False) -> Iterator[Dict]:
+        """Iterate the committed records of a collection without loading it into memory.
+        
+        A cached collection is read from the cache. Otherwise the JSON file is decoded
+        one record at a time with its journal (and any write-behind buffer) applied on
+        the fly, so memory stays constant in the collection size. Records come in file
+        order, not list order. With archived=True the records archive_closed_records
+        moved out follow, a monthly partition at a time, so the whole history is read.
+        Like the iter_* methods this isn't thread-safe.
+        """
+        file_path = self._collection_file(collection)
+        archived_ids = self._archive_index().get(collection, {}) if archived else {}
+        
+        # A record in both places is mid-archival; the hot copy wins, as in _iter_archived
+        hot_archived = set()
+        for record in self._stream_hot(file_path):
+            if str(record['id']) in archived_ids:
+                hot_archived.add(record['id'])
+            yield record
+        
+        for month in sorted(set(archived_ids.values())):
+            for record in self._load_partition(file_path, month)[0]:
+                if record['id'] not in hot_archived:
+                    yield self._snapshot(record)
+    
+    def _stream_hot(self, file_path: str) -> Iterator[Dict]:
+        """Iterate the records of a collection's base file and journal (see stream_records)"""
+        if self._is_cache_fresh(file_path):
+            for record in list(self._cache[file_path][1]):
+                yield self._snapshot(record)
+            return
+        
+        with self._locked(exclusive=False):
+            # The open handle keeps this version of the base file even if a checkpoint
+            # replaces it, so it stays consistent with the journal read here
+            try:
+                f = open(file_path, 'r', encoding='utf-8')
+            except FileNotFoundError:
+                f = None
+            entries = self._read_journal(file_path) + list(self._dirty.get(file_path, ()))
+        
+        pending: Dict[int, List[Dict]] = {}
+        for entry in entries:
+            record_id = entry['record']['id'] if entry['op'] == 'insert' else entry['id']
+            pending.setdefault(record_id, []).append(entry)
+        
+        def apply(record: Optional[Dict], record_entries: List[Dict]) -> Optional[Dict]:
+            for entry in record_entries:
+                if entry['op'] == 'insert':
+                    record = dict(entry['record'])
+                elif record is None:
+                    continue
+                elif entry['op'] == 'update':
+                    record = dict(record, **entry['changes'])
+                else:
+                    record = None
+            return record
+        
+        if f is not None:
+            with f:
+                for record in iter_json_array(f):
+                    record_entries = pending.pop(record['id'], None)
+                    if record_entries:
+                        record = apply(record, record_entries)
+                    if record is not None:
+                        yield record
+        
+        # Records inserted since the base file was written
+        for record_entries in pending.values():
+            record = apply(None, record_entries)
+            if record is not None:
+                yield record
+    
+    def _snapshot(self, record: Dict) -> Dict:
+        """Copy a record, including its list fields, so later writes can't show through"""
+        return {key: list(value) if isinstance(value, list) else value for key, value in record.items()}
     
     def save_json(self, file_path: str, data: List[Dict]):
-        """Save data to JSON file"""
-        with open(file_path, 'w', encoding='utf-8') as f:
-            json.dump(data, f, indent=2, ensure_ascii=False)
+        """Save a full collection to its JSON file, replacing any pending journal"""
+        with self._locked(exclusive=True):
+            self._write_collection(file_path, data)
+            self._record_change(self._collection_name(file_path), 'reload')
+    
+    def _write_collection(self, file_path: str, data: List[Dict]):
+        """Atomically rewrite a collection's base file and drop its journal"""
+        with self._locked(exclusive=True):
+            tmp_path = file_path + ".tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(data, f, indent=2, ensure_ascii=False, default=json_default)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, file_path)
+            
+            if self.binary_snapshots:
+                write_snapshot(self._binary_snapshot_path(file_path), data,
+                               self._record_types[file_path].FIELDS, self._stat_signature(file_path))
+            
+            # The base file now holds every journaled change (and any buffered ones)
+            journal_path = self._journal_path(file_path)
+            if os.path.exists(journal_path):
+                os.remove(journal_path)
+            self._dirty.pop(file_path, None)
+        self._journal_started.pop(file_path, None)
+        
+        record_type = self._record_types[file_path]
+        records = [record_type.from_dict(record) for record in data]
+        self._build_indexes(file_path, records)
+        self._cache[file_path] = (self._collection_signature(file_path), records)
+    
+    def _append_journal(self, file_path: str, entries: List[Dict]):
+        """Append entries to a collection journal (or the write-behind buffer)"""
+        collection = self._collection_name(file_path)
+        for entry in entries:
+            record_id = entry['record']['id'] if entry['op'] == 'insert' else entry['id']
+            self._record_change(collection, entry['op'], (record_id,))
+        
+        if self._defer_write():
+            self._dirty.setdefault(file_path, []).extend(entries)
+            return
+        self._write_journal(file_path, entries)
+    
+    def _write_journal(self, file_path: str, entries: List[Dict]):
+        """Write entries to a collection journal and keep the cache entry current"""
+        fresh = self._is_cache_fresh(file_path)
+        
+        with open(self._journal_path(file_path), 'a+b') as f:
+            # Another process may have died mid-append; new entries must not land on its torn line
+            self._truncate_torn_tail(f)
+            f.write(''.join(json.dumps(entry, ensure_ascii=False) + "\n" for entry in entries).encode('utf-8'))
+            f.flush()
+            os.fsync(f.fileno())
+        
+        if fresh:
+            self._cache[file_path] = (self._collection_signature(file_path), self._cache[file_path][1])
+        
+        self._maybe_checkpoint(file_path)
+    
+    def _truncate_torn_tail(self, f):
+        """Cut a journal open in binary read/write mode back to its last complete line"""
+        end = f.seek(0, os.SEEK_END)
+        if not end:
+            return
+        f.seek(end - 1)
+        if f.read(1) == b"\n":
+            return
+        
+        # Scan back for the end of the last complete line
+        position = end
+        while position > 0:
+            start = max(0, position - 64 * 1024)
+            f.seek(start)
+            newline = f.read(position - start).rfind(b"\n")
+            if newline != -1:
+                f.truncate(start + newline + 1)
+                return
+            position = start
+        f.truncate(0)
+    
+    def _maybe_checkpoint(self, file_path: str):
+        """Fold the journal into the base file once it is too large or too old"""
+        journal_stat = self._stat_signature(self._journal_path(file_path))
+        if journal_stat is None:
+            return
+        
+        started = self._journal_started.setdefault(file_path, time.monotonic())
+        too_large = journal_stat[1] >= self.journal_max_bytes
+        too_old = time.monotonic() - started >= self.journal_max_age
+        if too_large or too_old:
+            self.checkpoint(file_path)
+    
+    def checkpoint(self, file_path: Optional[str] = None):
+        """Rewrite collection base files with their journals applied"""
+        file_paths = [file_path] if file_path else self.collection_files()
+        with self._locked(exclusive=True):
+            for path in file_paths:
+                if os.path.exists(self._journal_path(path)):
+                    self._write_collection(path, self._records(path))
+    
+    def recover_journals(self):
+        """Replay journals left over from a previous run into their base files"""
+        for file_path in self.collection_files():
+            journal_path = self._journal_path(file_path)
+            if not os.path.exists(journal_path):
+                continue
+            
+            # Drop a torn trailing line so later appends start on a clean line
+            with open(journal_path, 'rb+') as f:
+                self._truncate_torn_tail(f)
+            
+            self.checkpoint(file_path)
+    
+    def _collection_name(self, file_path: str) -> str:
+        """Get the collection name of a JSON file path (e.g. 'products')"""
+        return os.path.splitext(os.path.basename(file_path))[0]
+    
+    def _collection_file(self, collection: str) -> str:
+        """Get the JSON file path of a collection name"""
+        for file_path in self.collection_files():
+            if self._collection_name(file_path) == collection:
+                return file_path
+        raise ValueError(f"Colección desconocida: {collection}")
+    
+    def collection_files(self) -> List[str]:
+        """Get the JSON file paths of every collection"""
+        return [
+            self.farmers_file,
+            self.products_file,
+            self.sales_points_file,
+            self.distribution_requests_file,
+            self.drivers_file,
+            self.deliveries_file
+        ]
+    
+    def _is_cache_fresh(self, file_path: str) -> bool:
+        """Check whether the cached copy of a collection matches its files"""
+        cached = self._cache.get(file_path)
+        return cached is not None and cached[0] == self._collection_signature(file_path)
+    
+    def _insert_record(self, file_path: str, record: Dict):
+        """Journal a new record"""
+        entry = {'op': 'insert', 'record': record}
+        if self._transaction is not None:
+            self._stage_entry(file_path, entry)
+            return
+        
+        # Inserts don't need the existing records; an unloaded collection picks
+        # the record up from the journal the next time it is read
+        with self._write_lock():
+            if self._is_cache_fresh(file_path):
+                self._replay_entry(file_path, self._cache[file_path][1], entry)
+            self._append_journal(file_path, [entry])
+            self._adjust_stats(file_path, None, record)
+    
+    def _update_record(self, file_path: str, record_id: int, changes: Dict) -> Optional[Dict]:
+        """Journal changed fields of a record, returning the updated record if found"""
+        return self._write_entry(file_path, {'op': 'update', 'id': record_id, 'changes': changes})
+    
+    def _delete_record(self, file_path: str, record_id: int) -> Optional[Dict]:
+        """Journal the removal of a record, returning the removed record if found"""
+        return self._write_entry(file_path, {'op': 'delete', 'id': record_id})
+    
+    def _write_entry(self, file_path: str, entry: Dict) -> Optional[Dict]:
+        """Apply an update or delete entry to the cache and journal it if it matched a record"""
+        if self._transaction is not None:
+            return self._stage_entry(file_path, entry)
+        
+        with self._write_lock():
+            records = self._records(file_path)
+            before = self._id_index[file_path].get(entry['id'])
+            before = dict(before) if before is not None else None
+            
+            record = self._replay_entry(file_path, records, entry)
+            if record is not None:
+                self._append_journal(file_path, [entry])
+                if not entry.get('archived'):
+                    self._adjust_stats(file_path, before, record if entry['op'] == 'update' else None)
+            return record
+    
+    # Inter-process locking
+    @contextmanager
+    def _locked(self, exclusive: bool):
+        """Hold the data directory lock, shared for readers and exclusive for writers.
+        
+        Nested acquisitions join the outer one. Without fcntl (Windows) this is a
+        no-op and only one instance should use a data directory at a time.
+        In thread-safe mode exclusive holders also take the thread write lock.
+        """
+        if exclusive and self._rwlock is not None and not self._rwlock.is_writer():
+            changes = {}
+            try:
+                with self._rwlock.write():
+                    try:
+                        with self._locked(exclusive):
+                            yield
+                    finally:
+                        changes = self._take_changes()
+            finally:
+                # Subscribers run once other threads may use the database again
+                self._publish_changes(changes)
+            return
+        
+        if self._lock_depth:
+            if exclusive and not self._lock_exclusive:
+                raise RuntimeError("No se puede pasar de un bloqueo compartido a uno exclusivo")
+            self._lock_depth += 1
+            try:
+                yield
+            finally:
+                self._lock_depth -= 1
+            return
+        
+        # A write-behind instance already holds the exclusive lock while it has buffered writes
+        if fcntl is not None and not self._lock_retained:
+            fcntl.flock(self._lock_handle.fileno(), fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+        self._lock_depth = 1
+        self._lock_exclusive = exclusive or self._lock_retained
+        try:
+            yield
+        finally:
+            self._lock_depth = 0
+            changes = self._take_changes() if exclusive and self._rwlock is None else {}
+            self._lock_retained = bool(self._dirty or self._dirty_meta)
+            if fcntl is not None and not self._lock_retained:
+                fcntl.flock(self._lock_handle.fileno(), fcntl.LOCK_UN)
+            self._publish_changes(changes)
+    
+    @contextmanager
+    def _write_lock(self):
+        """Hold the exclusive lock with sequences and counters reloaded if another process saved them"""
+        outermost = not self._lock_depth
+        with self._locked(exclusive=True):
+            if outermost:
+                if self._stat_signature(self.sequences_file) != self._sequences_signature:
+                    self.load_sequences()
+                if self._stat_signature(self.stats_file) != self._stats_signature:
+                    self.load_stats()
+            yield
+    
+    # Write-behind
+    def _defer_write(self) -> bool:
+        """Check whether a write should be buffered, scheduling the flush that will write it"""
+        if self.write_behind is None or self._flushing:
+            return False
+        
+        self._last_write = time.monotonic()
+        if self._dirty_since is None:
+            self._dirty_since = self._last_write
+        if self._flush_timer is None:
+            self._start_flush_timer(self.write_behind)
+        return True
+    
+    def _start_flush_timer(self, delay: float):
+        """Run _flush_when_idle on a timer thread after delay seconds"""
+        self._flush_timer = threading.Timer(delay, self._flush_when_idle)
+        self._flush_timer.daemon = True
+        self._flush_timer.start()
+    
+    def _flush_when_idle(self):
+        """Flush once writes have stopped for a window, or the oldest buffered one is due"""
+        with self._locked(exclusive=True):
+            self._flush_timer = None
+            if self._dirty_since is None:
+                return
+            
+            due = min(self._last_write + self.write_behind,
+                      self._dirty_since + self.write_behind * self.WRITE_BEHIND_MAX_WINDOWS)
+            wait = due - time.monotonic()
+            if wait > 0:
+                # Writes came in since the timer started; wait for the window to pass
+                self._start_flush_timer(wait)
+                return
+            self.flush()
+    
+    def flush(self):
+        """Write buffered write-behind changes to disk now (no-op without write_behind)"""
+        with self._locked(exclusive=True):
+            if self._flush_timer is not None:
+                self._flush_timer.cancel()
+                self._flush_timer = None
+            self._dirty_since = None
+            
+            pending, self._dirty = self._dirty, {}
+            meta, self._dirty_meta = self._dirty_meta, set()
+            self._flushing = True
+            try:
+                # Same order as a transaction commit: ids, records, then counters
+                if 'sequences' in meta:
+                    self.save_sequences()
+                for file_path, entries in pending.items():
+                    self._write_journal(file_path, entries)
+                if 'stats' in meta:
+                    self.save_stats()
+            finally:
+                self._flushing = False
+    
+    # Thread-safe reads
+    @contextmanager
+    def _reading(self):
+        """Hold the thread read lock over current, pinned caches (no-op unless thread-safe)"""
+        if self._rwlock is None or self._rwlock.is_writer() or getattr(self._pinned, 'depth', 0):
+            # Single-threaded mode, a writer reading its own changes, or a nested read
+            with self._rwlock.read() if self._rwlock is not None else nullcontext():
+                yield
+            return
+        
+        # Stale caches are reloaded under the write lock so readers never mutate them
+        if not self._caches_current():
+            with self._rwlock.write():
+                self._refresh_caches()
+        
+        with self._rwlock.read():
+            self._pinned.depth = 1
+            try:
+                yield
+            finally:
+                self._pinned.depth = 0
+    
+    def _caches_current(self) -> bool:
+        """Check whether every collection cache, built search index and the counters are current"""
+        return (all(self._is_cache_fresh(file_path) for file_path in self.collection_files())
+                and all(self._search_index[file_path] is not None for file_path in self._searched)
+                and self._stat_signature(self.stats_file) == self._stats_signature)
+    
+    def _refresh_caches(self):
+        """Reload stale collections, rebuild searched indexes and reload changed counters"""
+        self._load_collections(*self.collection_files())
+        for file_path in self._searched:
+            if self._search_index[file_path] is None:
+                self._build_search_index(file_path)
+        if self._stat_signature(self.stats_file) != self._stats_signature:
+            self.load_stats()
+    
+    # Change notification
+    def poll_changes(self):
+        """Publish reload events for the loaded collections another process changed.
+        
+        Costs a few stat calls when nothing changed; changed collections are reloaded
+        so they are reported once.
+        """
+        stale = [file_path for file_path in self.collection_files()
+                 if file_path in self._cache and not self._is_cache_fresh(file_path)]
+        if not stale:
+            return
+        
+        with self._rwlock.write() if self._rwlock is not None else nullcontext():
+            self._load_collections(*stale)
+        self._publish_changes({(self._collection_name(file_path), 'reload'): {} for file_path in stale})
+    
+    # Cold storage
+    def archive_closed_records(self, min_age_days: Optional[int] = None) -> Dict[str, int]:
+        """Move closed requests and their deliveries out of the hot files into monthly partitions.
+        
+        A request moves once it has been delivered or cancelled for min_age_days
+        (ARCHIVE_MIN_AGE_DAYS by default) and all of its deliveries have too. The
+        partitions are written before the hot copies are removed, so an interrupted
+        run leaves duplicates (the hot copy wins) rather than losing records.
+        Dashboard counters are unchanged. Returns the number of records moved per collection.
+        """
+        min_age_days = self.ARCHIVE_MIN_AGE_DAYS if min_age_days is None else min_age_days
+        cutoff = (datetime.now() - timedelta(days=min_age_days)).isoformat()
+        
+        def closed(record: Dict) -> bool:
+            return record.get('status') in self.ARCHIVE_CLOSED_STATUSES and self._closed_date(record) <= cutoff
+        
+        try:
+            with self.transaction():
+                requests = self._records(self.distribution_requests_file)
+                deliveries = self._records(self.deliveries_file)
+                
+                deliveries_by_request: Dict[int, List[Dict]] = {}
+                for delivery in deliveries:
+                    deliveries_by_request.setdefault(delivery.get('request_id'), []).append(delivery)
+                
+                moved = {self.distribution_requests_file: [], self.deliveries_file: []}
+                for request in requests:
+                    request_deliveries = deliveries_by_request.pop(request['id'], [])
+                    if closed(request) and all(closed(delivery) for delivery in request_deliveries):
+                        moved[self.distribution_requests_file].append(request)
+                        moved[self.deliveries_file].extend(request_deliveries)
+                
+                # Deliveries whose request is no longer hot go on their own
+                for request_deliveries in deliveries_by_request.values():
+                    moved[self.deliveries_file].extend(delivery for delivery in request_deliveries if closed(delivery))
+                
+                if any(moved.values()):
+                    self._write_partitions(moved)
+                    for file_path, records in moved.items():
+                        for record_id in [record['id'] for record in records]:
+                            self._write_entry(file_path, {'op': 'delete', 'id': record_id, 'archived': True})
+            
+            # Shrink the hot files right away
+            for file_path, records in moved.items():
+                if records:
+                    self.checkpoint(file_path)
+            
+            return {self._collection_name(file_path): len(records) for file_path, records in moved.items()}
+        
+        except Exception as e:
+            raise Exception(f"Error archivando registros cerrados: {str(e)}")
+    
+    def _closed_date(self, record: Dict) -> str:
+        """Get when a record was closed, falling back to when it was created"""
+        for field in self.CLOSED_DATE_FIELDS:
+            if record.get(field):
+                return record[field]
+        return ''
+    
+    def _partition_month(self, record: Dict) -> str:
+        """Get the month (YYYY-MM) of the partition a record is archived in"""
+        return (record.get('created_date') or '0000-00')[:7]
+    
+    def _partition_path(self, file_path: str, month: str) -> str:
+        """Get the partition file of a collection month"""
+        return os.path.join(self.archive_dir, f"{self._collection_name(file_path)}-{month}.json")
+    
+    def _write_partitions(self, moved: Dict[str, List[Dict]]):
+        """Merge records into their monthly partitions and record them in the archive index"""
+        if not os.path.exists(self.archive_dir):
+            os.makedirs(self.archive_dir)
+        
+        index = {collection: dict(ids) for collection, ids in self._archive_index().items()}
+        for file_path, records in moved.items():
+            by_month: Dict[str, List[Dict]] = {}
+            for record in records:
+                by_month.setdefault(self._partition_month(record), []).append(record)
+            
+            collection_index = index.setdefault(self._collection_name(file_path), {})
+            for month, month_records in by_month.items():
+                # Records archived by an interrupted earlier run are replaced, not repeated
+                merged = {record['id']: record for record in self._load_partition(file_path, month)[0]}
+                merged.update((record['id'], dict(record)) for record in month_records)
+                self._write_json_file(self._partition_path(file_path, month), sorted(merged.values(), key=lambda x: x['id']))
+                for record_id in merged:
+                    collection_index[str(record_id)] = month
+        
+        self._write_json_file(self.archive_index_file, index)
+    
+    def _write_json_file(self, path: str, data):
+        """Atomically write a JSON file"""
+        tmp_path = path + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=2, ensure_ascii=False, default=json_default)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    
+    def _archive_index(self) -> Dict[str, Dict[str, str]]:
+        """Get the archive index (collection -> {id: month}), reloaded if it changed"""
+        signature = self._stat_signature(self.archive_index_file)
+        if signature != self._archive_index_signature:
+            try:
+                with open(self.archive_index_file, 'r', encoding='utf-8') as f:
+                    self._archive_index_data = json.load(f)
+            except (FileNotFoundError, json.JSONDecodeError):
+                self._archive_index_data = {}
+            self._archive_index_signature = signature
+        return self._archive_index_data
+    
+    def _load_partition(self, file_path: str, month: str) -> Tuple[List[Dict], Dict[int, Dict]]:
+        """Get the records of a partition and their id index, parsed once per file version"""
+        path = self._partition_path(file_path, month)
+        signature = self._stat_signature(path)
+        if signature is None:
+            return [], {}
+        
+        cached = self._partition_cache.get(path)
+        if cached is None or cached[0] != signature:
+            record_type = self._record_types[file_path]
+            with open(path, 'r', encoding='utf-8') as f:
+                records = [record_type.from_dict(record) for record in json.load(f)]
+            cached = (signature, records, {record['id']: record for record in records})
+            self._partition_cache[path] = cached
+        return cached[1], cached[2]
+    
+    def _get_archived(self, file_path: str, record_id: int) -> Optional[Dict]:
+        """Get an archived record by id"""
+        month = self._archive_index().get(self._collection_name(file_path), {}).get(str(record_id))
+        if month is None:
+            return None
+        return self._load_partition(file_path, month)[1].get(record_id)
+    
+    def _iter_archived(self, file_path: str, start_date: Optional[str] = None,
+                       end_date: Optional[str] = None) -> Iterator[Dict]:
+        """Yield the archived records created within a date range, reading only its months"""
+        hot = self._id_index[file_path] if file_path in self._id_index else {}
+        months = set(self._archive_index().get(self._collection_name(file_path), {}).values())
+        for month in sorted(months):
+            if (start_date and month < start_date[:7]) or (end_date and month > end_date[:7]):
+                continue
+            for record in self._load_partition(file_path, month)[0]:
+                # A record still in the hot file is mid-archival; the hot copy wins
+                if record['id'] not in hot and self._in_date_range(record, start_date, end_date):
+                    yield record
+    
+    def _in_date_range(self, record: Dict, start_date: Optional[str], end_date: Optional[str]) -> bool:
+        """Check whether a record was created within an inclusive date range"""
+        created = (record.get('created_date') or '')[:10]
+        return (not start_date or created >= start_date) and (not end_date or created <= end_date)
+    
+    def _iter_date_range(self, file_path: str, include: Optional[Callable[[Dict], bool]], after: Optional[int],
+                         start_date: Optional[str], end_date: Optional[str]) -> Iterator[Dict]:
+        """Yield hot and archived records created within a date range in list order"""
+        records = [record for record in self._iter_sorted(file_path)
+                   if self._in_date_range(record, start_date, end_date)]
+        records.extend(self._iter_archived(file_path, start_date, end_date))
+        records.sort(key=lambda x: self._list_position(file_path, x),
+                     reverse=file_path in self._descending_orders)
+        
+        start = 0
+        if after is not None:
+            ids = [record['id'] for record in records]
+            if after not in ids:
+                raise ValueError(f"Cursor de paginación desconocido: {after}")
+            start = ids.index(after) + 1
+        
+        for record in records[start:]:
+            if include is None or include(record):
+                yield record
+    
+    # Transactions
+    @contextmanager
+    def transaction(self):
+        """Group writes into a unit of work.
+        
+        Changes are applied to the cache right away but only journaled when the
+        outermost block exits, with one append per touched collection. If the
+        block or the commit raises, every staged change is undone in the cache
+        (see _rollback for a commit that fails part way).
+        The exclusive lock is held for the whole block, so reads made inside it
+        see the latest data of every process and can't be invalidated before
+        the writes land.
+        """
+        if self._transaction is not None:
+            # Nested blocks join the enclosing transaction
+            yield self
+            return
+        
+        with self._write_lock():
+            self._transaction = {
+                'pending': {},
+                'undo': [],
+                'sequences': dict(self._sequences),
+                'stats': dict(self._stats),
+                'written': None
+            }
+            try:
+                yield self
+                self._commit()
+            except BaseException:
+                self._rollback()
+                raise
+            finally:
+                self._transaction = None
+    
+    def _stage_entry(self, file_path: str, entry: Dict) -> Optional[Dict]:
+        """Apply an entry inside a transaction and remember how to undo it"""
+        records = self._records(file_path)
+        record_id = entry['record']['id'] if entry['op'] == 'insert' else entry['id']
+        before = self._id_index[file_path].get(record_id)
+        before = dict(before) if before is not None else None
+        
+        record = self._replay_entry(file_path, records, entry)
+        if record is None:
+            return None
+        
+        if before is None:
+            undo = {'op': 'delete', 'id': record_id}
+        else:
+            undo = {'op': 'insert', 'record': before}
+        self._transaction['undo'].append((file_path, undo))
+        self._transaction['pending'].setdefault(file_path, []).append(entry)
+        if not entry.get('archived'):
+            # Archived records still count towards the dashboard
+            self._adjust_stats(file_path, before, record if entry['op'] != 'delete' else None)
+        return record
+    
+    def _commit(self):
+        """Write the staged entries of a transaction, one journal append per collection"""
+        # Collections appended so far, with their write-behind buffer length before the append
+        written = self._transaction['written'] = []
+        if self._sequences != self._transaction['sequences']:
+            self.save_sequences()
+        
+        for file_path, entries in self._transaction['pending'].items():
+            written.append((file_path, len(self._dirty.get(file_path, ()))))
+            self._append_journal(file_path, entries)
+        
+        if self._stats != self._transaction['stats']:
+            self.save_stats()
+    
+    def _rollback(self):
+        """Undo the staged changes of a transaction in reverse order.
+        
+        A commit that fails part way may already have appended some collections'
+        journals. Those appends can't be taken back, so the caches of those
+        collections are dropped and reloaded from disk, and buffered write-behind
+        entries are removed. Sequences the commit used stay taken so ids aren't reused.
+        """
+        for file_path, undo in reversed(self._transaction['undo']):
+            self._replay_entry(file_path, self._records(file_path), undo)
+        self._stats = self._transaction['stats']
+        
+        written = self._transaction['written']
+        if written is None:
+            self._sequences = self._transaction['sequences']
+            return
+        
+        self._discard_changes()
+        for file_path, buffered in written:
+            if file_path in self._dirty:
+                del self._dirty[file_path][buffered:]
+                if not self._dirty[file_path]:
+                    del self._dirty[file_path]
+            self._cache.pop(file_path, None)
+            self._record_change(self._collection_name(file_path), 'reload')
+    
+    @_reader
+    def get_cache_stats(self) -> Dict:
+        """Get collection cache hit/miss counters"""
+        lookups = self.cache_hits + self.cache_misses
+        return {
+            'hits': self.cache_hits,
+            'misses': self.cache_misses,
+            'hit_rate': self.cache_hits / lookups if lookups else 0.0,
+            'cached_collections': len(self._cache),
+            'cached_enriched_requests': len(self._enrichment_cache)
+        }
+    
+    # Text search
+    def search(self, collection: str, text: str, limit: Optional[int] = None,
+               active_only: bool = True) -> List[int]:
+        """Get the ids of the records whose search fields contain text (case-insensitive).
+        
+        Results are ranked by the first field that matches, then by list order.
+        Texts of three or more characters are narrowed through the trigram index;
+        shorter ones scan the indexed field values.
+        """
+        file_path = self._collection_file(collection)
+        if file_path not in self._search_fields:
+            raise ValueError(f"Búsqueda no soportada en la colección: {collection}")
+        
+        self._prepare_search(file_path)
+        with self._reading():
+            return self._search(file_path, text, limit, active_only)
+    
+    def _prepare_search(self, *file_paths: str):
+        """Build search indexes up front in thread-safe mode, where readers can't build them"""
+        if self._rwlock is None:
+            return
+        if self.products_file in file_paths:
+            # Product searches also match farmer names
+            file_paths += (self.farmers_file,)
+        if any(self._search_index[file_path] is None for file_path in file_paths):
+            with self._rwlock.write():
+                self._searched.update(file_paths)
+                self._refresh_caches()
+    
+    def _build_search_index(self, file_path: str):
+        """Build the trigram search index of a collection"""
+        records = self._records(file_path)
+        self._search_index[file_path] = {}
+        self._search_text[file_path] = {}
+        for record in records:
+            self._index_search(file_path, record)
+    
+    def _search(self, file_path: str, text: str, limit: Optional[int], active_only: bool) -> List[int]:
+        """Search a collection (see search)"""
+        self._records(file_path)
+        if self._search_index[file_path] is None:
+            self._build_search_index(file_path)
+        
+        text = text.lower()
+        texts = self._search_text[file_path]
+        if len(text) < 3:
+            candidates = texts.keys()
+        else:
+            index = self._search_index[file_path]
+            candidates = set.intersection(*sorted((index.get(t, set()) for t in self._trigrams(text)), key=len))
+        
+        flagged = self._flag_index[file_path] if active_only else None
+        positions = self._sort_position[file_path]
+        matches = []
+        for record_id in candidates:
+            if flagged is not None and record_id not in flagged:
+                continue
+            for rank, value in enumerate(texts[record_id]):
+                if text in value:
+                    matches.append((rank, positions[record_id], record_id))
+                    break
+        
+        if file_path == self.products_file:
+            matches.extend(self._search_products_by_farmer(text, {m[2] for m in matches}, flagged))
+        
+        matches = heapq.nsmallest(limit, matches) if limit is not None else sorted(matches)
+        return [record_id for _, _, record_id in matches]
+    
+    def _search_products_by_farmer(self, text: str, found: Set[int], flagged: Optional[Set[int]]) -> List[Tuple]:
+        """Get search matches for the products whose farmer name contains text"""
+        rank = len(self._search_fields[self.products_file])
+        positions = self._sort_position[self.products_file]
+        
+        product_ids = set()
+        for farmer_id in self._search(self.farmers_file, text, None, False):
+            if text in self._id_index[self.farmers_file][farmer_id]['name'].lower():
+                product_ids.update(self._farmer_products.get(farmer_id, ()))
+        if text in 'desconocido':
+            # Products of a missing farmer are listed under 'Desconocido'
+            product_ids.update(product_id for farmer_id, ids in self._farmer_products.items()
+                               if farmer_id not in self._id_index[self.farmers_file] for product_id in ids)
+        
+        return [(rank, positions[product_id], product_id) for product_id in product_ids
+                if product_id not in found and (flagged is None or product_id in flagged)]
     
     def get_next_id(self, data: List[Dict]) -> int:
         """Get next available ID"""
@@ -59,70 +1403,374 @@ class DatabaseManager:
             return 1
         return max(item.get('id', 0) for item in data) + 1
     
+    # Dashboard statistics
+    STAT_KEYS = (
+        'total_farmers', 'total_products', 'total_sales_points',
+        'pending_requests', 'confirmed_requests', 'in_transit_requests', 'delivered_requests',
+        'pending_deliveries', 'completed_deliveries'
+    )
+    
+    def load_stats(self):
+        """Load the persisted dashboard statistics, rebuilding them if missing"""
+        try:
+            with open(self.stats_file, 'r', encoding='utf-8') as f:
+                self._stats = json.load(f)
+            self._stats_signature = self._stat_signature(self.stats_file)
+        except (FileNotFoundError, json.JSONDecodeError):
+            self.rebuild_dashboard_stats()
+    
+    def save_stats(self):
+        """Persist the dashboard statistics"""
+        if self._defer_write():
+            self._dirty_meta.add('stats')
+            return
+        
+        tmp_path = self.stats_file + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self._stats, f, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.stats_file)
+        self._stats_signature = self._stat_signature(self.stats_file)
+    
+    def rebuild_dashboard_stats(self) -> Dict:
+        """Recount the dashboard statistics from every record (explicit repair)"""
+        with self._locked(exclusive=True):
+            self._stats = {key: 0 for key in self.STAT_KEYS}
+            for file_path, key in self._flag_stats.items():
+                self._stats[key] = self._count_flagged(file_path)
+            for file_path, keys in self._status_stats.items():
+                for status, key in keys.items():
+                    self._stats[key] += self._count_with_status(file_path, status)
+                for record in self._iter_archived(file_path):
+                    if record.get('status') in keys:
+                        self._stats[keys[record['status']]] += 1
+            self.save_stats()
+        return dict(self._stats)
+    
+    def _stat_contributions(self, file_path: str, record: Optional[Dict]) -> Dict[str, int]:
+        """Get the dashboard counters a single record adds to"""
+        if record is None:
+            return {}
+        if file_path in self._flag_stats:
+            if record.get(self._flag_fields[file_path], True):
+                return {self._flag_stats[file_path]: 1}
+            return {}
+        if file_path in self._status_stats:
+            key = self._status_stats[file_path].get(record.get('status'))
+            return {key: 1} if key else {}
+        return {}
+    
+    def _adjust_stats(self, file_path: str, before: Optional[Dict], after: Optional[Dict]):
+        """Apply the counter deltas of a record changing from before to after"""
+        removed = self._stat_contributions(file_path, before)
+        added = self._stat_contributions(file_path, after)
+        if removed == added:
+            return
+        
+        for key, delta in removed.items():
+            self._stats[key] = self._stats.get(key, 0) - delta
+        for key, delta in added.items():
+            self._stats[key] = self._stats.get(key, 0) + delta
+        
+        # Inside a transaction the counters are saved on commit
+        if self._transaction is None:
+            self.save_stats()
+    
+    # ID sequences
+    def load_sequences(self):
+        """Load the persisted ID sequences, seeding missing ones from existing records"""
+        try:
+            with open(self.sequences_file, 'r', encoding='utf-8') as f:
+                self._sequences = json.load(f)
+            self._sequences_signature = self._stat_signature(self.sequences_file)
+        except (FileNotFoundError, json.JSONDecodeError):
+            self._sequences = {}
+        
+        missing = [path for path in self.collection_files() if self._collection_name(path) not in self._sequences]
+        for file_path in missing:
+            # One-time max scan, like sqlite_sequence being created on first insert
+            archived_ids = self._archive_index().get(self._collection_name(file_path), {})
+            self._sequences[self._collection_name(file_path)] = max(
+                [self.get_next_id(self._records(file_path)) - 1] + [int(record_id) for record_id in archived_ids]
+            )
+        if missing:
+            self.save_sequences()
+    
+    def save_sequences(self):
+        """Persist the ID sequences"""
+        if self._defer_write():
+            self._dirty_meta.add('sequences')
+            return
+        
+        tmp_path = self.sequences_file + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self._sequences, f, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.sequences_file)
+        self._sequences_signature = self._stat_signature(self.sequences_file)
+    
+    def reserve_ids(self, collection: str, count: int) -> range:
+        """Reserve a block of consecutive IDs for a collection (e.g. for batch imports)"""
+        if count < 1:
+            raise ValueError("La cantidad de IDs a reservar debe ser positiva")
+        
+        self._collection_file(collection)
+        with self._write_lock():
+            first_id = self._sequences.get(collection, 0) + 1
+            self._sequences[collection] = first_id + count - 1
+            
+            # Inside a transaction the sequences are saved on commit
+            if self._transaction is None:
+                self.save_sequences()
+        return range(first_id, first_id + count)
+    
+    def _next_id(self, file_path: str) -> int:
+        """Allocate the next ID of a collection without reading its records"""
+        return self.reserve_ids(self._collection_name(file_path), 1)[0]
+    
     def close(self):
-        """Compatibility method - no action needed for JSON files"""
-        pass
+        """Flush buffered writes and checkpoint pending journals into the JSON files"""
+        self.flush()
+        self.checkpoint()
     
     def initialize_database(self):
         """Compatibility method - JSON files are initialized in constructor"""
         pass
     
+    # Record enrichment (callers load the joined collections first)
+    def _enrich_product(self, product: Dict) -> Dict:
+        """Get a copy of a product with its farmer name"""
+        product = dict(product)
+        farmer = self._id_index[self.farmers_file].get(product.get('farmer_id'))
+        product['farmer_name'] = farmer['name'] if farmer else 'Desconocido'
+        return product
+    
+    def _enrich_request(self, request: Dict) -> Dict:
+        """Get a copy of a distribution request with sales point and product information"""
+        enriched = self._enrichment_cache.get(request['id'])
+        if enriched is None:
+            # Concurrent readers may build the same entry; the dict updates are atomic
+            # and writers only invalidate under the write lock
+            enriched = self._build_enriched_request(request)
+            self._enrichment_cache[request['id']] = enriched
+            self._enrichment_deps.setdefault((self.sales_points_file, request.get('sales_point_id')), set()).add(request['id'])
+            for product_id in request.get('product_ids', []):
+                self._enrichment_deps.setdefault((self.products_file, product_id), set()).add(request['id'])
+        
+        # Callers get their own copy so the cached view stays untouched
+        request = self._snapshot(enriched)
+        request['product_details'] = [dict(line) for line in enriched['product_details']]
+        return request
+    
+    def _build_enriched_request(self, request: Dict) -> Dict:
+        """Join a distribution request with its sales point and products"""
+        request = dict(request)
+        
+        # Add sales point information
+        sales_point = self._id_index[self.sales_points_file].get(request.get('sales_point_id'))
+        if sales_point:
+            request['sales_point_name'] = sales_point['name']
+            request['sales_point_address'] = sales_point.get('address', '')
+        
+        # Add product information
+        product_details = []
+        total_amount = 0
+        for i, product_id in enumerate(request.get('product_ids', [])):
+            product = self._id_index[self.products_file].get(product_id)
+            if product:
+                quantity = request['quantities'][i] if i < len(request.get('quantities', [])) else 0
+                line_total = product['price_per_unit'] * quantity
+                total_amount += line_total
+                
+                product_details.append({
+                    'product_name': product['name'],
+                    'quantity': quantity,
+                    'unit': product['unit'],
+                    'price_per_unit': product['price_per_unit'],
+                    'line_total': line_total
+                })
+        
+        request['product_details'] = product_details
+        request['total_amount'] = total_amount
+        return request
+    
+    def _enrich_delivery(self, delivery: Dict) -> Dict:
+        """Get a copy of a delivery with request, sales point and driver information"""
+        delivery = dict(delivery)
+        
+        # Add request information (archived deliveries belong to archived requests)
+        request = self._id_index[self.distribution_requests_file].get(delivery.get('request_id'))
+        if request is None and delivery.get('request_id') is not None:
+            request = self._get_archived(self.distribution_requests_file, delivery['request_id'])
+        if request:
+            sales_point = self._id_index[self.sales_points_file].get(request.get('sales_point_id'))
+            if sales_point:
+                delivery['sales_point_name'] = sales_point['name']
+            delivery['total_amount'] = request.get('total_amount', 0)
+        
+        # Add driver information
+        driver = self._id_index[self.drivers_file].get(delivery.get('driver_id'))
+        if driver:
+            delivery['driver_name'] = driver['name']
+            delivery['driver_phone'] = driver['phone']
+            delivery['vehicle_info'] = f"{driver['vehicle_type']} - {driver['vehicle_plate']}"
+        
+        return delivery
+    
+    # Lookups by id
+    @_reader
+    def get_farmer(self, farmer_id: int) -> Optional[Dict]:
+        """Get a farmer by id"""
+        farmer = self._get_by_id(self.farmers_file, farmer_id)
+        return dict(farmer) if farmer else None
+    
+    @_reader
+    def get_product(self, product_id: int) -> Optional[Dict]:
+        """Get a product by id with farmer information"""
+        product = self._get_by_id(self.products_file, product_id)
+        self._records(self.farmers_file)
+        return self._enrich_product(product) if product else None
+    
+    @_reader
+    def get_sales_point(self, sales_point_id: int) -> Optional[Dict]:
+        """Get a sales point by id"""
+        sales_point = self._get_by_id(self.sales_points_file, sales_point_id)
+        return dict(sales_point) if sales_point else None
+    
+    @_reader
+    def get_driver(self, driver_id: int) -> Optional[Dict]:
+        """Get a driver by id"""
+        driver = self._get_by_id(self.drivers_file, driver_id)
+        return dict(driver) if driver else None
+    
+    @_reader
+    def get_request(self, request_id: int) -> Optional[Dict]:
+        """Get a distribution request by id with sales point and product information"""
+        request = self._get_by_id(self.distribution_requests_file, request_id)
+        self._load_collections(self.sales_points_file, self.products_file)
+        if request is None:
+            archived = self._get_archived(self.distribution_requests_file, request_id)
+            return self._snapshot(self._build_enriched_request(archived)) if archived else None
+        return self._enrich_request(request)
+    
+    @_reader
+    def get_delivery(self, delivery_id: int) -> Optional[Dict]:
+        """Get a delivery by id with request and driver information"""
+        delivery = self._get_by_id(self.deliveries_file, delivery_id)
+        self._load_collections(self.distribution_requests_file, self.sales_points_file, self.drivers_file)
+        if delivery is None:
+            delivery = self._get_archived(self.deliveries_file, delivery_id)
+        return self._enrich_delivery(delivery) if delivery else None
+    
+    # Record builders
+    def _build_farmer(self, farmer_id: int, farmer_data: Dict) -> Dict:
+        """Build a new farmer record"""
+        return {
+            'id': farmer_id,
+            'name': farmer_data['name'],
+            'contact_person': farmer_data.get('contact_person'),
+            'email': farmer_data.get('email'),
+            'phone': farmer_data.get('phone'),
+            'address': farmer_data.get('address'),
+            'farm_size': farmer_data.get('farm_size'),
+            'specialization': farmer_data.get('specialization'),
+            'certification': farmer_data.get('certification'),
+            'active': True,
+            'registration_date': datetime.now().isoformat()
+        }
+    
+    def _build_product(self, product_id: int, product_data: Dict) -> Dict:
+        """Build a new product record, rejecting dates that aren't YYYY-MM-DD"""
+        for field, label in (('harvest_date', 'cosecha'), ('expiry_date', 'vencimiento')):
+            if product_data.get(field) and not Validator.is_iso_date(product_data[field]):
+                raise ValueError(f"Formato de fecha de {label} inválido (use YYYY-MM-DD): {product_data[field]}")
+        
+        return {
+            'id': product_id,
+            'name': product_data['name'],
+            'category': product_data['category'],
+            'farmer_id': product_data['farmer_id'],
+            'quantity': product_data['quantity'],
+            'unit': product_data['unit'],
+            'price_per_unit': product_data['price_per_unit'],
+            'quality_grade': product_data.get('quality_grade'),
+            'harvest_date': product_data.get('harvest_date'),
+            'expiry_date': product_data.get('expiry_date'),
+            'storage_conditions': product_data.get('storage_conditions'),
+            'description': product_data.get('description'),
+            'available': True,
+            'created_date': datetime.now().isoformat()
+        }
+    
+    def _build_sales_point(self, sales_point_id: int, sales_point_data: Dict) -> Dict:
+        """Build a new sales point record"""
+        return {
+            'id': sales_point_id,
+            'name': sales_point_data['name'],
+            'type': sales_point_data['type'],
+            'contact_person': sales_point_data.get('contact_person'),
+            'email': sales_point_data.get('email'),
+            'phone': sales_point_data.get('phone'),
+            'address': sales_point_data['address'],
+            'capacity_info': sales_point_data.get('capacity_info'),
+            'active': True,
+            'registration_date': datetime.now().isoformat()
+        }
+    
+    def _build_driver(self, driver_id: int, driver_data: Dict) -> Dict:
+        """Build a new driver record"""
+        return {
+            'id': driver_id,
+            'name': driver_data['name'],
+            'phone': driver_data['phone'],
+            'email': driver_data.get('email'),
+            'license_number': driver_data['license_number'],
+            'vehicle_type': driver_data['vehicle_type'],
+            'vehicle_plate': driver_data['vehicle_plate'],
+            'vehicle_capacity': driver_data.get('vehicle_capacity'),
+            'active': True,
+            'registration_date': datetime.now().isoformat()
+        }
+    
     # Farmer operations
     def add_farmer(self, farmer_data: Dict) -> int:
         """Add a new farmer"""
         try:
-            farmers = self.load_json(self.farmers_file)
-            farmer_id = self.get_next_id(farmers)
+            farmer_id = self._next_id(self.farmers_file)
             
-            new_farmer = {
-                'id': farmer_id,
-                'name': farmer_data['name'],
-                'contact_person': farmer_data.get('contact_person'),
-                'email': farmer_data.get('email'),
-                'phone': farmer_data.get('phone'),
-                'address': farmer_data.get('address'),
-                'farm_size': farmer_data.get('farm_size'),
-                'specialization': farmer_data.get('specialization'),
-                'certification': farmer_data.get('certification'),
-                'active': True,
-                'registration_date': datetime.now().isoformat()
-            }
+            new_farmer = self._build_farmer(farmer_id, farmer_data)
             
-            farmers.append(new_farmer)
-            self.save_json(self.farmers_file, farmers)
+            self._insert_record(self.farmers_file, new_farmer)
             return farmer_id
-            
+        
         except Exception as e:
             raise Exception(f"Error agregando agricultor: {str(e)}")
     
-    def get_farmers(self, active_only: bool = True) -> List[Dict]:
+    @_reader
+    def get_farmers(self, active_only: bool = True, limit: Optional[int] = None,
+                    after: Optional[int] = None) -> List[Dict]:
         """Get all farmers"""
         try:
-            farmers = self.load_json(self.farmers_file)
-            
-            if active_only:
-                farmers = [f for f in farmers if f.get('active', True)]
-            
-            # Sort by name
-            farmers.sort(key=lambda x: x.get('name', ''))
-            return farmers
-            
+            return list(islice(self.iter_farmers(active_only, after=after), limit))
+        
         except Exception as e:
             raise Exception(f"Error obteniendo agricultores: {str(e)}")
     
+    def iter_farmers(self, active_only: bool = True, after: Optional[int] = None) -> Iterator[Dict]:
+        """Iterate farmers sorted by name"""
+        include = (lambda x: x['id'] in self._flag_index[self.farmers_file]) if active_only else None
+        for farmer in self._iter_sorted(self.farmers_file, include, after):
+            yield dict(farmer)
+    
     def update_farmer(self, farmer_id: int, farmer_data: Dict):
         """Update farmer information"""
         try:
-            farmers = self.load_json(self.farmers_file)
-            
-            for farmer in farmers:
-                if farmer['id'] == farmer_id:
-                    farmer.update(farmer_data)
-                    farmer['updated_date'] = datetime.now().isoformat()
-                    break
-            
-            self.save_json(self.farmers_file, farmers)
-            
+            changes = dict(farmer_data)
+            changes['updated_date'] = datetime.now().isoformat()
+            self._update_record(self.farmers_file, farmer_id, changes)
+        
         except Exception as e:
             raise Exception(f"Error actualizando agricultor: {str(e)}")
     
@@ -130,120 +1778,226 @@ class DatabaseManager:
     def add_product(self, product_data: Dict) -> int:
         """Add a new product"""
         try:
-            products = self.load_json(self.products_file)
-            product_id = self.get_next_id(products)
+            product_id = self._next_id(self.products_file)
             
-            new_product = {
-                'id': product_id,
-                'name': product_data['name'],
-                'category': product_data['category'],
-                'farmer_id': product_data['farmer_id'],
-                'quantity': product_data['quantity'],
-                'unit': product_data['unit'],
-                'price_per_unit': product_data['price_per_unit'],
-                'quality_grade': product_data.get('quality_grade'),
-                'harvest_date': product_data.get('harvest_date'),
-                'expiry_date': product_data.get('expiry_date'),
-                'storage_conditions': product_data.get('storage_conditions'),
-                'description': product_data.get('description'),
-                'available': True,
-                'created_date': datetime.now().isoformat()
-            }
+            new_product = self._build_product(product_id, product_data)
             
-            products.append(new_product)
-            self.save_json(self.products_file, products)
+            self._insert_record(self.products_file, new_product)
             return product_id
-            
+        
         except Exception as e:
             raise Exception(f"Error agregando producto: {str(e)}")
     
-    def get_products(self, available_only: bool = True, farmer_id: Optional[int] = None) -> List[Dict]:
+    @_reader
+    def get_products(self, available_only: bool = True, farmer_id: Optional[int] = None,
+                     limit: Optional[int] = None, after: Optional[int] = None) -> List[Dict]:
         """Get products with farmer information"""
         try:
-            products = self.load_json(self.products_file)
-            farmers = self.load_json(self.farmers_file)
-            
-            # Create farmer lookup dict
-            farmer_lookup = {f['id']: f['name'] for f in farmers}
-            
-            # Filter products
-            filtered_products = []
-            for product in products:
-                if available_only and not product.get('available', True):
-                    continue
-                if farmer_id and product.get('farmer_id') != farmer_id:
+            return list(islice(self.iter_products(available_only, farmer_id, after=after), limit))
+        
+        except Exception as e:
+            raise Exception(f"Error obteniendo productos: {str(e)}")
+    
+    def iter_products(self, available_only: bool = True, farmer_id: Optional[int] = None,
+                      after: Optional[int] = None) -> Iterator[Dict]:
+        """Iterate products with farmer information, sorted by expiry date, then by created date"""
+        self._records(self.farmers_file)
+        
+        include = (lambda x: x['id'] in self._flag_index[self.products_file]) if available_only else None
+        
+        # A farmer's products come from the farmer index instead of a walk over all products
+        ids = (lambda: self._farmer_products.get(farmer_id, ())) if farmer_id else None
+        for product in self._iter_sorted(self.products_file, include, after, ids):
+            yield self._enrich_product(product)
+    
+    def query_products(self, category: Optional[str] = None, farmer_id: Optional[int] = None,
+                       expiry_before: Optional[str] = None, min_quantity: Optional[float] = None,
+                       text: Optional[str] = None, order_by: str = 'expiry_date', limit: Optional[int] = None,
+                       available_only: bool = True) -> List[Dict]:
+        """Get lightweight product rows matching the given filters.
+        
+        expiry_before is inclusive (YYYY-MM-DD) and text is matched case-insensitively
+        against the product name, category and farmer name.
+        """
+        try:
+            if order_by not in self.PRODUCT_ORDERS:
+                raise ValueError(f"Orden no soportado: {order_by}")
+            
+            if text:
+                self._prepare_search(self.products_file)
+            with self._reading():
+                return self._query_products(category, farmer_id, expiry_before, min_quantity, text,
+                                            order_by, limit, available_only)
+        
+        except Exception as e:
+            raise Exception(f"Error consultando productos: {str(e)}")
+    
+    def _query_products(self, category: Optional[str], farmer_id: Optional[int], expiry_before: Optional[str],
+                        min_quantity: Optional[float], text: Optional[str], order_by: str,
+                        limit: Optional[int], available_only: bool) -> List[Dict]:
+        """Filter products (see query_products)"""
+        self._records(self.farmers_file)
+        self._records(self.products_file)
+        products = self._id_index[self.products_file]
+        
+        def matches(product: Dict) -> bool:
+            if available_only and product['id'] not in self._flag_index[self.products_file]:
+                return False
+            if category and product.get('category') != category:
+                return False
+            if expiry_before and not (Validator.is_iso_date(product.get('expiry_date'))
+                                      and product['expiry_date'] <= expiry_before):
+                return False
+            if min_quantity is not None and product.get('quantity', 0) < min_quantity:
+                return False
+            return True
+        
+        if text or farmer_id:
+            # Narrow to the text matches and/or the farmer's products, then sort them
+            candidate_ids = set(self._search(self.products_file, text, None, available_only)) if text else None
+            if farmer_id:
+                farmer_ids = self._farmer_products.get(farmer_id, set())
+                candidate_ids = candidate_ids & farmer_ids if candidate_ids is not None else farmer_ids
+            candidates = sorted(
+                (products[product_id] for product_id in candidate_ids),
+                key=lambda x: self._sort_position[self.products_file][x['id']]
+            )
+            selected = [product for product in candidates if matches(product)]
+        else:
+            # Walk the expiry-ordered list, stopping past expiry_before or at the limit
+            selected = []
+            stop_at_limit = limit is not None and order_by == 'expiry_date'
+            for product in self._iter_sorted(self.products_file):
+                if expiry_before and (product.get('expiry_date') or '9999-12-31') > expiry_before:
+                    break
+                if matches(product):
+                    selected.append(product)
+                    if stop_at_limit and len(selected) >= limit:
+                        break
+        
+        if order_by != 'expiry_date':
+            default = 0 if order_by in ('quantity', 'price_per_unit') else ''
+            selected.sort(key=lambda x: x.get(order_by) or default)
+        if limit is not None:
+            selected = selected[:limit]
+        
+        return [self._product_row(product) for product in selected]
+    
+    @_reader
+    def products_expiring_between(self, start: Optional[str] = None, end: Optional[str] = None,
+                                  available_only: bool = True) -> List[Dict]:
+        """Get lightweight rows of the products expiring between two dates (inclusive), soonest first"""
+        try:
+            self._records(self.farmers_file)
+            self._records(self.products_file)
+            products = self._id_index[self.products_file]
+            
+            lo = bisect_left(self._expiry_index, (start, 0)) if start else 0
+            hi = bisect_right(self._expiry_index, (end, float('inf'))) if end else len(self._expiry_index)
+            return [
+                self._product_row(products[product_id]) for _, product_id in self._expiry_index[lo:hi]
+                if not available_only or product_id in self._flag_index[self.products_file]
+            ]
+        
+        except Exception as e:
+            raise Exception(f"Error consultando productos por vencer: {str(e)}")
+    
+    def _product_row(self, product: Dict) -> Dict:
+        """Get the lightweight row of a product (callers load farmers first)"""
+        row = {field: product.get(field) for field in self.PRODUCT_ROW_FIELDS}
+        farmer = self._id_index[self.farmers_file].get(product.get('farmer_id'))
+        row['farmer_name'] = farmer['name'] if farmer else 'Desconocido'
+        return row
+    
+    @_reader
+    def product_aggregates(self, category: Optional[str] = None, expiring_by: Optional[str] = None) -> Dict:
+        """Get inventory totals of the available products, optionally of one category.
+        
+        Returns the product count, total quantity, inventory value (quantity x price),
+        sum of prices, products per category, per-farmer totals ({farmer_id: {'products',
+        'quantity', 'value'}}) and, with expiring_by (YYYY-MM-DD), how many expire by
+        then. Computed with numpy over the columnar product view when it is enabled.
+        """
+        try:
+            records = self._records(self.products_file)
+            if self._product_columns is not None:
+                category_code = VOCABULARIES['category'].code(category) if category else None
+                cached = self._product_columns.aggregates(
+                    category_code, expiry_ordinal(expiring_by) if expiring_by else None
+                )
+                
+                # The view shares its cached totals between calls; hand out a copy
+                totals = dict(cached)
+                totals['categories'] = {VOCABULARIES['category'].decode(code): count
+                                        for code, count in cached['categories'].items()}
+                totals['farmers'] = {farmer_id: dict(farmer) for farmer_id, farmer in cached['farmers'].items()}
+                return totals
+            
+            totals = {'products': 0, 'quantity': 0, 'value': 0, 'price_sum': 0, 'expiring': 0,
+                      'categories': {}, 'farmers': {}}
+            available = self._flag_index[self.products_file]
+            for product in records:
+                if product['id'] not in available or (category and product.get('category') != category):
                     continue
                 
-                # Add farmer name
-                product['farmer_name'] = farmer_lookup.get(product.get('farmer_id'), 'Desconocido')
-                filtered_products.append(product)
-            
-            # Sort by expiry date, then by created date
-            filtered_products.sort(key=lambda x: (
-                x.get('expiry_date') or '9999-12-31',
-                x.get('created_date') or ''
-            ), reverse=False)
-            
-            return filtered_products
-            
+                quantity = product.get('quantity') or 0
+                price = product.get('price_per_unit') or 0
+                totals['products'] += 1
+                totals['quantity'] += quantity
+                totals['value'] += quantity * price
+                totals['price_sum'] += price
+                if expiring_by and Validator.is_iso_date(product.get('expiry_date')) and product['expiry_date'] <= expiring_by:
+                    totals['expiring'] += 1
+                if 'category' in product:
+                    totals['categories'][product['category']] = totals['categories'].get(product['category'], 0) + 1
+                farmer_id = farmer_key(product.get('farmer_id'))
+                if farmer_id > 0:
+                    farmer = totals['farmers'].setdefault(farmer_id, {'products': 0, 'quantity': 0, 'value': 0})
+                    farmer['products'] += 1
+                    farmer['quantity'] += quantity
+                    farmer['value'] += quantity * price
+            return totals
+        
         except Exception as e:
-            raise Exception(f"Error obteniendo productos: {str(e)}")
+            raise Exception(f"Error calculando totales de inventario: {str(e)}")
     
     # Sales point operations
     def add_sales_point(self, sales_point_data: Dict) -> int:
         """Add a new sales point"""
         try:
-            sales_points = self.load_json(self.sales_points_file)
-            sales_point_id = self.get_next_id(sales_points)
+            sales_point_id = self._next_id(self.sales_points_file)
             
-            new_sales_point = {
-                'id': sales_point_id,
-                'name': sales_point_data['name'],
-                'type': sales_point_data['type'],
-                'contact_person': sales_point_data.get('contact_person'),
-                'email': sales_point_data.get('email'),
-                'phone': sales_point_data.get('phone'),
-                'address': sales_point_data['address'],
-                'capacity_info': sales_point_data.get('capacity_info'),
-                'active': True,
-                'registration_date': datetime.now().isoformat()
-            }
+            new_sales_point = self._build_sales_point(sales_point_id, sales_point_data)
             
-            sales_points.append(new_sales_point)
-            self.save_json(self.sales_points_file, sales_points)
+            self._insert_record(self.sales_points_file, new_sales_point)
             return sales_point_id
-            
+        
         except Exception as e:
             raise Exception(f"Error agregando punto de venta: {str(e)}")
     
-    def get_sales_points(self, active_only: bool = True) -> List[Dict]:
+    @_reader
+    def get_sales_points(self, active_only: bool = True, limit: Optional[int] = None,
+                         after: Optional[int] = None) -> List[Dict]:
         """Get all sales points"""
         try:
-            sales_points = self.load_json(self.sales_points_file)
-            
-            if active_only:
-                sales_points = [sp for sp in sales_points if sp.get('active', True)]
-            
-            # Sort by name
-            sales_points.sort(key=lambda x: x.get('name', ''))
-            return sales_points
-            
+            return list(islice(self.iter_sales_points(active_only, after=after), limit))
+        
         except Exception as e:
             raise Exception(f"Error obteniendo puntos de venta: {str(e)}")
     
+    def iter_sales_points(self, active_only: bool = True, after: Optional[int] = None) -> Iterator[Dict]:
+        """Iterate sales points sorted by name"""
+        include = (lambda x: x['id'] in self._flag_index[self.sales_points_file]) if active_only else None
+        for sales_point in self._iter_sorted(self.sales_points_file, include, after):
+            yield dict(sales_point)
+    
     def update_sales_point(self, sales_point_id: int, sales_point_data: Dict):
         """Update sales point information"""
         try:
-            sales_points = self.load_json(self.sales_points_file)
-            
-            for sales_point in sales_points:
-                if sales_point['id'] == sales_point_id:
-                    sales_point.update(sales_point_data)
-                    sales_point['updated_date'] = datetime.now().isoformat()
-                    break
-            
-            self.save_json(self.sales_points_file, sales_points)
-            
+            changes = dict(sales_point_data)
+            changes['updated_date'] = datetime.now().isoformat()
+            self._update_record(self.sales_points_file, sales_point_id, changes)
+        
         except Exception as e:
             raise Exception(f"Error actualizando punto de venta: {str(e)}")
     
@@ -251,66 +2005,100 @@ class DatabaseManager:
     def add_driver(self, driver_data: Dict) -> int:
         """Add a new driver"""
         try:
-            drivers = self.load_json(self.drivers_file)
-            driver_id = self.get_next_id(drivers)
+            driver_id = self._next_id(self.drivers_file)
             
-            new_driver = {
-                'id': driver_id,
-                'name': driver_data['name'],
-                'phone': driver_data['phone'],
-                'email': driver_data.get('email'),
-                'license_number': driver_data['license_number'],
-                'vehicle_type': driver_data['vehicle_type'],
-                'vehicle_plate': driver_data['vehicle_plate'],
-                'vehicle_capacity': driver_data.get('vehicle_capacity'),
-                'active': True,
-                'registration_date': datetime.now().isoformat()
-            }
+            new_driver = self._build_driver(driver_id, driver_data)
             
-            drivers.append(new_driver)
-            self.save_json(self.drivers_file, drivers)
+            self._insert_record(self.drivers_file, new_driver)
             return driver_id
-            
+        
         except Exception as e:
             raise Exception(f"Error agregando conductor: {str(e)}")
     
-    def get_drivers(self, active_only: bool = True) -> List[Dict]:
+    @_reader
+    def get_drivers(self, active_only: bool = True, limit: Optional[int] = None,
+                    after: Optional[int] = None) -> List[Dict]:
         """Get all drivers"""
         try:
-            drivers = self.load_json(self.drivers_file)
-            
-            if active_only:
-                drivers = [d for d in drivers if d.get('active', True)]
-            
-            # Sort by name
-            drivers.sort(key=lambda x: x.get('name', ''))
-            return drivers
-            
+            return list(islice(self.iter_drivers(active_only, after=after), limit))
+        
         except Exception as e:
             raise Exception(f"Error obteniendo conductores: {str(e)}")
     
+    def iter_drivers(self, active_only: bool = True, after: Optional[int] = None) -> Iterator[Dict]:
+        """Iterate drivers sorted by name"""
+        include = (lambda x: x['id'] in self._flag_index[self.drivers_file]) if active_only else None
+        for driver in self._iter_sorted(self.drivers_file, include, after):
+            yield dict(driver)
+    
     def update_driver(self, driver_id: int, driver_data: Dict):
         """Update driver information"""
         try:
-            drivers = self.load_json(self.drivers_file)
-            
-            for driver in drivers:
-                if driver['id'] == driver_id:
-                    driver.update(driver_data)
-                    driver['updated_date'] = datetime.now().isoformat()
-                    break
-            
-            self.save_json(self.drivers_file, drivers)
-            
+            changes = dict(driver_data)
+            changes['updated_date'] = datetime.now().isoformat()
+            self._update_record(self.drivers_file, driver_id, changes)
+        
         except Exception as e:
             raise Exception(f"Error actualizando conductor: {str(e)}")
     
+    # Bulk operations
+    def add_farmers_bulk(self, farmers_data: List[Dict]) -> Dict:
+        """Add many farmers with a single write"""
+        return self._add_bulk(self.farmers_file, farmers_data, Validator.validate_farmer_data, self._build_farmer)
+    
+    def add_products_bulk(self, products_data: List[Dict]) -> Dict:
+        """Add many products with a single write"""
+        return self._add_bulk(self.products_file, products_data, Validator.validate_product_data, self._build_product)
+    
+    def add_sales_points_bulk(self, sales_points_data: List[Dict]) -> Dict:
+        """Add many sales points with a single write"""
+        return self._add_bulk(self.sales_points_file, sales_points_data, Validator.validate_sales_point_data, self._build_sales_point)
+    
+    def add_drivers_bulk(self, drivers_data: List[Dict]) -> Dict:
+        """Add many drivers with a single write"""
+        return self._add_bulk(self.drivers_file, drivers_data, Validator.validate_driver_data, self._build_driver)
+    
+    def _add_bulk(self, file_path: str, rows: List[Dict], validate, build) -> Dict:
+        """Validate rows, allocate their ids in one block and journal them in one append.
+        
+        Invalid rows don't abort the batch; they are reported as (row index, error)
+        pairs next to the ids of the rows that were added.
+        """
+        valid_rows = []
+        errors = []
+        for index, row in enumerate(rows):
+            try:
+                is_valid, error_msg = validate(row)
+            except Exception as e:
+                is_valid, error_msg = False, str(e)
+            
+            if is_valid:
+                valid_rows.append((index, row))
+            else:
+                errors.append((index, error_msg))
+        
+        added_ids = []
+        if valid_rows:
+            with self.transaction():
+                ids = self.reserve_ids(self._collection_name(file_path), len(valid_rows))
+                for record_id, (index, row) in zip(ids, valid_rows):
+                    try:
+                        record = build(record_id, row)
+                    except (KeyError, TypeError, ValueError) as e:
+                        errors.append((index, f"Dato inválido: {str(e)}"))
+                        continue
+                    
+                    self._insert_record(file_path, record)
+                    added_ids.append(record_id)
+        
+        errors.sort()
+        return {'ids': added_ids, 'errors': errors}
+    
     # Distribution request operations
     def add_distribution_request(self, request_data: Dict) -> int:
         """Add a new distribution request"""
         try:
-            requests = self.load_json(self.distribution_requests_file)
-            request_id = self.get_next_id(requests)
+            request_id = self._next_id(self.distribution_requests_file)
             
             new_request = {
                 'id': request_id,
@@ -325,178 +2113,136 @@ class DatabaseManager:
                 'created_date': datetime.now().isoformat()
             }
             
-            requests.append(new_request)
-            self.save_json(self.distribution_requests_file, requests)
+            self._insert_record(self.distribution_requests_file, new_request)
             return request_id
-            
+        
         except Exception as e:
             raise Exception(f"Error agregando solicitud de distribución: {str(e)}")
     
     def add_distribution_request_with_auto_assignment(self, request_data: Dict) -> int:
         """Add a new distribution request and update inventory"""
         try:
-            # Create the distribution request
-            request_id = self.add_distribution_request(request_data)
-            
-            # Get product information
-            products = self.load_json(self.products_file)
-            
-            # Update inventory automatically
-            for i, product_id in enumerate(request_data['product_ids']):
-                quantity_requested = request_data['quantities'][i]
+            with self.transaction():
+                # Create the distribution request
+                request_id = self.add_distribution_request(request_data)
                 
-                # Find the product
-                product = next((p for p in products if p['id'] == product_id), None)
-                if not product:
-                    continue
+                # Update inventory automatically
+                for i, product_id in enumerate(request_data['product_ids']):
+                    quantity_requested = request_data['quantities'][i]
+                    
+                    # Find the product
+                    product = self._get_by_id(self.products_file, product_id)
+                    if not product:
+                        continue
+                    
+                    # Check if enough quantity is available
+                    if product['quantity'] < quantity_requested:
+                        raise Exception(f"Cantidad insuficiente para {product['name']}. Disponible: {product['quantity']}, Solicitado: {quantity_requested}")
+                    
+                    # Update product inventory
+                    changes = {'quantity': product['quantity'] - quantity_requested}
+                    if changes['quantity'] == 0:
+                        changes['available'] = False
+                    self._update_record(self.products_file, product_id, changes)
                 
-                # Check if enough quantity is available
-                if product['quantity'] < quantity_requested:
-                    raise Exception(f"Cantidad insuficiente para {product['name']}. Disponible: {product['quantity']}, Solicitado: {quantity_requested}")
+                # Update request status to confirmed
+                self._update_record(self.distribution_requests_file, request_id, {'status': 'confirmado'})
                 
-                # Update product inventory
-                product['quantity'] -= quantity_requested
-                if product['quantity'] == 0:
-                    product['available'] = False
-            
-            # Update request status to confirmed
-            requests = self.load_json(self.distribution_requests_file)
-            for request in requests:
-                if request['id'] == request_id:
-                    request['status'] = 'confirmado'
-                    break
-            
-            # Save all changes
-            self.save_json(self.products_file, products)
-            self.save_json(self.distribution_requests_file, requests)
-            
-            return request_id
-            
+                return request_id
+        
         except Exception as e:
             raise Exception(f"Error creando solicitud con asignación automática: {str(e)}")
     
     def cancel_distribution_request(self, request_id: int):
         """Cancel a distribution request and restore inventory"""
         try:
-            # Get request details
-            requests = self.load_json(self.distribution_requests_file)
-            request = next((r for r in requests if r['id'] == request_id), None)
-            if not request:
-                raise Exception("Solicitud no encontrada")
-            
-            if request['status'] == 'cancelado':
-                raise Exception("La solicitud ya está cancelada")
-            
-            if request['status'] in ['entregado', 'en_transito']:
-                raise Exception("No se puede cancelar una solicitud entregada o en tránsito")
-            
-            # Restore inventory if it was already confirmed
-            if request['status'] == 'confirmado':
-                products = self.load_json(self.products_file)
+            with self.transaction():
+                # Get request details
+                request = self._get_by_id(self.distribution_requests_file, request_id)
+                if not request:
+                    raise Exception("Solicitud no encontrada")
                 
-                for i, product_id in enumerate(request['product_ids']):
-                    quantity_to_restore = request['quantities'][i]
-                    
-                    # Find the product and restore quantity
-                    product = next((p for p in products if p['id'] == product_id), None)
-                    if product:
-                        product['quantity'] += quantity_to_restore
-                        product['available'] = True
+                if request['status'] == 'cancelado':
+                    raise Exception("La solicitud ya está cancelada")
                 
-                self.save_json(self.products_file, products)
-            
-            # Update request status
-            request['status'] = 'cancelado'
-            request['cancelled_date'] = datetime.now().isoformat()
-            
-            self.save_json(self.distribution_requests_file, requests)
-            
+                if request['status'] in ['entregado', 'en_transito']:
+                    raise Exception("No se puede cancelar una solicitud entregada o en tránsito")
+                
+                # Restore inventory if it was already confirmed
+                if request['status'] == 'confirmado':
+                    for i, product_id in enumerate(request['product_ids']):
+                        quantity_to_restore = request['quantities'][i]
+                        
+                        # Find the product and restore quantity
+                        product = self._get_by_id(self.products_file, product_id)
+                        if product:
+                            self._update_record(self.products_file, product_id, {
+                                'quantity': product['quantity'] + quantity_to_restore,
+                                'available': True
+                            })
+                
+                # Update request status
+                self._update_record(self.distribution_requests_file, request_id, {
+                    'status': 'cancelado',
+                    'cancelled_date': datetime.now().isoformat()
+                })
+        
         except Exception as e:
             raise Exception(f"Error cancelando solicitud: {str(e)}")
     
     def update_distribution_request(self, request_id: int, request_data: Dict):
         """Update a distribution request"""
         try:
-            requests = self.load_json(self.distribution_requests_file)
-            
-            for request in requests:
-                if request['id'] == request_id:
-                    request.update(request_data)
-                    request['updated_date'] = datetime.now().isoformat()
-                    break
-            
-            self.save_json(self.distribution_requests_file, requests)
-            
+            changes = dict(request_data)
+            changes['updated_date'] = datetime.now().isoformat()
+            self._update_record(self.distribution_requests_file, request_id, changes)
+        
         except Exception as e:
             raise Exception(f"Error actualizando solicitud: {str(e)}")
     
-    def get_distribution_requests(self, status: Optional[str] = None) -> List[Dict]:
-        """Get distribution requests with sales point and product information"""
+    @_reader
+    def get_distribution_requests(self, status: Optional[str] = None, limit: Optional[int] = None,
+                                  after: Optional[int] = None, start_date: Optional[str] = None,
+                                  end_date: Optional[str] = None) -> List[Dict]:
+        """Get distribution requests with sales point and product information.
+        
+        Without a date range only the hot file is read: open requests and recently
+        closed ones. With start_date and/or end_date (YYYY-MM-DD, inclusive, on the
+        creation date) the archived partitions of those months are read too.
+        """
         try:
-            requests = self.load_json(self.distribution_requests_file)
-            sales_points = self.load_json(self.sales_points_file)
-            products = self.load_json(self.products_file)
-            
-            # Create lookup dictionaries
-            sales_point_lookup = {sp['id']: sp for sp in sales_points}
-            product_lookup = {p['id']: p for p in products}
-            
-            # Filter and enrich requests
-            filtered_requests = []
-            for request in requests:
-                if status and request.get('status') != status:
-                    continue
-                
-                # Add sales point information
-                sales_point = sales_point_lookup.get(request.get('sales_point_id'))
-                if sales_point:
-                    request['sales_point_name'] = sales_point['name']
-                    request['sales_point_address'] = sales_point.get('address', '')
-                
-                # Add product information
-                product_details = []
-                total_amount = 0
-                for i, product_id in enumerate(request.get('product_ids', [])):
-                    product = product_lookup.get(product_id)
-                    if product:
-                        quantity = request['quantities'][i] if i < len(request.get('quantities', [])) else 0
-                        line_total = product['price_per_unit'] * quantity
-                        total_amount += line_total
-                        
-                        product_details.append({
-                            'product_name': product['name'],
-                            'quantity': quantity,
-                            'unit': product['unit'],
-                            'price_per_unit': product['price_per_unit'],
-                            'line_total': line_total
-                        })
-                
-                request['product_details'] = product_details
-                request['total_amount'] = total_amount
-                
-                filtered_requests.append(request)
-            
-            # Sort by created date (newest first)
-            filtered_requests.sort(key=lambda x: x.get('created_date', ''), reverse=True)
-            
-            return filtered_requests
-            
+            return list(islice(self.iter_distribution_requests(status, after, start_date, end_date), limit))
+        
         except Exception as e:
             raise Exception(f"Error obteniendo solicitudes de distribución: {str(e)}")
     
+    def iter_distribution_requests(self, status: Optional[str] = None, after: Optional[int] = None,
+                                   start_date: Optional[str] = None, end_date: Optional[str] = None) -> Iterator[Dict]:
+        """Iterate distribution requests with sales point and product information, newest first"""
+        self._load_collections(self.distribution_requests_file, self.sales_points_file, self.products_file)
+        if start_date or end_date:
+            include = (lambda x: x.get('status') == status) if status else None
+            requests = self._iter_date_range(self.distribution_requests_file, include, after, start_date, end_date)
+        else:
+            # A status filter walks only that status's ids
+            requests = self._iter_sorted(self.distribution_requests_file, None, after,
+                                         self._status_ids(self.distribution_requests_file, status))
+        
+        hot = self._id_index[self.distribution_requests_file]
+        for request in requests:
+            if request['id'] in hot:
+                yield self._enrich_request(request)
+            else:
+                yield self._snapshot(self._build_enriched_request(request))
+    
     def update_request_status(self, request_id: int, new_status: str):
         """Update distribution request status"""
         try:
-            requests = self.load_json(self.distribution_requests_file)
-            
-            for request in requests:
-                if request['id'] == request_id:
-                    request['status'] = new_status
-                    request['status_updated_date'] = datetime.now().isoformat()
-                    break
-            
-            self.save_json(self.distribution_requests_file, requests)
-            
+            self._update_record(self.distribution_requests_file, request_id, {
+                'status': new_status,
+                'status_updated_date': datetime.now().isoformat()
+            })
+        
         except Exception as e:
             raise Exception(f"Error actualizando estado de solicitud: {str(e)}")
     
@@ -504,135 +2250,135 @@ class DatabaseManager:
     def add_delivery(self, delivery_data: Dict) -> int:
         """Add a new delivery"""
         try:
-            deliveries = self.load_json(self.deliveries_file)
-            delivery_id = self.get_next_id(deliveries)
-            
-            new_delivery = {
-                'id': delivery_id,
-                'request_id': delivery_data['request_id'],
-                'driver_id': delivery_data['driver_id'],
-                'scheduled_date': delivery_data['scheduled_date'],
-                'delivery_address': delivery_data['delivery_address'],
-                'estimated_time': delivery_data.get('estimated_time'),
-                'special_instructions': delivery_data.get('special_instructions'),
-                'status': 'programado',
-                'created_date': datetime.now().isoformat()
-            }
-            
-            deliveries.append(new_delivery)
-            self.save_json(self.deliveries_file, deliveries)
-            
-            # Update request status to en_transito
-            self.update_request_status(delivery_data['request_id'], 'en_transito')
-            
-            return delivery_id
-            
+            with self.transaction():
+                delivery_id = self._next_id(self.deliveries_file)
+                
+                new_delivery = {
+                    'id': delivery_id,
+                    'request_id': delivery_data['request_id'],
+                    'driver_id': delivery_data['driver_id'],
+                    'scheduled_date': delivery_data['scheduled_date'],
+                    'delivery_address': delivery_data['delivery_address'],
+                    'estimated_time': delivery_data.get('estimated_time'),
+                    'special_instructions': delivery_data.get('special_instructions'),
+                    'status': 'programado',
+                    'created_date': datetime.now().isoformat()
+                }
+                
+                self._insert_record(self.deliveries_file, new_delivery)
+                
+                # Update request status to en_transito
+                self.update_request_status(delivery_data['request_id'], 'en_transito')
+                
+                return delivery_id
+        
         except Exception as e:
             raise Exception(f"Error agregando entrega: {str(e)}")
     
-    def get_deliveries(self, status: Optional[str] = None) -> List[Dict]:
-        """Get deliveries with detailed information"""
+    @_reader
+    def get_deliveries(self, status: Optional[str] = None, limit: Optional[int] = None,
+                       after: Optional[int] = None, start_date: Optional[str] = None,
+                       end_date: Optional[str] = None) -> List[Dict]:
+        """Get deliveries with detailed information.
+        
+        Like get_distribution_requests, archived deliveries are only read for a date range.
+        """
         try:
-            deliveries = self.load_json(self.deliveries_file)
-            requests = self.load_json(self.distribution_requests_file)
-            drivers = self.load_json(self.drivers_file)
-            sales_points = self.load_json(self.sales_points_file)
-            
-            # Create lookup dictionaries
-            request_lookup = {r['id']: r for r in requests}
-            driver_lookup = {d['id']: d for d in drivers}
-            sales_point_lookup = {sp['id']: sp for sp in sales_points}
-            
-            # Filter and enrich deliveries
-            filtered_deliveries = []
-            for delivery in deliveries:
-                if status and delivery.get('status') != status:
-                    continue
-                
-                # Add request information
-                request = request_lookup.get(delivery.get('request_id'))
-                if request:
-                    sales_point = sales_point_lookup.get(request.get('sales_point_id'))
-                    if sales_point:
-                        delivery['sales_point_name'] = sales_point['name']
-                    delivery['total_amount'] = request.get('total_amount', 0)
-                
-                # Add driver information
-                driver = driver_lookup.get(delivery.get('driver_id'))
-                if driver:
-                    delivery['driver_name'] = driver['name']
-                    delivery['driver_phone'] = driver['phone']
-                    delivery['vehicle_info'] = f"{driver['vehicle_type']} - {driver['vehicle_plate']}"
-                
-                filtered_deliveries.append(delivery)
-            
-            # Sort by scheduled date
-            filtered_deliveries.sort(key=lambda x: x.get('scheduled_date', ''))
-            
-            return filtered_deliveries
-            
+            return list(islice(self.iter_deliveries(status, after, start_date, end_date), limit))
+        
         except Exception as e:
             raise Exception(f"Error obteniendo entregas: {str(e)}")
     
+    def iter_deliveries(self, status: Optional[str] = None, after: Optional[int] = None,
+                        start_date: Optional[str] = None, end_date: Optional[str] = None) -> Iterator[Dict]:
+        """Iterate deliveries with detailed information, sorted by scheduled date"""
+        self._load_collections(self.distribution_requests_file, self.sales_points_file, self.drivers_file)
+        if start_date or end_date:
+            include = (lambda x: x.get('status') == status) if status else None
+            deliveries = self._iter_date_range(self.deliveries_file, include, after, start_date, end_date)
+        else:
+            # A status filter walks only that status's ids
+            deliveries = self._iter_sorted(self.deliveries_file, None, after, self._status_ids(self.deliveries_file, status))
+        for delivery in deliveries:
+            yield self._enrich_delivery(delivery)
+    
     def update_delivery_status(self, delivery_id: int, new_status: str, notes: Optional[str] = None):
         """Update delivery status and sync with request status"""
         try:
-            deliveries = self.load_json(self.deliveries_file)
-            
-            delivery = None
-            for d in deliveries:
-                if d['id'] == delivery_id:
-                    delivery = d
-                    break
-            
-            if not delivery:
-                raise Exception("Entrega no encontrada")
-            
-            # Update delivery status
-            delivery['status'] = new_status
-            delivery['status_updated_date'] = datetime.now().isoformat()
-            
-            if notes:
-                delivery['notes'] = notes
-            
-            # Update delivery completion date if delivered
-            if new_status == 'entregado':
-                delivery['delivered_date'] = datetime.now().isoformat()
-                # Update request status to delivered
-                self.update_request_status(delivery['request_id'], 'entregado')
-            elif new_status == 'cancelado':
-                delivery['cancelled_date'] = datetime.now().isoformat()
-                # Update request status to cancelled
-                self.update_request_status(delivery['request_id'], 'cancelado')
-            
-            self.save_json(self.deliveries_file, deliveries)
-            
+            with self.transaction():
+                delivery = self._get_by_id(self.deliveries_file, delivery_id)
+                if not delivery:
+                    raise Exception("Entrega no encontrada")
+                
+                # Update delivery status
+                changes = {
+                    'status': new_status,
+                    'status_updated_date': datetime.now().isoformat()
+                }
+                
+                if notes:
+                    changes['notes'] = notes
+                
+                # Update delivery completion date if delivered
+                if new_status == 'entregado':
+                    changes['delivered_date'] = datetime.now().isoformat()
+                    # Update request status to delivered
+                    self.update_request_status(delivery['request_id'], 'entregado')
+                elif new_status == 'cancelado':
+                    changes['cancelled_date'] = datetime.now().isoformat()
+                    # Update request status to cancelled
+                    self.update_request_status(delivery['request_id'], 'cancelado')
+                
+                self._update_record(self.deliveries_file, delivery_id, changes)
+        
         except Exception as e:
             raise Exception(f"Error actualizando estado de entrega: {str(e)}")
     
+    @_reader
+    def count_by(self, collection: str, field: str, start_date: Optional[str] = None,
+                 end_date: Optional[str] = None) -> Dict[str, int]:
+        """Count the records of a collection per value of a categorical field (e.g. status).
+        
+        Counting runs over the field's integer codes and decodes them once at the
+        end. Like the list methods, a creation date range also counts archived records.
+        """
+        try:
+            file_path = self._collection_file(collection)
+            if field not in self._record_types[file_path].CODED_FIELDS:
+                raise ValueError(f"Campo no categórico en {collection}: {field}")
+            vocabulary = VOCABULARIES[field]
+            
+            if start_date or end_date:
+                records = list(self._iter_date_range(file_path, None, None, start_date, end_date))
+            elif field == 'status' and file_path in self._status_index:
+                self._records(file_path)
+                return {vocabulary.decode(code): len(ids)
+                        for code, ids in self._status_index[file_path].items() if code >= 0 and ids}
+            else:
+                records = self._records(file_path)
+            
+            counts = [0] * len(vocabulary)
+            for record in records:
+                code = record.code(field)
+                if code >= 0:
+                    counts[code] += 1
+            return {vocabulary.decode(code): count for code, count in enumerate(counts) if count}
+        
+        except Exception as e:
+            raise Exception(f"Error contando registros: {str(e)}")
+    
+    @_reader
     def get_dashboard_stats(self) -> Dict:
         """Get statistics for dashboard"""
         try:
-            farmers = self.load_json(self.farmers_file)
-            products = self.load_json(self.products_file)
-            sales_points = self.load_json(self.sales_points_file)
-            requests = self.load_json(self.distribution_requests_file)
-            deliveries = self.load_json(self.deliveries_file)
+            # Counters are kept up to date by the write paths; only reload them
+            # if another instance saved newer ones (pinned readers already did)
+            if not getattr(self._pinned, 'depth', 0) and self._stat_signature(self.stats_file) != self._stats_signature:
+                self.load_stats()
             
-            # Calculate statistics
-            stats = {
-                'total_farmers': len([f for f in farmers if f.get('active', True)]),
-                'total_products': len([p for p in products if p.get('available', True)]),
-                'total_sales_points': len([sp for sp in sales_points if sp.get('active', True)]),
-                'pending_requests': len([r for r in requests if r.get('status') == 'pendiente']),
-                'confirmed_requests': len([r for r in requests if r.get('status') == 'confirmado']),
-                'in_transit_requests': len([r for r in requests if r.get('status') == 'en_transito']),
-                'delivered_requests': len([r for r in requests if r.get('status') == 'entregado']),
-                'pending_deliveries': len([d for d in deliveries if d.get('status') in ['programado', 'en_camino']]),
-                'completed_deliveries': len([d for d in deliveries if d.get('status') == 'entregado'])
-            }
+            stats = {key: self._stats.get(key, 0) for key in self.STAT_KEYS}
             
             return stats
-            
+        
         except Exception as e:
             raise Exception(f"Error obteniendo estadísticas: {str(e)}")
\ No newline at end of file
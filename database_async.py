@@ -0,0 +1,159 @@
+import asyncio
+import copy
+import functools
+import inspect
+import itertools
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, AsyncIterator, Callable, Dict, Iterable, Optional, Tuple
+from database import DatabaseManager
+
+class AsyncDatabaseManager:
+    """Asyncio facade over a thread-safe DatabaseManager.
+    
+    Every public DatabaseManager method is available as a coroutine of the same
+    name (await adb.get_products()) and runs in a worker thread, so file I/O and
+    JSON parsing never block the event loop. Identical reads awaited while one
+    is already running share its result instead of starting another. The
+    iter_* methods become async generators that page through the matching get_*
+    method, and stream_records one that pulls its records in chunks from a worker
+    thread. Transactions must run inside a single thread; pass a function that
+    uses db.transaction() to run().
+    """
+    
+    # Reads that can be coalesced (see DatabaseManager for the thread-safe list)
+    READ_METHODS = frozenset({
+        'load_json', 'get_farmer', 'get_product', 'get_sales_point', 'get_driver', 'get_request',
+        'get_delivery', 'get_farmers', 'get_products', 'get_sales_points', 'get_drivers',
+        'get_distribution_requests', 'get_deliveries', 'query_products', 'products_expiring_between',
+        'product_aggregates', 'search', 'count_by', 'get_dashboard_stats', 'get_cache_stats'
+    })
+    
+    PAGE_SIZE = 500
+    
+    def __init__(self, data_dir: str = "data", max_workers: Optional[int] = None, **kwargs):
+        """Initialize the async facade and its thread-safe database manager"""
+        self.db = DatabaseManager(data_dir, thread_safe=True, **kwargs)
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='campobca-db')
+        self._in_flight: Dict[Tuple, asyncio.Future] = {}
+        self._coalesced = 0
+        self._generation = 0
+    
+    def __getattr__(self, name: str) -> Callable:
+        """Expose DatabaseManager methods as coroutines (iter_* and stream_records as async generators)"""
+        if name.startswith('_') or not callable(getattr(DatabaseManager, name, None)):
+            raise AttributeError(name)
+        
+        if name.startswith('iter_'):
+            method = functools.partial(self._iterate, name)
+        elif name == 'stream_records':
+            method = functools.partial(self._stream, name)
+        elif name in self.READ_METHODS:
+            method = functools.partial(self._read, name)
+        else:
+            method = functools.partial(self._write, name)
+        
+        # Cache the bound coroutine function on the instance
+        method = functools.update_wrapper(method, getattr(DatabaseManager, name))
+        setattr(self, name, method)
+        return method
+    
+    def subscribe(self, callback: Callable, collections: Optional[Iterable[str]] = None) -> Callable[[], None]:
+        """Subscribe to change events; callbacks run on the worker thread that made the write"""
+        return self.db.subscribe(callback, collections)
+    
+    async def run(self, func: Callable, *args, **kwargs) -> Any:
+        """Run func(db, *args, **kwargs) in a worker thread, e.g. to group writes in a transaction"""
+        self._generation += 1
+        return await self._submit(func, self.db, *args, **kwargs)
+    
+    async def _submit(self, func: Callable, *args, **kwargs) -> Any:
+        """Run a callable in the executor"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, functools.partial(func, *args, **kwargs))
+    
+    async def _call(self, name: str, *args, **kwargs) -> Any:
+        """Run a database method in the executor"""
+        return await self._submit(getattr(self.db, name), *args, **kwargs)
+    
+    async def _write(self, name: str, *args, **kwargs) -> Any:
+        """Run a write; reads started after it won't join reads started before it"""
+        self._generation += 1
+        return await self._call(name, *args, **kwargs)
+    
+    async def _read(self, name: str, *args, **kwargs) -> Any:
+        """Run a read, joining an identical one that is already in flight"""
+        key = (self._generation, name, args, tuple(sorted(kwargs.items())))
+        try:
+            future = self._in_flight.get(key)
+        except TypeError:
+            # Unhashable arguments can't be matched against other reads
+            return await self._call(name, *args, **kwargs)
+        
+        if future is not None:
+            self._coalesced += 1
+            # Every awaiter gets its own copy, as with direct calls
+            return self._copy(await asyncio.shield(future))
+        
+        future = asyncio.ensure_future(self._call(name, *args, **kwargs))
+        self._in_flight[key] = future
+        try:
+            result = await asyncio.shield(future)
+        finally:
+            if self._in_flight.get(key) is future:
+                del self._in_flight[key]
+        return self._copy(result)
+    
+    def _copy(self, result: Any) -> Any:
+        """Copy a read result so awaiters of the same read can't see each other's changes"""
+        # Deep: results nest dicts (request product_details, aggregate totals per farmer)
+        return copy.deepcopy(result)
+    
+    async def _iterate(self, name: str, *args, **kwargs) -> AsyncIterator[Dict]:
+        """Iterate a collection page by page through the get_* method of an iter_* method"""
+        # get_* takes limit where iter_* takes after, so pass the iter_* arguments by name
+        kwargs = dict(inspect.signature(getattr(self.db, name)).bind(*args, **kwargs).arguments)
+        after = kwargs.pop('after', None)
+        get_method = 'get_' + name[len('iter_'):]
+        while True:
+            page = await self._read(get_method, limit=self.PAGE_SIZE, after=after, **kwargs)
+            for record in page:
+                yield record
+            if len(page) < self.PAGE_SIZE:
+                return
+            after = page[-1]['id']
+    
+    async def _stream(self, name: str, *args, **kwargs) -> AsyncIterator[Dict]:
+        """Iterate a streaming method, decoding each chunk of records in the executor"""
+        records = getattr(self.db, name)(*args, **kwargs)
+        
+        def next_chunk():
+            with self.db._reading():
+                return list(itertools.islice(records, self.PAGE_SIZE))
+        
+        try:
+            while True:
+                chunk = await self._submit(next_chunk)
+                for record in chunk:
+                    yield record
+                if len(chunk) < self.PAGE_SIZE:
+                    return
+        finally:
+            # Closing it closes its file, so that runs on a worker too
+            self._executor.submit(records.close)
+    
+    def get_coalesce_stats(self) -> Dict:
+        """Get coalescing statistics"""
+        return {'in_flight': len(self._in_flight), 'coalesced': self._coalesced}
+    
+    async def close(self):
+        """Checkpoint pending journals and stop the worker threads"""
+        try:
+            await self._call('close')
+        finally:
+            self._executor.shutdown(wait=True)
+    
+    async def __aenter__(self):
+        return self
+    
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
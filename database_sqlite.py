@@ -0,0 +1,1256 @@
+import json
+import os
+import sqlite3
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Callable, Iterator, List, Dict, Optional, Tuple
+
+from database import DatabaseManager
+from records import RECORD_TYPES, json_default
+from utils.events import ChangeNotifier
+from utils.validators import Validator
+
+
+class SQLiteDatabaseManager(ChangeNotifier):
+    """SQLite storage backend with the same public API as DatabaseManager"""
+    
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS farmers (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT NOT NULL,
+            contact_person TEXT,
+            email TEXT,
+            phone TEXT,
+            address TEXT,
+            farm_size TEXT,
+            specialization TEXT,
+            certification TEXT,
+            active BOOLEAN DEFAULT 1,
+            registration_date TIMESTAMP,
+            updated_date TIMESTAMP,
+            extra TEXT
+        );
+        
+        CREATE TABLE IF NOT EXISTS products (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT NOT NULL,
+            category TEXT NOT NULL,
+            farmer_id INTEGER NOT NULL,
+            quantity REAL NOT NULL,
+            unit TEXT NOT NULL,
+            price_per_unit REAL NOT NULL,
+            quality_grade TEXT,
+            harvest_date DATE,
+            expiry_date DATE,
+            storage_conditions TEXT,
+            description TEXT,
+            available BOOLEAN DEFAULT 1,
+            created_date TIMESTAMP,
+            updated_date TIMESTAMP,
+            extra TEXT,
+            FOREIGN KEY (farmer_id) REFERENCES farmers (id)
+        );
+        
+        CREATE TABLE IF NOT EXISTS sales_points (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT NOT NULL,
+            type TEXT NOT NULL,
+            contact_person TEXT,
+            email TEXT,
+            phone TEXT,
+            address TEXT NOT NULL,
+            capacity_info TEXT,
+            active BOOLEAN DEFAULT 1,
+            registration_date TIMESTAMP,
+            updated_date TIMESTAMP,
+            extra TEXT
+        );
+        
+        CREATE TABLE IF NOT EXISTS drivers (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT NOT NULL,
+            phone TEXT NOT NULL,
+            email TEXT,
+            license_number TEXT NOT NULL,
+            vehicle_type TEXT NOT NULL,
+            vehicle_plate TEXT NOT NULL,
+            vehicle_capacity TEXT,
+            active BOOLEAN DEFAULT 1,
+            registration_date TIMESTAMP,
+            updated_date TIMESTAMP,
+            extra TEXT
+        );
+        
+        CREATE TABLE IF NOT EXISTS distribution_requests (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            sales_point_id INTEGER NOT NULL,
+            requested_date DATE,
+            priority TEXT DEFAULT 'normal',
+            special_instructions TEXT,
+            status TEXT DEFAULT 'pendiente',
+            total_amount REAL DEFAULT 0,
+            created_date TIMESTAMP,
+            updated_date TIMESTAMP,
+            status_updated_date TIMESTAMP,
+            cancelled_date TIMESTAMP,
+            extra TEXT,
+            FOREIGN KEY (sales_point_id) REFERENCES sales_points (id)
+        );
+        
+        CREATE TABLE IF NOT EXISTS request_items (
+            request_id INTEGER NOT NULL,
+            position INTEGER NOT NULL,
+            product_id INTEGER NOT NULL,
+            quantity REAL NOT NULL,
+            PRIMARY KEY (request_id, position),
+            FOREIGN KEY (request_id) REFERENCES distribution_requests (id),
+            FOREIGN KEY (product_id) REFERENCES products (id)
+        );
+        
+        CREATE TABLE IF NOT EXISTS deliveries (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            request_id INTEGER NOT NULL,
+            driver_id INTEGER NOT NULL,
+            scheduled_date DATE NOT NULL,
+            delivery_address TEXT NOT NULL,
+            estimated_time TEXT,
+            special_instructions TEXT,
+            status TEXT DEFAULT 'programado',
+            notes TEXT,
+            created_date TIMESTAMP,
+            status_updated_date TIMESTAMP,
+            delivered_date TIMESTAMP,
+            cancelled_date TIMESTAMP,
+            extra TEXT,
+            FOREIGN KEY (request_id) REFERENCES distribution_requests (id),
+            FOREIGN KEY (driver_id) REFERENCES drivers (id)
+        );
+        
+        CREATE INDEX IF NOT EXISTS idx_products_farmer_id ON products (farmer_id);
+        CREATE INDEX IF NOT EXISTS idx_products_expiry_date ON products (expiry_date);
+        CREATE INDEX IF NOT EXISTS idx_requests_status ON distribution_requests (status);
+        CREATE INDEX IF NOT EXISTS idx_requests_sales_point_id ON distribution_requests (sales_point_id);
+        CREATE INDEX IF NOT EXISTS idx_request_items_product_id ON request_items (product_id);
+        CREATE INDEX IF NOT EXISTS idx_deliveries_status ON deliveries (status);
+        CREATE INDEX IF NOT EXISTS idx_deliveries_request_id ON deliveries (request_id);
+    """
+    
+    # Boolean columns that SQLite stores as 0/1
+    BOOLEAN_COLUMNS = ('active', 'available')
+    
+    # REAL columns whose whole values the JSON backend keeps as ints (500, not 500.0)
+    INTEGRAL_COLUMNS = ('quantity',)
+    
+    # Record tables; fields without a column of their own are kept as JSON in their extra column
+    RECORD_TABLES = ('farmers', 'products', 'sales_points', 'drivers', 'distribution_requests', 'deliveries')
+    
+    # Fields stored in other tables rather than in extra
+    ITEM_FIELDS = {'distribution_requests': ('product_ids', 'quantities')}
+    
+    # Rows fetched per query by the iter_* generators
+    PAGE_SIZE = 500
+    
+    # GLOB pattern of a well-formed YYYY-MM-DD date
+    ISO_DATE_GLOB = '[0-9][0-9][0-9][0-9]-[0-9][0-9]-[0-9][0-9]'
+    
+    PRODUCT_ROW_FIELDS = DatabaseManager.PRODUCT_ROW_FIELDS
+    PRODUCT_ORDERS = DatabaseManager.PRODUCT_ORDERS
+    SEARCH_FIELDS = DatabaseManager.SEARCH_FIELDS
+    
+    def __init__(self, db_path: str = os.path.join("data", "campobca.db")):
+        """Initialize SQLite database manager"""
+        self.db_path = db_path
+        
+        db_dir = os.path.dirname(self.db_path)
+        if db_dir and not os.path.exists(db_dir):
+            os.makedirs(db_dir)
+        
+        self._transaction_depth = 0
+        self._init_notifier()
+        # Wait for other processes' write transactions instead of failing right away
+        self.conn = sqlite3.connect(self.db_path, timeout=30)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute("PRAGMA foreign_keys=ON")
+        
+        self.initialize_database()
+        self._columns = {
+            table: {row['name'] for row in self.conn.execute(f"PRAGMA table_info({table})")} - {'extra'}
+            for table in self.RECORD_TABLES
+        }
+        self._data_version = self._get_data_version()
+    
+    def initialize_database(self):
+        """Create tables and indexes if they don't exist, adding the extra column to older files"""
+        with self.conn:
+            self.conn.executescript(self.SCHEMA)
+            for table in self.RECORD_TABLES:
+                columns = {row['name'] for row in self.conn.execute(f"PRAGMA table_info({table})")}
+                if 'extra' not in columns:
+                    self.conn.execute(f"ALTER TABLE {table} ADD COLUMN extra TEXT")
+    
+    def close(self):
+        """Close the database connection"""
+        self.conn.close()
+    
+    def flush(self):
+        """Nothing to flush: every committed transaction is already on disk"""
+        pass
+    
+    @contextmanager
+    def transaction(self):
+        """Group writes into a single SQLite transaction, rolled back if the block raises.
+        
+        The write lock is taken up front (BEGIN IMMEDIATE) so reads made inside the
+        block can't be invalidated by another process before the writes land.
+        """
+        if self._transaction_depth:
+            # Nested blocks join the enclosing transaction
+            self._transaction_depth += 1
+            try:
+                yield self
+            finally:
+                self._transaction_depth -= 1
+            return
+        
+        self._transaction_depth = 1
+        changes = {}
+        try:
+            with self.conn:
+                self.conn.execute("BEGIN IMMEDIATE")
+                yield self
+            changes = self._take_changes()
+        finally:
+            self._transaction_depth = 0
+            self._discard_changes()
+        self._publish_changes(changes)
+    
+    def _get_data_version(self) -> int:
+        """Get the counter SQLite bumps when another connection commits"""
+        return self.conn.execute("PRAGMA data_version").fetchone()[0]
+    
+    def archive_closed_records(self, min_age_days: Optional[int] = None) -> Dict[str, int]:
+        """Nothing to archive: closed rows stay in their indexed tables and cost open-record queries nothing"""
+        return {'distribution_requests': 0, 'deliveries': 0}
+    
+    def poll_changes(self):
+        """Publish reload events for every table if another process committed changes"""
+        data_version = self._get_data_version()
+        if data_version == self._data_version:
+            return
+        
+        self._data_version = data_version
+        self._publish_changes({(table, 'reload'): {} for table in self._columns})
+    
+    def is_empty(self) -> bool:
+        """Check whether the database holds no farmers, products or requests yet"""
+        for table in ('farmers', 'products', 'distribution_requests'):
+            if self.conn.execute(f"SELECT 1 FROM {table} LIMIT 1").fetchone():
+                return False
+        return True
+    
+    def import_from_json(self, data_dir: str = "data"):
+        """Copy every collection of a JSON data directory into this database, keeping ids"""
+        try:
+            source = DatabaseManager(data_dir)
+            
+            # The JSON files never enforced references, so don't reject dangling ones
+            self.conn.execute("PRAGMA foreign_keys=OFF")
+            with self.transaction():
+                for table, file_path in [
+                    ('farmers', source.farmers_file),
+                    ('products', source.products_file),
+                    ('sales_points', source.sales_points_file),
+                    ('drivers', source.drivers_file)
+                ]:
+                    for record in source.load_json(file_path):
+                        self._insert(table, record)
+                
+                # Requests and deliveries archive_closed_records moved out count too
+                for request in source.stream_records('distribution_requests', archived=True):
+                    self._insert('distribution_requests', request)
+                    self._insert_items(request['id'], request.get('product_ids', []), request.get('quantities', []))
+                
+                for delivery in source.stream_records('deliveries', archived=True):
+                    self._insert('deliveries', delivery)
+        
+        except Exception as e:
+            raise Exception(f"Error importando datos JSON: {str(e)}")
+        finally:
+            self.conn.execute("PRAGMA foreign_keys=ON")
+    
+    def reserve_ids(self, collection: str, count: int) -> range:
+        """Reserve a block of consecutive IDs for a table through sqlite_sequence"""
+        if count < 1:
+            raise ValueError("La cantidad de IDs a reservar debe ser positiva")
+        if collection not in self._columns:
+            raise ValueError(f"Colección desconocida: {collection}")
+        
+        with self.transaction():
+            row = self.conn.execute("SELECT seq FROM sqlite_sequence WHERE name = ?", (collection,)).fetchone()
+            max_id = self.conn.execute(f"SELECT COALESCE(MAX(id), 0) FROM {collection}").fetchone()[0]
+            first_id = max(row['seq'] if row else 0, max_id) + 1
+            if row:
+                self.conn.execute("UPDATE sqlite_sequence SET seq = ? WHERE name = ?", (first_id + count - 1, collection))
+            else:
+                self.conn.execute("INSERT INTO sqlite_sequence (name, seq) VALUES (?, ?)", (collection, first_id + count - 1))
+        return range(first_id, first_id + count)
+    
+    def _row_to_dict(self, row: sqlite3.Row) -> Dict:
+        """Convert a row to a plain dict, restoring boolean and whole-number columns and extra fields"""
+        record = dict(row)
+        for column in self.BOOLEAN_COLUMNS:
+            if column in record and record[column] is not None:
+                record[column] = bool(record[column])
+        for column in self.INTEGRAL_COLUMNS:
+            value = record.get(column)
+            if isinstance(value, float) and value.is_integer():
+                record[column] = int(value)
+        
+        extra = record.pop('extra', None)
+        if extra:
+            for key, value in json.loads(extra).items():
+                # Columns (and joined fields) win over a stale copy in extra
+                record.setdefault(key, value)
+        return record
+    
+    def _split_extra(self, table: str, record: Dict) -> Tuple[Dict, Dict]:
+        """Split a record into its column values and the fields kept in the extra column"""
+        columns = self._columns[table]
+        skipped = self.ITEM_FIELDS.get(table, ())
+        values = {k: v for k, v in record.items() if k in columns}
+        extra = {k: v for k, v in record.items() if k not in columns and k not in skipped}
+        return values, extra
+    
+    def stream_records(self, collection: str, archived: bool = False) -> Iterator[Dict]:
+        """Iterate the rows of a table in id order, a page at a time.
+        
+        Closed rows are never archived out of their tables, so archived changes nothing.
+        """
+        if collection not in self._columns:
+            raise ValueError(f"Colección desconocida: {collection}")
+        
+        last_id = 0
+        while True:
+            records = [self._row_to_dict(row) for row in self.conn.execute(
+                f"SELECT * FROM {collection} WHERE id > ? ORDER BY id LIMIT ?", (last_id, self.PAGE_SIZE)
+            )]
+            if collection == 'distribution_requests':
+                # Product lines live in request_items; restore the JSON record shape
+                items = self._request_items([record['id'] for record in records])
+                for record in records:
+                    record['product_ids'] = [item['product_id'] for item in items[record['id']]]
+                    record['quantities'] = [item['quantity'] for item in items[record['id']]]
+            
+            yield from records
+            if len(records) < self.PAGE_SIZE:
+                return
+            last_id = records[-1]['id']
+    
+    def _insert(self, table: str, record: Dict) -> int:
+        """Insert a record into a table, keeping fields without a column in its extra column"""
+        values, extra = self._split_extra(table, record)
+        if extra:
+            values['extra'] = json.dumps(extra, ensure_ascii=False, default=json_default)
+        columns = ', '.join(values)
+        placeholders = ', '.join('?' for _ in values)
+        cursor = self.conn.execute(f"INSERT INTO {table} ({columns}) VALUES ({placeholders})", list(values.values()))
+        self._record_change(table, 'insert', (cursor.lastrowid,))
+        return cursor.lastrowid
+    
+    def _update(self, table: str, record_id: int, changes: Dict):
+        """Update a record, merging fields without a column into its extra column"""
+        values, extra = self._split_extra(table, changes)
+        values.pop('id', None)
+        if extra:
+            row = self.conn.execute(f"SELECT extra FROM {table} WHERE id = ?", (record_id,)).fetchone()
+            if row is not None:
+                merged = json.loads(row['extra']) if row['extra'] else {}
+                merged.update(extra)
+                values['extra'] = json.dumps(merged, ensure_ascii=False, default=json_default)
+        if not values:
+            return
+        assignments = ', '.join(f"{column} = ?" for column in values)
+        self.conn.execute(f"UPDATE {table} SET {assignments} WHERE id = ?", list(values.values()) + [record_id])
+        self._record_change(table, 'update', (record_id,))
+    
+    def _insert_items(self, request_id: int, product_ids: List[int], quantities: List[float]):
+        """Insert the product lines of a distribution request"""
+        self.conn.executemany(
+            "INSERT INTO request_items (request_id, position, product_id, quantity) VALUES (?, ?, ?, ?)",
+            [(request_id, i, product_id, quantities[i] if i < len(quantities) else 0)
+             for i, product_id in enumerate(product_ids)]
+        )
+    
+    def _request_items(self, request_ids: List[int]) -> Dict[int, List[Dict]]:
+        """Get product lines joined with product data, grouped by request id"""
+        items = {request_id: [] for request_id in request_ids}
+        if not request_ids:
+            return items
+        
+        # Chunk to stay under SQLite's host parameter limit
+        for start in range(0, len(request_ids), 500):
+            chunk = request_ids[start:start + 500]
+            placeholders = ', '.join('?' for _ in chunk)
+            rows = self.conn.execute(f"""
+                SELECT ri.request_id, ri.product_id, ri.quantity,
+                       p.name AS product_name, p.unit, p.price_per_unit
+                FROM request_items ri
+                LEFT JOIN products p ON p.id = ri.product_id
+                WHERE ri.request_id IN ({placeholders})
+                ORDER BY ri.request_id, ri.position
+            """, chunk)
+            for row in rows:
+                items[row['request_id']].append(self._row_to_dict(row))
+        return items
+    
+    # Keyset pagination
+    def _keyset(self, table: str, alias: str, order: List[Tuple[str, bool]], after: int) -> Tuple[str, List]:
+        """Build the condition selecting the rows that sort after the row with id `after`"""
+        exprs = [expr for expr, _ in order] + [f"{alias}.id"]
+        descending = [desc for _, desc in order] + [False]
+        cursor = self.conn.execute(
+            f"SELECT {', '.join(exprs)} FROM {table} {alias} WHERE {alias}.id = ?", (after,)
+        ).fetchone()
+        if cursor is None:
+            raise ValueError(f"Cursor de paginación desconocido: {after}")
+        
+        clauses = []
+        params = []
+        for i, expr in enumerate(exprs):
+            terms = [f"{previous} = ?" for previous in exprs[:i]]
+            terms.append(f"{expr} {'<' if descending[i] else '>'} ?")
+            clauses.append("(" + " AND ".join(terms) + ")")
+            params.extend(cursor[:i + 1])
+        return "(" + " OR ".join(clauses) + ")", params
+    
+    def _paged(self, query: str, conditions: List[str], params: List, table: str, alias: str,
+               order: List[Tuple[str, bool]], limit: Optional[int] = None,
+               after: Optional[int] = None) -> Tuple[str, List]:
+        """Add filters, the keyset cursor, the list order and the limit to a SELECT"""
+        conditions = list(conditions)
+        params = list(params)
+        if after is not None:
+            condition, cursor_params = self._keyset(table, alias, order, after)
+            conditions.append(condition)
+            params.extend(cursor_params)
+        
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+        query += " ORDER BY " + ", ".join(f"{expr} DESC" if desc else expr for expr, desc in order)
+        query += f", {alias}.id"
+        if limit is not None:
+            query += " LIMIT ?"
+            params.append(limit)
+        return query, params
+    
+    def _iter_pages(self, fetch: Callable[[int, Optional[int]], List[Dict]],
+                    after: Optional[int] = None) -> Iterator[Dict]:
+        """Yield the rows of a list method page by page"""
+        while True:
+            page = fetch(self.PAGE_SIZE, after)
+            yield from page
+            if len(page) < self.PAGE_SIZE:
+                return
+            after = page[-1]['id']
+    
+    # Text search
+    def search(self, collection: str, text: str, limit: Optional[int] = None,
+               active_only: bool = True) -> List[int]:
+        """Get the ids of the records whose search fields contain text (case-insensitive).
+        
+        SQLite's LIKE and LOWER() only fold ASCII, so the search columns are
+        matched in Python; results are ranked by the first matching field.
+        """
+        if collection not in self.SEARCH_FIELDS:
+            raise ValueError(f"Búsqueda no soportada en la colección: {collection}")
+        
+        alias = 'c'
+        columns = [f"{alias}.{field}" for field in self.SEARCH_FIELDS[collection]]
+        joins = ""
+        if collection == 'products':
+            order = [("COALESCE(c.expiry_date, '9999-12-31')", False), ("COALESCE(c.created_date, '')", False)]
+            columns.append("COALESCE(f.name, 'Desconocido')")
+            joins = " LEFT JOIN farmers f ON f.id = c.farmer_id"
+            flag = 'available'
+        else:
+            order = [("c.name", False)]
+            flag = 'active'
+        
+        query, params = self._paged(f"SELECT c.id, {', '.join(columns)} FROM {collection} {alias}{joins}",
+                                    [f"c.{flag} = 1"] if active_only else [], [], collection, alias, order)
+        
+        text = text.lower()
+        matches = []
+        for position, row in enumerate(self.conn.execute(query, params)):
+            for rank, value in enumerate(row[1:]):
+                if text in str(value or '').lower():
+                    matches.append((rank, position, row[0]))
+                    break
+        
+        matches.sort()
+        return [record_id for _, _, record_id in matches[:limit]]
+    
+    # Lookups by id
+    def get_farmer(self, farmer_id: int) -> Optional[Dict]:
+        """Get a farmer by id"""
+        row = self.conn.execute("SELECT * FROM farmers WHERE id = ?", (farmer_id,)).fetchone()
+        return self._row_to_dict(row) if row else None
+    
+    def get_product(self, product_id: int) -> Optional[Dict]:
+        """Get a product by id with farmer information"""
+        row = self.conn.execute("""
+            SELECT p.*, COALESCE(f.name, 'Desconocido') AS farmer_name
+            FROM products p
+            LEFT JOIN farmers f ON f.id = p.farmer_id
+            WHERE p.id = ?
+        """, (product_id,)).fetchone()
+        return self._row_to_dict(row) if row else None
+    
+    def get_sales_point(self, sales_point_id: int) -> Optional[Dict]:
+        """Get a sales point by id"""
+        row = self.conn.execute("SELECT * FROM sales_points WHERE id = ?", (sales_point_id,)).fetchone()
+        return self._row_to_dict(row) if row else None
+    
+    def get_driver(self, driver_id: int) -> Optional[Dict]:
+        """Get a driver by id"""
+        row = self.conn.execute("SELECT * FROM drivers WHERE id = ?", (driver_id,)).fetchone()
+        return self._row_to_dict(row) if row else None
+    
+    def get_request(self, request_id: int) -> Optional[Dict]:
+        """Get a distribution request by id with sales point and product information"""
+        requests = self._select_requests(["r.id = ?"], [request_id])
+        return requests[0] if requests else None
+    
+    def get_delivery(self, delivery_id: int) -> Optional[Dict]:
+        """Get a delivery by id with request and driver information"""
+        deliveries = self._select_deliveries(["d.id = ?"], [delivery_id])
+        return deliveries[0] if deliveries else None
+    
+    # Farmer operations
+    def add_farmer(self, farmer_data: Dict) -> int:
+        """Add a new farmer"""
+        try:
+            with self.transaction():
+                return self._insert('farmers', {
+                    'name': farmer_data['name'],
+                    'contact_person': farmer_data.get('contact_person'),
+                    'email': farmer_data.get('email'),
+                    'phone': farmer_data.get('phone'),
+                    'address': farmer_data.get('address'),
+                    'farm_size': farmer_data.get('farm_size'),
+                    'specialization': farmer_data.get('specialization'),
+                    'certification': farmer_data.get('certification'),
+                    'active': True,
+                    'registration_date': datetime.now().isoformat()
+                })
+        
+        except Exception as e:
+            raise Exception(f"Error agregando agricultor: {str(e)}")
+    
+    def get_farmers(self, active_only: bool = True, limit: Optional[int] = None,
+                    after: Optional[int] = None) -> List[Dict]:
+        """Get all farmers"""
+        try:
+            conditions = ["f.active = 1"] if active_only else []
+            query, params = self._paged("SELECT f.* FROM farmers f", conditions, [],
+                                        "farmers", "f", [("f.name", False)], limit, after)
+            return [self._row_to_dict(row) for row in self.conn.execute(query, params)]
+        
+        except Exception as e:
+            raise Exception(f"Error obteniendo agricultores: {str(e)}")
+    
+    def iter_farmers(self, active_only: bool = True, after: Optional[int] = None) -> Iterator[Dict]:
+        """Iterate farmers sorted by name"""
+        return self._iter_pages(lambda limit, after: self.get_farmers(active_only, limit, after), after)
+    
+    def update_farmer(self, farmer_id: int, farmer_data: Dict):
+        """Update farmer information"""
+        try:
+            changes = dict(farmer_data)
+            changes['updated_date'] = datetime.now().isoformat()
+            with self.transaction():
+                self._update('farmers', farmer_id, changes)
+        
+        except Exception as e:
+            raise Exception(f"Error actualizando agricultor: {str(e)}")
+    
+    # Product operations
+    def add_product(self, product_data: Dict) -> int:
+        """Add a new product"""
+        try:
+            for field, label in (('harvest_date', 'cosecha'), ('expiry_date', 'vencimiento')):
+                if product_data.get(field) and not Validator.is_iso_date(product_data[field]):
+                    raise ValueError(f"Formato de fecha de {label} inválido (use YYYY-MM-DD): {product_data[field]}")
+            
+            with self.transaction():
+                return self._insert('products', {
+                    'name': product_data['name'],
+                    'category': product_data['category'],
+                    'farmer_id': product_data['farmer_id'],
+                    'quantity': product_data['quantity'],
+                    'unit': product_data['unit'],
+                    'price_per_unit': product_data['price_per_unit'],
+                    'quality_grade': product_data.get('quality_grade'),
+                    'harvest_date': product_data.get('harvest_date'),
+                    'expiry_date': product_data.get('expiry_date'),
+                    'storage_conditions': product_data.get('storage_conditions'),
+                    'description': product_data.get('description'),
+                    'available': True,
+                    'created_date': datetime.now().isoformat()
+                })
+        
+        except Exception as e:
+            raise Exception(f"Error agregando producto: {str(e)}")
+    
+    def get_products(self, available_only: bool = True, farmer_id: Optional[int] = None,
+                     limit: Optional[int] = None, after: Optional[int] = None) -> List[Dict]:
+        """Get products with farmer information"""
+        try:
+            conditions = []
+            params = []
+            if available_only:
+                conditions.append("p.available = 1")
+            if farmer_id:
+                conditions.append("p.farmer_id = ?")
+                params.append(farmer_id)
+            
+            query, params = self._paged("""
+                SELECT p.*, COALESCE(f.name, 'Desconocido') AS farmer_name
+                FROM products p
+                LEFT JOIN farmers f ON f.id = p.farmer_id
+            """, conditions, params, "products", "p", [
+                ("COALESCE(p.expiry_date, '9999-12-31')", False),
+                ("COALESCE(p.created_date, '')", False)
+            ], limit, after)
+            
+            return [self._row_to_dict(row) for row in self.conn.execute(query, params)]
+        
+        except Exception as e:
+            raise Exception(f"Error obteniendo productos: {str(e)}")
+    
+    def iter_products(self, available_only: bool = True, farmer_id: Optional[int] = None,
+                      after: Optional[int] = None) -> Iterator[Dict]:
+        """Iterate products with farmer information, sorted by expiry date, then by created date"""
+        return self._iter_pages(lambda limit, after: self.get_products(available_only, farmer_id, limit, after), after)
+    
+    def query_products(self, category: Optional[str] = None, farmer_id: Optional[int] = None,
+                       expiry_before: Optional[str] = None, min_quantity: Optional[float] = None,
+                       text: Optional[str] = None, order_by: str = 'expiry_date', limit: Optional[int] = None,
+                       available_only: bool = True) -> List[Dict]:
+        """Get lightweight product rows matching the given filters"""
+        try:
+            if order_by not in self.PRODUCT_ORDERS:
+                raise ValueError(f"Orden no soportado: {order_by}")
+            
+            conditions = []
+            params = []
+            if available_only:
+                conditions.append("p.available = 1")
+            if category:
+                conditions.append("p.category = ?")
+                params.append(category)
+            if farmer_id:
+                conditions.append("p.farmer_id = ?")
+                params.append(farmer_id)
+            if expiry_before:
+                conditions.append("p.expiry_date GLOB ? AND p.expiry_date <= ?")
+                params.extend([self.ISO_DATE_GLOB, expiry_before])
+            if min_quantity is not None:
+                conditions.append("p.quantity >= ?")
+                params.append(min_quantity)
+            
+            # Other orders break ties by the default expiry order, like the JSON backend
+            order = [("COALESCE(p.expiry_date, '9999-12-31')", False), ("COALESCE(p.created_date, '')", False)]
+            if order_by != 'expiry_date':
+                order.insert(0, (f"p.{order_by}", False))
+            
+            # SQLite's LOWER() only folds ASCII, so text is matched in Python and
+            # the limit can only be pushed down without it
+            columns = ', '.join(f"p.{field}" for field in self.PRODUCT_ROW_FIELDS)
+            query, params = self._paged(f"""
+                SELECT {columns}, COALESCE(f.name, 'Desconocido') AS farmer_name
+                FROM products p
+                LEFT JOIN farmers f ON f.id = p.farmer_id
+            """, conditions, params, "products", "p", order, None if text else limit)
+            
+            rows = [self._row_to_dict(row) for row in self.conn.execute(query, params)]
+            if text:
+                text = text.lower()
+                rows = [row for row in rows
+                        if text in row['name'].lower() or text in row['category'].lower()
+                        or text in row['farmer_name'].lower()][:limit]
+            return rows
+        
+        except Exception as e:
+            raise Exception(f"Error consultando productos: {str(e)}")
+    
+    def products_expiring_between(self, start: Optional[str] = None, end: Optional[str] = None,
+                                  available_only: bool = True) -> List[Dict]:
+        """Get lightweight rows of the products expiring between two dates (inclusive), soonest first"""
+        try:
+            # Malformed dates left by older versions would compare as strings; skip them
+            conditions = ["p.expiry_date GLOB ?"]
+            params = [self.ISO_DATE_GLOB]
+            if start:
+                conditions.append("p.expiry_date >= ?")
+                params.append(start)
+            if end:
+                conditions.append("p.expiry_date <= ?")
+                params.append(end)
+            if available_only:
+                conditions.append("p.available = 1")
+            
+            columns = ', '.join(f"p.{field}" for field in self.PRODUCT_ROW_FIELDS)
+            query, params = self._paged(f"""
+                SELECT {columns}, COALESCE(f.name, 'Desconocido') AS farmer_name
+                FROM products p
+                LEFT JOIN farmers f ON f.id = p.farmer_id
+            """, conditions, params, "products", "p", [("p.expiry_date", False)])
+            return [self._row_to_dict(row) for row in self.conn.execute(query, params)]
+        
+        except Exception as e:
+            raise Exception(f"Error consultando productos por vencer: {str(e)}")
+    
+    def product_aggregates(self, category: Optional[str] = None, expiring_by: Optional[str] = None) -> Dict:
+        """Get inventory totals of the available products, optionally of one category"""
+        try:
+            conditions = "available = 1"
+            params = []
+            if category:
+                conditions += " AND category = ?"
+                params.append(category)
+            
+            products, quantity, value, price_sum, expiring = self.conn.execute(f"""
+                SELECT COUNT(*), COALESCE(SUM(quantity), 0), COALESCE(SUM(quantity * price_per_unit), 0),
+                       COALESCE(SUM(price_per_unit), 0),
+                       COALESCE(SUM(expiry_date GLOB ? AND expiry_date <= ?), 0)
+                FROM products WHERE {conditions}
+            """, [self.ISO_DATE_GLOB, expiring_by or ''] + params).fetchone()
+            categories = dict(self.conn.execute(
+                f"SELECT category, COUNT(*) FROM products WHERE {conditions} AND category IS NOT NULL GROUP BY category",
+                params
+            ).fetchall())
+            farmers = {
+                farmer_id: {'products': count, 'quantity': farmer_quantity, 'value': farmer_value}
+                for farmer_id, count, farmer_quantity, farmer_value in self.conn.execute(f"""
+                    SELECT farmer_id, COUNT(*), COALESCE(SUM(quantity), 0), COALESCE(SUM(quantity * price_per_unit), 0)
+                    FROM products WHERE {conditions} AND farmer_id IS NOT NULL GROUP BY farmer_id
+                """, params)
+            }
+            return {
+                'products': products,
+                'quantity': quantity,
+                'value': value,
+                'price_sum': price_sum,
+                'expiring': expiring if expiring_by else 0,
+                'categories': categories,
+                'farmers': farmers
+            }
+        
+        except Exception as e:
+            raise Exception(f"Error calculando totales de inventario: {str(e)}")
+    
+    # Sales point operations
+    def add_sales_point(self, sales_point_data: Dict) -> int:
+        """Add a new sales point"""
+        try:
+            with self.transaction():
+                return self._insert('sales_points', {
+                    'name': sales_point_data['name'],
+                    'type': sales_point_data['type'],
+                    'contact_person': sales_point_data.get('contact_person'),
+                    'email': sales_point_data.get('email'),
+                    'phone': sales_point_data.get('phone'),
+                    'address': sales_point_data['address'],
+                    'capacity_info': sales_point_data.get('capacity_info'),
+                    'active': True,
+                    'registration_date': datetime.now().isoformat()
+                })
+        
+        except Exception as e:
+            raise Exception(f"Error agregando punto de venta: {str(e)}")
+    
+    def get_sales_points(self, active_only: bool = True, limit: Optional[int] = None,
+                         after: Optional[int] = None) -> List[Dict]:
+        """Get all sales points"""
+        try:
+            conditions = ["sp.active = 1"] if active_only else []
+            query, params = self._paged("SELECT sp.* FROM sales_points sp", conditions, [],
+                                        "sales_points", "sp", [("sp.name", False)], limit, after)
+            return [self._row_to_dict(row) for row in self.conn.execute(query, params)]
+        
+        except Exception as e:
+            raise Exception(f"Error obteniendo puntos de venta: {str(e)}")
+    
+    def iter_sales_points(self, active_only: bool = True, after: Optional[int] = None) -> Iterator[Dict]:
+        """Iterate sales points sorted by name"""
+        return self._iter_pages(lambda limit, after: self.get_sales_points(active_only, limit, after), after)
+    
+    def update_sales_point(self, sales_point_id: int, sales_point_data: Dict):
+        """Update sales point information"""
+        try:
+            changes = dict(sales_point_data)
+            changes['updated_date'] = datetime.now().isoformat()
+            with self.transaction():
+                self._update('sales_points', sales_point_id, changes)
+        
+        except Exception as e:
+            raise Exception(f"Error actualizando punto de venta: {str(e)}")
+    
+    # Driver operations
+    def add_driver(self, driver_data: Dict) -> int:
+        """Add a new driver"""
+        try:
+            with self.transaction():
+                return self._insert('drivers', {
+                    'name': driver_data['name'],
+                    'phone': driver_data['phone'],
+                    'email': driver_data.get('email'),
+                    'license_number': driver_data['license_number'],
+                    'vehicle_type': driver_data['vehicle_type'],
+                    'vehicle_plate': driver_data['vehicle_plate'],
+                    'vehicle_capacity': driver_data.get('vehicle_capacity'),
+                    'active': True,
+                    'registration_date': datetime.now().isoformat()
+                })
+        
+        except Exception as e:
+            raise Exception(f"Error agregando conductor: {str(e)}")
+    
+    def get_drivers(self, active_only: bool = True, limit: Optional[int] = None,
+                    after: Optional[int] = None) -> List[Dict]:
+        """Get all drivers"""
+        try:
+            conditions = ["dr.active = 1"] if active_only else []
+            query, params = self._paged("SELECT dr.* FROM drivers dr", conditions, [],
+                                        "drivers", "dr", [("dr.name", False)], limit, after)
+            return [self._row_to_dict(row) for row in self.conn.execute(query, params)]
+        
+        except Exception as e:
+            raise Exception(f"Error obteniendo conductores: {str(e)}")
+    
+    def iter_drivers(self, active_only: bool = True, after: Optional[int] = None) -> Iterator[Dict]:
+        """Iterate drivers sorted by name"""
+        return self._iter_pages(lambda limit, after: self.get_drivers(active_only, limit, after), after)
+    
+    def update_driver(self, driver_id: int, driver_data: Dict):
+        """Update driver information"""
+        try:
+            changes = dict(driver_data)
+            changes['updated_date'] = datetime.now().isoformat()
+            with self.transaction():
+                self._update('drivers', driver_id, changes)
+        
+        except Exception as e:
+            raise Exception(f"Error actualizando conductor: {str(e)}")
+    
+    # Bulk operations
+    def add_farmers_bulk(self, farmers_data: List[Dict]) -> Dict:
+        """Add many farmers in a single transaction"""
+        return self._add_bulk(farmers_data, Validator.validate_farmer_data, self.add_farmer)
+    
+    def add_products_bulk(self, products_data: List[Dict]) -> Dict:
+        """Add many products in a single transaction"""
+        return self._add_bulk(products_data, Validator.validate_product_data, self.add_product)
+    
+    def add_sales_points_bulk(self, sales_points_data: List[Dict]) -> Dict:
+        """Add many sales points in a single transaction"""
+        return self._add_bulk(sales_points_data, Validator.validate_sales_point_data, self.add_sales_point)
+    
+    def add_drivers_bulk(self, drivers_data: List[Dict]) -> Dict:
+        """Add many drivers in a single transaction"""
+        return self._add_bulk(drivers_data, Validator.validate_driver_data, self.add_driver)
+    
+    def _add_bulk(self, rows: List[Dict], validate, add) -> Dict:
+        """Validate and insert rows in one transaction, reporting per-row errors"""
+        added_ids = []
+        errors = []
+        with self.transaction():
+            for index, row in enumerate(rows):
+                try:
+                    is_valid, error_msg = validate(row)
+                    if not is_valid:
+                        errors.append((index, error_msg))
+                        continue
+                    # A failed statement only rolls back itself, not the batch
+                    added_ids.append(add(row))
+                except Exception as e:
+                    errors.append((index, str(e)))
+        
+        return {'ids': added_ids, 'errors': errors}
+    
+    # Distribution request operations
+    def _add_distribution_request(self, request_data: Dict) -> int:
+        """Insert a distribution request and its product lines (caller owns the transaction)"""
+        request_id = self._insert('distribution_requests', {
+            'sales_point_id': request_data['sales_point_id'],
+            'requested_date': request_data['requested_date'],
+            'priority': request_data.get('priority', 'normal'),
+            'special_instructions': request_data.get('special_instructions'),
+            'status': 'pendiente',
+            'total_amount': request_data.get('total_amount', 0),
+            'created_date': datetime.now().isoformat()
+        })
+        self._insert_items(request_id, request_data['product_ids'], request_data['quantities'])
+        return request_id
+    
+    def add_distribution_request(self, request_data: Dict) -> int:
+        """Add a new distribution request"""
+        try:
+            with self.transaction():
+                return self._add_distribution_request(request_data)
+        
+        except Exception as e:
+            raise Exception(f"Error agregando solicitud de distribución: {str(e)}")
+    
+    def add_distribution_request_with_auto_assignment(self, request_data: Dict) -> int:
+        """Add a new distribution request and update inventory"""
+        try:
+            with self.transaction():
+                # Create the distribution request
+                request_id = self._add_distribution_request(request_data)
+                
+                # Update inventory automatically
+                for i, product_id in enumerate(request_data['product_ids']):
+                    quantity_requested = request_data['quantities'][i]
+                    
+                    product = self.conn.execute(
+                        "SELECT name, quantity FROM products WHERE id = ?", (product_id,)
+                    ).fetchone()
+                    if not product:
+                        continue
+                    
+                    # Check if enough quantity is available
+                    if product['quantity'] < quantity_requested:
+                        raise Exception(f"Cantidad insuficiente para {product['name']}. Disponible: {product['quantity']}, Solicitado: {quantity_requested}")
+                    
+                    # Update product inventory
+                    self.conn.execute("""
+                        UPDATE products
+                        SET quantity = quantity - ?,
+                            available = CASE WHEN quantity - ? = 0 THEN 0 ELSE available END
+                        WHERE id = ?
+                    """, (quantity_requested, quantity_requested, product_id))
+                    self._record_change('products', 'update', (product_id,))
+                
+                # Update request status to confirmed
+                self._update('distribution_requests', request_id, {'status': 'confirmado'})
+            
+            return request_id
+        
+        except Exception as e:
+            raise Exception(f"Error creando solicitud con asignación automática: {str(e)}")
+    
+    def cancel_distribution_request(self, request_id: int):
+        """Cancel a distribution request and restore inventory"""
+        try:
+            with self.transaction():
+                request = self.conn.execute(
+                    "SELECT status FROM distribution_requests WHERE id = ?", (request_id,)
+                ).fetchone()
+                if not request:
+                    raise Exception("Solicitud no encontrada")
+                
+                if request['status'] == 'cancelado':
+                    raise Exception("La solicitud ya está cancelada")
+                
+                if request['status'] in ['entregado', 'en_transito']:
+                    raise Exception("No se puede cancelar una solicitud entregada o en tránsito")
+                
+                # Restore inventory if it was already confirmed
+                if request['status'] == 'confirmado':
+                    self.conn.execute("""
+                        UPDATE products
+                        SET quantity = quantity + (
+                                SELECT SUM(ri.quantity) FROM request_items ri
+                                WHERE ri.request_id = ? AND ri.product_id = products.id
+                            ),
+                            available = 1
+                        WHERE id IN (SELECT product_id FROM request_items WHERE request_id = ?)
+                    """, (request_id, request_id))
+                    self._record_change('products', 'update', [
+                        row['product_id'] for row in self.conn.execute(
+                            "SELECT product_id FROM request_items WHERE request_id = ?", (request_id,))
+                    ])
+                
+                # Update request status
+                self._update('distribution_requests', request_id, {
+                    'status': 'cancelado',
+                    'cancelled_date': datetime.now().isoformat()
+                })
+        
+        except Exception as e:
+            raise Exception(f"Error cancelando solicitud: {str(e)}")
+    
+    def update_distribution_request(self, request_id: int, request_data: Dict):
+        """Update a distribution request"""
+        try:
+            changes = dict(request_data)
+            changes['updated_date'] = datetime.now().isoformat()
+            with self.transaction():
+                self._update('distribution_requests', request_id, changes)
+                if 'product_ids' in changes:
+                    self.conn.execute("DELETE FROM request_items WHERE request_id = ?", (request_id,))
+                    self._insert_items(request_id, changes['product_ids'], changes.get('quantities', []))
+        
+        except Exception as e:
+            raise Exception(f"Error actualizando solicitud: {str(e)}")
+    
+    def get_distribution_requests(self, status: Optional[str] = None, limit: Optional[int] = None,
+                                  after: Optional[int] = None, start_date: Optional[str] = None,
+                                  end_date: Optional[str] = None) -> List[Dict]:
+        """Get distribution requests with sales point and product information"""
+        try:
+            conditions, params = self._filters("r", status, start_date, end_date)
+            return self._select_requests(conditions, params, limit, after)
+        
+        except Exception as e:
+            raise Exception(f"Error obteniendo solicitudes de distribución: {str(e)}")
+    
+    def iter_distribution_requests(self, status: Optional[str] = None, after: Optional[int] = None,
+                                   start_date: Optional[str] = None, end_date: Optional[str] = None) -> Iterator[Dict]:
+        """Iterate distribution requests with sales point and product information, newest first"""
+        return self._iter_pages(
+            lambda limit, after: self.get_distribution_requests(status, limit, after, start_date, end_date), after)
+    
+    def _filters(self, alias: str, status: Optional[str], start_date: Optional[str],
+                 end_date: Optional[str]) -> Tuple[List[str], List]:
+        """Build status and creation date range (inclusive, YYYY-MM-DD) conditions"""
+        conditions, params = [], []
+        if status:
+            conditions.append(f"{alias}.status = ?")
+            params.append(status)
+        if start_date:
+            conditions.append(f"substr({alias}.created_date, 1, 10) >= ?")
+            params.append(start_date)
+        if end_date:
+            # Like the JSON backend, a missing creation date sorts before every date
+            conditions.append(f"COALESCE(substr({alias}.created_date, 1, 10), '') <= ?")
+            params.append(end_date)
+        return conditions, params
+    
+    def _select_requests(self, conditions: Optional[List[str]] = None, params: Optional[List] = None,
+                         limit: Optional[int] = None, after: Optional[int] = None) -> List[Dict]:
+        """Select distribution requests enriched with sales point and product information"""
+        query, params = self._paged("""
+            SELECT r.*, sp.name AS sales_point_name, sp.address AS sales_point_address
+            FROM distribution_requests r
+            LEFT JOIN sales_points sp ON sp.id = r.sales_point_id
+        """, conditions or [], params or [], "distribution_requests", "r", [("r.created_date", True)], limit, after)
+        
+        requests = []
+        for row in self.conn.execute(query, params):
+            request = self._row_to_dict(row)
+            if request['sales_point_name'] is None:
+                del request['sales_point_name']
+                del request['sales_point_address']
+            elif request['sales_point_address'] is None:
+                request['sales_point_address'] = ''
+            requests.append(request)
+        
+        items = self._request_items([r['id'] for r in requests])
+        for request in requests:
+            product_details = []
+            total_amount = 0
+            request['product_ids'] = []
+            request['quantities'] = []
+            for item in items[request['id']]:
+                request['product_ids'].append(item['product_id'])
+                request['quantities'].append(item['quantity'])
+                if item['product_name'] is None:
+                    continue
+                
+                line_total = item['price_per_unit'] * item['quantity']
+                total_amount += line_total
+                product_details.append({
+                    'product_name': item['product_name'],
+                    'quantity': item['quantity'],
+                    'unit': item['unit'],
+                    'price_per_unit': item['price_per_unit'],
+                    'line_total': line_total
+                })
+            
+            request['product_details'] = product_details
+            request['total_amount'] = total_amount
+        
+        return requests
+    
+    def update_request_status(self, request_id: int, new_status: str):
+        """Update distribution request status"""
+        try:
+            with self.transaction():
+                self._update('distribution_requests', request_id, {
+                    'status': new_status,
+                    'status_updated_date': datetime.now().isoformat()
+                })
+        
+        except Exception as e:
+            raise Exception(f"Error actualizando estado de solicitud: {str(e)}")
+    
+    # Delivery operations
+    def add_delivery(self, delivery_data: Dict) -> int:
+        """Add a new delivery"""
+        try:
+            with self.transaction():
+                delivery_id = self._insert('deliveries', {
+                    'request_id': delivery_data['request_id'],
+                    'driver_id': delivery_data['driver_id'],
+                    'scheduled_date': delivery_data['scheduled_date'],
+                    'delivery_address': delivery_data['delivery_address'],
+                    'estimated_time': delivery_data.get('estimated_time'),
+                    'special_instructions': delivery_data.get('special_instructions'),
+                    'status': 'programado',
+                    'created_date': datetime.now().isoformat()
+                })
+                
+                # Update request status to en_transito
+                self._update('distribution_requests', delivery_data['request_id'], {
+                    'status': 'en_transito',
+                    'status_updated_date': datetime.now().isoformat()
+                })
+            
+            return delivery_id
+        
+        except Exception as e:
+            raise Exception(f"Error agregando entrega: {str(e)}")
+    
+    def get_deliveries(self, status: Optional[str] = None, limit: Optional[int] = None,
+                       after: Optional[int] = None, start_date: Optional[str] = None,
+                       end_date: Optional[str] = None) -> List[Dict]:
+        """Get deliveries with detailed information"""
+        try:
+            conditions, params = self._filters("d", status, start_date, end_date)
+            return self._select_deliveries(conditions, params, limit, after)
+        
+        except Exception as e:
+            raise Exception(f"Error obteniendo entregas: {str(e)}")
+    
+    def iter_deliveries(self, status: Optional[str] = None, after: Optional[int] = None,
+                        start_date: Optional[str] = None, end_date: Optional[str] = None) -> Iterator[Dict]:
+        """Iterate deliveries with detailed information, sorted by scheduled date"""
+        return self._iter_pages(
+            lambda limit, after: self.get_deliveries(status, limit, after, start_date, end_date), after)
+    
+    def _select_deliveries(self, conditions: Optional[List[str]] = None, params: Optional[List] = None,
+                           limit: Optional[int] = None, after: Optional[int] = None) -> List[Dict]:
+        """Select deliveries enriched with sales point and driver information"""
+        query = """
+            SELECT d.*,
+                   sp.name AS sales_point_name,
+                   r.id AS joined_request_id, r.total_amount AS total_amount,
+                   dr.name AS driver_name, dr.phone AS driver_phone,
+                   dr.vehicle_type, dr.vehicle_plate
+            FROM deliveries d
+            LEFT JOIN distribution_requests r ON r.id = d.request_id
+            LEFT JOIN sales_points sp ON sp.id = r.sales_point_id
+            LEFT JOIN drivers dr ON dr.id = d.driver_id
+        """
+        query, params = self._paged(query, conditions or [], params or [], "deliveries", "d",
+                                    [("d.scheduled_date", False)], limit, after)
+        
+        deliveries = []
+        for row in self.conn.execute(query, params):
+            delivery = self._row_to_dict(row)
+            vehicle_type = delivery.pop('vehicle_type')
+            vehicle_plate = delivery.pop('vehicle_plate')
+            
+            # Only expose joined fields that exist, like the JSON backend
+            if delivery.pop('joined_request_id') is None:
+                del delivery['total_amount']
+            if delivery['sales_point_name'] is None:
+                del delivery['sales_point_name']
+            if delivery['driver_name'] is None:
+                del delivery['driver_name']
+                del delivery['driver_phone']
+            else:
+                delivery['vehicle_info'] = f"{vehicle_type} - {vehicle_plate}"
+            
+            deliveries.append(delivery)
+        
+        return deliveries
+    
+    def update_delivery_status(self, delivery_id: int, new_status: str, notes: Optional[str] = None):
+        """Update delivery status and sync with request status"""
+        try:
+            with self.transaction():
+                delivery = self.conn.execute(
+                    "SELECT request_id FROM deliveries WHERE id = ?", (delivery_id,)
+                ).fetchone()
+                if not delivery:
+                    raise Exception("Entrega no encontrada")
+                
+                changes = {
+                    'status': new_status,
+                    'status_updated_date': datetime.now().isoformat()
+                }
+                
+                if notes:
+                    changes['notes'] = notes
+                
+                # Update delivery completion date and sync the request status
+                if new_status == 'entregado':
+                    changes['delivered_date'] = datetime.now().isoformat()
+                elif new_status == 'cancelado':
+                    changes['cancelled_date'] = datetime.now().isoformat()
+                
+                if new_status in ('entregado', 'cancelado'):
+                    self._update('distribution_requests', delivery['request_id'], {
+                        'status': new_status,
+                        'status_updated_date': datetime.now().isoformat()
+                    })
+                
+                self._update('deliveries', delivery_id, changes)
+        
+        except Exception as e:
+            raise Exception(f"Error actualizando estado de entrega: {str(e)}")
+    
+    def count_by(self, collection: str, field: str, start_date: Optional[str] = None,
+                 end_date: Optional[str] = None) -> Dict[str, int]:
+        """Count the rows of a table per value of a categorical field (e.g. status)"""
+        try:
+            if collection not in self._columns:
+                raise ValueError(f"Colección desconocida: {collection}")
+            if field not in RECORD_TYPES[collection].CODED_FIELDS:
+                raise ValueError(f"Campo no categórico en {collection}: {field}")
+            if (start_date or end_date) and 'created_date' not in self._columns[collection]:
+                # Like the JSON backend, rows without a creation date are never in range
+                return {}
+            
+            conditions, params = self._filters(collection, None, start_date, end_date)
+            query = f"SELECT {field}, COUNT(*) FROM {collection}"
+            if conditions:
+                query += " WHERE " + " AND ".join(conditions)
+            return dict(self.conn.execute(query + f" GROUP BY {field}", params).fetchall())
+        
+        except Exception as e:
+            raise Exception(f"Error contando registros: {str(e)}")
+    
+    def get_dashboard_stats(self) -> Dict:
+        """Get statistics for dashboard"""
+        try:
+            request_counts = dict(self.conn.execute(
+                "SELECT status, COUNT(*) FROM distribution_requests GROUP BY status"
+            ).fetchall())
+            delivery_counts = dict(self.conn.execute(
+                "SELECT status, COUNT(*) FROM deliveries GROUP BY status"
+            ).fetchall())
+            
+            def count(query: str) -> int:
+                return self.conn.execute(query).fetchone()[0]
+            
+            return {
+                'total_farmers': count("SELECT COUNT(*) FROM farmers WHERE active = 1"),
+                'total_products': count("SELECT COUNT(*) FROM products WHERE available = 1"),
+                'total_sales_points': count("SELECT COUNT(*) FROM sales_points WHERE active = 1"),
+                'pending_requests': request_counts.get('pendiente', 0),
+                'confirmed_requests': request_counts.get('confirmado', 0),
+                'in_transit_requests': request_counts.get('en_transito', 0),
+                'delivered_requests': request_counts.get('entregado', 0),
+                'pending_deliveries': delivery_counts.get('programado', 0) + delivery_counts.get('en_camino', 0),
+                'completed_deliveries': delivery_counts.get('entregado', 0)
+            }
+        
+        except Exception as e:
+            raise Exception(f"Error obteniendo estadísticas: {str(e)}")
@@ -3,6 +3,7 @@ from tkinter import ttk, messagebox
 import sys
 import os
 from database import DatabaseManager
+from database_sqlite import SQLiteDatabaseManager
 from styles import StyleManager
 from modules.dashboard import Dashboard
 from modules.farmers import FarmersModule
@@ -12,6 +13,12 @@ from modules.drivers import DriversModule
 from modules.deliveries import DeliveriesModule
 from modules.reports import ReportsModule
 
+# Storage backend: 'json' (files under data/) or 'sqlite'
+STORAGE_BACKEND = os.environ.get('CAMPOBCA_STORAGE', 'json')
+SQLITE_DB_PATH = os.environ.get('CAMPOBCA_SQLITE_PATH', os.path.join('data', 'campobca.db'))
+# Opt-in write-behind window for the JSON backend, in milliseconds (e.g. 200)
+WRITE_BEHIND_MS = os.environ.get('CAMPOBCA_WRITE_BEHIND_MS')
+
 class AgriculturalCooperativeApp:
     def __init__(self):
         self.root = tk.Tk()
@@ -21,8 +28,10 @@ class AgriculturalCooperativeApp:
         
         # Initialize database
         try:
-            self.db = DatabaseManager()
+            self.db = self.create_database()
             self.db.initialize_database()
+            # Keep the hot files to open and recently closed records
+            self.db.archive_closed_records()
         except Exception as e:
             messagebox.showerror("Error de Base de Datos", f"No se pudo inicializar la base de datos: {str(e)}")
             sys.exit(1)
@@ -40,6 +49,18 @@ class AgriculturalCooperativeApp:
         
         self.setup_ui()
         
+    def create_database(self):
+        """Create the database manager for the configured storage backend"""
+        if STORAGE_BACKEND == 'sqlite':
+            db = SQLiteDatabaseManager(SQLITE_DB_PATH)
+            # Seed a fresh SQLite database with the existing JSON data
+            if db.is_empty():
+                db.import_from_json()
+            return db
+        if WRITE_BEHIND_MS:
+            return DatabaseManager(write_behind=int(WRITE_BEHIND_MS) / 1000)
+        return DatabaseManager()
+        
     def setup_ui(self):
         """Setup the main user interface"""
         # Main container
@@ -104,6 +125,9 @@ class AgriculturalCooperativeApp:
     
     def show_module(self, module_name):
         """Show the specified module"""
+        # Modules update themselves from change events; pick up other processes' writes too
+        self.db.poll_changes()
+        
         # Hide current module
         if self.current_module:
             self.current_module.hide()
@@ -129,20 +153,6 @@ class AgriculturalCooperativeApp:
         self.current_module = self.modules[module_name]
         self.current_module.show()
         
-        # Refresh data when switching to distribution module to ensure updated status
-        if module_name == 'distribution' and hasattr(self.current_module, 'refresh_requests'):
-            self.current_module.refresh_requests()
-    
-    def refresh_all_modules(self):
-        """Refresh data in all initialized modules"""
-        for module in self.modules.values():
-            if hasattr(module, 'refresh_requests'):
-                module.refresh_requests()
-            if hasattr(module, 'refresh_data'):
-                module.refresh_data()
-            if hasattr(module, 'refresh_dashboard'):
-                module.refresh_dashboard()
-        
     def run(self):
         """Start the application"""
         try:
@@ -155,6 +165,7 @@ class AgriculturalCooperativeApp:
         """Handle application closing"""
         if messagebox.askokcancel("Salir", "¿Desea cerrar la aplicación?"):
             if hasattr(self, 'db'):
+                # Closing flushes buffered writes before the window goes away
                 self.db.close()
             self.root.destroy()
 
@@ -1,6 +1,7 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
 from typing import Dict
+from utils.tree_rows import ModuleView
 from datetime import datetime, timedelta
 import sqlite3
 
@@ -10,21 +11,28 @@ class Dashboard:
         self.db = db_manager
         self.frame = None
         
+        # Rebuild at most once per database write
+        self.refresh_scheduled = False
+        self.view = ModuleView(self.db, self.on_data_changed, lambda event: (self.refresh_dashboard,))
+        
     def show(self):
         """Show the dashboard module"""
-        if self.frame:
-            self.frame.destroy()
-        
-        self.frame = ttk.Frame(self.parent, style='Card.TFrame')
-        self.frame.pack(fill='both', expand=True, padx=10, pady=10)
-        
-        self.create_dashboard_content()
+        if not self.view.show(self.frame):
+            self.frame = ttk.Frame(self.parent, style='Card.TFrame')
+            self.frame.pack(fill='both', expand=True, padx=10, pady=10)
+            
+            self.create_dashboard_content()
         
     def hide(self):
         """Hide the dashboard module"""
-        if self.frame:
-            self.frame.destroy()
-            self.frame = None
+        self.view.hide(self.frame)
+    
+    def on_data_changed(self, event):
+        """Rebuild the dashboard once after the events of a database write"""
+        if not self.refresh_scheduled:
+            # A write can touch several collections; rebuild once they are all reported
+            self.refresh_scheduled = True
+            self.frame.after_idle(self.refresh_dashboard)
     
     def create_dashboard_content(self):
         """Create the dashboard content"""
@@ -175,27 +183,9 @@ class Dashboard:
             alerts_text = tk.Text(parent, height=4, wrap=tk.WORD, font=('Segoe UI', 10))
             alerts_text.pack(fill='x')
             
-            # Get products expiring soon
-            products = self.db.get_products()
-            farmers = self.db.get_farmers()
-            
-            # Create farmer lookup
-            farmer_lookup = {f['id']: f['name'] for f in farmers}
-            
-            # Find expiring products (within 7 days)
+            # Find expiring products (within 7 days), sorted by expiry date
             future_date = (datetime.now() + timedelta(days=7)).strftime('%Y-%m-%d')
-            
-            expiring_products = []
-            for product in products:
-                if not product.get('available', True):
-                    continue
-                expiry_date = product.get('expiry_date')
-                if expiry_date and expiry_date <= future_date:
-                    product['farmer_name'] = farmer_lookup.get(product.get('farmer_id'), 'Desconocido')
-                    expiring_products.append(product)
-            
-            # Sort by expiry date
-            expiring_products.sort(key=lambda x: x.get('expiry_date', ''))
+            expiring_products = self.db.products_expiring_between(end=future_date)
             
             if expiring_products:
                 alerts_text.insert('end', "⚠️ PRODUCTOS PRÓXIMOS A VENCER:\n\n", 'warning')
@@ -220,8 +210,11 @@ class Dashboard:
     
     def refresh_dashboard(self):
         """Refresh dashboard data"""
+        # Rebuild at most once per database write
+        self.refresh_scheduled = False
         if self.frame:
-            self.frame.destroy()
+            for widget in self.frame.winfo_children():
+                widget.destroy()
             self.create_dashboard_content()
     
     def quick_add_farmer(self):
@@ -280,7 +273,6 @@ class Dashboard:
                 self.db.add_farmer(farmer_data)
                 messagebox.showinfo("Éxito", "Agricultor agregado exitosamente")
                 dialog.destroy()
-                self.refresh_dashboard()
             except Exception as e:
                 messagebox.showerror("Error", f"Error agregando agricultor: {str(e)}")
         
@@ -387,7 +379,6 @@ class Dashboard:
                 self.db.add_product(product_data)
                 messagebox.showinfo("Éxito", "Producto agregado exitosamente")
                 dialog.destroy()
-                self.refresh_dashboard()
             except ValueError:
                 messagebox.showerror("Error", "Cantidad y precio deben ser números válidos")
             except Exception as e:
@@ -465,7 +456,6 @@ class Dashboard:
                 self.db.add_sales_point(sales_point_data)
                 messagebox.showinfo("Éxito", "Punto de venta agregado exitosamente")
                 dialog.destroy()
-                self.refresh_dashboard()
             except Exception as e:
                 messagebox.showerror("Error", f"Error agregando punto de venta: {str(e)}")
         
@@ -581,7 +571,6 @@ class Dashboard:
                 self.db.add_distribution_request_with_auto_assignment(request_data)
                 messagebox.showinfo("Éxito", "Solicitud de distribución creada exitosamente")
                 dialog.destroy()
-                self.refresh_dashboard()
             except ValueError:
                 messagebox.showerror("Error", "La cantidad debe ser un número válido")
             except Exception as e:
@@ -1,5 +1,6 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
+from utils.tree_rows import ModuleView, patch_rows
 from datetime import datetime, timedelta
 from typing import Optional
 
@@ -19,18 +20,103 @@ class DeliveriesModule:
         self.date_from_var = None
         self.date_to_var = None
         
+        # Rows show details of other collections, so remember which records each row uses
+        self.delivery_dependencies = {}
+        self.request_dependencies = {}
+        self.view = ModuleView(self.db, self.on_data_changed, self.stale_refreshes,
+                               ('deliveries', 'distribution_requests', 'drivers', 'products', 'sales_points'))
+        
     def show(self):
         """Show the deliveries module"""
-        if self.frame:
-            self.frame.pack(fill='both', expand=True)
-        else:
+        if not self.view.show(self.frame):
             self.create_deliveries_interface()
-        self.refresh_data()
+            self.refresh_data()
     
     def hide(self):
         """Hide the deliveries module"""
-        if self.frame:
-            self.frame.pack_forget()
+        self.view.hide(self.frame)
+    
+    def requests_changed(self, event):
+        """Check whether a change can alter the list of requests waiting for a delivery"""
+        # Which confirmed requests still need a delivery depends on requests and deliveries
+        return bool(
+            event.collection == 'distribution_requests'
+            or (event.collection == 'deliveries' and event.op != 'update')
+            or event.op == 'reload'
+            or self.depends_on(self.request_dependencies, event)
+        )
+    
+    def stale_refreshes(self, event):
+        """Get the lists to refresh on show() after a change made while hidden"""
+        if self.requests_changed(event):
+            return (self.refresh_deliveries, self.refresh_requests)
+        return (self.refresh_deliveries,)
+    
+    def on_data_changed(self, event):
+        """Update the rows affected by a database change"""
+        if event.collection == 'deliveries':
+            patch_rows(self.deliveries_tree, event,
+                       lambda delivery_id: self.delivery_row_values(self.db.get_delivery(delivery_id)),
+                       self.refresh_deliveries)
+        else:
+            affected = tuple(delivery_id for delivery_id in self.depends_on(self.delivery_dependencies, event)
+                             if self.deliveries_tree.exists(str(delivery_id)))
+            if event.op == 'reload':
+                self.refresh_deliveries()
+            elif affected:
+                patch_rows(self.deliveries_tree, event._replace(collection='deliveries', op='update', ids=affected),
+                           lambda delivery_id: self.delivery_row_values(self.db.get_delivery(delivery_id)),
+                           self.refresh_deliveries)
+        
+        if self.requests_changed(event):
+            self.refresh_requests()
+    
+    def depends_on(self, dependencies, event):
+        """Get the ids of the rows that show records changed by an event"""
+        changed = set(event.ids)
+        return tuple(row_id for row_id, used in dependencies.items()
+                     if changed & used.get(event.collection, set()))
+    
+    def delivery_row_values(self, delivery):
+        """Get the deliveries list row of a delivery, or None if it isn't listed"""
+        if not delivery:
+            return None
+        
+        status_filter = self.delivery_status_var.get()
+        if status_filter != "all" and delivery.get('status') != status_filter:
+            return None
+        
+        request = self.db.get_request(delivery.get('request_id')) if delivery.get('request_id') else None
+        self.delivery_dependencies[delivery['id']] = {
+            'distribution_requests': {delivery.get('request_id')},
+            'drivers': {delivery.get('driver_id')},
+            'sales_points': {request.get('sales_point_id')} if request else set()
+        }
+        
+        scheduled_date = delivery.get('scheduled_date', '')
+        if scheduled_date:
+            try:
+                date_obj = datetime.fromisoformat(scheduled_date.replace('Z', '+00:00'))
+                scheduled_date = date_obj.strftime('%d/%m/%Y')
+            except:
+                pass
+        
+        status_text = {
+            'programado': 'Programada',
+            'en_camino': 'En Tránsito',
+            'entregado': 'Entregada',
+            'cancelado': 'Cancelada'
+        }.get(delivery.get('status', ''), delivery.get('status', ''))
+        
+        return (
+            delivery.get('id', ''),
+            delivery.get('request_id', ''),
+            delivery.get('sales_point_name', ''),
+            delivery.get('driver_name', ''),
+            scheduled_date,
+            status_text,
+            f"${delivery.get('total_amount', 0):.2f}"
+        )
     
     def create_deliveries_interface(self):
         """Create the deliveries management interface"""
@@ -191,6 +277,7 @@ class DeliveriesModule:
             # Clear existing data
             for item in self.deliveries_tree.get_children():
                 self.deliveries_tree.delete(item)
+            self.delivery_dependencies.clear()
             
             # Get deliveries
             status_filter = None if self.delivery_status_var.get() == "all" else self.delivery_status_var.get()
@@ -198,30 +285,7 @@ class DeliveriesModule:
             
             # Populate tree
             for delivery in deliveries:
-                scheduled_date = delivery.get('scheduled_date', '')
-                if scheduled_date:
-                    try:
-                        date_obj = datetime.fromisoformat(scheduled_date.replace('Z', '+00:00'))
-                        scheduled_date = date_obj.strftime('%d/%m/%Y')
-                    except:
-                        pass
-                
-                status_text = {
-                    'programado': 'Programada',
-                    'en_camino': 'En Tránsito',
-                    'entregado': 'Entregada',
-                    'cancelado': 'Cancelada'
-                }.get(delivery.get('status', ''), delivery.get('status', ''))
-                
-                self.deliveries_tree.insert('', 'end', values=(
-                    delivery.get('id', ''),
-                    delivery.get('request_id', ''),
-                    delivery.get('sales_point_name', ''),
-                    delivery.get('driver_name', ''),
-                    scheduled_date,
-                    status_text,
-                    f"${delivery.get('total_amount', 0):.2f}"
-                ))
+                self.deliveries_tree.insert('', 'end', iid=str(delivery['id']), values=self.delivery_row_values(delivery))
         except Exception as e:
             messagebox.showerror("Error", f"Error cargando entregas: {str(e)}")
     
@@ -234,6 +298,7 @@ class DeliveriesModule:
             # Clear existing data
             for item in self.requests_tree.get_children():
                 self.requests_tree.delete(item)
+            self.request_dependencies.clear()
             
             # Get confirmed requests that are ready for delivery but don't have delivery yet
             requests = self.db.get_distribution_requests(status='confirmado')
@@ -247,6 +312,11 @@ class DeliveriesModule:
             
             # Populate tree
             for request in pending_requests:
+                self.request_dependencies[request['id']] = {
+                    'products': set(request.get('product_ids', [])),
+                    'sales_points': {request.get('sales_point_id')}
+                }
+                
                 confirmed_date = request.get('confirmed_date', '')
                 if confirmed_date:
                     try:
@@ -292,8 +362,7 @@ class DeliveriesModule:
         request_id = int(self.requests_tree.item(selection[0])['values'][0])
         
         try:
-            requests = self.db.get_distribution_requests()
-            request = next((r for r in requests if r['id'] == request_id), None)
+            request = self.db.get_request(request_id)
             if not request:
                 messagebox.showerror("Error", "Solicitud no encontrada")
                 return
@@ -392,8 +461,6 @@ class DeliveriesModule:
                     delivery_id = self.db.add_delivery(delivery_data)
                     messagebox.showinfo("Éxito", f"Entrega programada con ID: {delivery_id}")
                     
-                    self.refresh_deliveries()
-                    self.refresh_requests()
                     delivery_window.destroy()
                     
                 except Exception as e:
@@ -468,19 +535,8 @@ class DeliveriesModule:
                 
                 self.db.update_delivery_status(delivery_id, new_status, notes if notes else None)
                 messagebox.showinfo("Éxito", "Estado actualizado exitosamente")
+                # Every module showing the delivery or its request updates itself
                 status_window.destroy()
-                self.refresh_deliveries()
-                
-                # Refresh distribution module if it exists to show updated request status
-                try:
-                    # Navigate up to find the main app instance
-                    app = self.parent
-                    while app and not hasattr(app, 'refresh_all_modules'):
-                        app = getattr(app, 'master', getattr(app, 'parent', None))
-                    if app and hasattr(app, 'refresh_all_modules'):
-                        app.refresh_all_modules()
-                except:
-                    pass  # Silently continue if refresh fails
                 
             except Exception as e:
                 messagebox.showerror("Error", f"Error actualizando estado: {str(e)}")
@@ -504,8 +560,7 @@ class DeliveriesModule:
         delivery_id = int(self.deliveries_tree.item(selection[0])['values'][0])
         
         try:
-            deliveries = self.db.get_deliveries()
-            delivery = next((d for d in deliveries if d['id'] == delivery_id), None)
+            delivery = self.db.get_delivery(delivery_id)
             
             if not delivery:
                 messagebox.showerror("Error", "Entrega no encontrada")
@@ -580,8 +635,7 @@ Fechas Importantes:
         request_id = int(self.requests_tree.item(selection[0])['values'][0])
         
         try:
-            requests = self.db.get_distribution_requests()
-            request = next((r for r in requests if r['id'] == request_id), None)
+            request = self.db.get_request(request_id)
             if not request:
                 messagebox.showerror("Error", "Solicitud no encontrada")
                 return
@@ -1,5 +1,6 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
+from utils.tree_rows import ModuleView, patch_rows
 from utils.validators import Validator
 from datetime import datetime, timedelta
 
@@ -21,19 +22,79 @@ class DistributionModule:
         self.status_filter_var = None
         self.priority_filter_var = None
         
+        # Rows show product and sales point details, so remember which ones each row uses
+        self.row_dependencies = {}
+        self.view = ModuleView(self.db, self.on_data_changed, lambda event: (self.refresh_requests,),
+                               ('distribution_requests', 'products', 'sales_points'))
+        
     def show(self):
         """Show the distribution module"""
-        if self.frame:
-            self.frame.pack(fill='both', expand=True)
-        else:
+        if not self.view.show(self.frame):
             self.frame = ttk.Frame(self.parent, style='Card.TFrame')
             self.frame.pack(fill='both', expand=True, padx=10, pady=10)
             self.create_distribution_interface()
         
     def hide(self):
         """Hide the distribution module"""
-        if self.frame:
-            self.frame.pack_forget()
+        self.view.hide(self.frame)
+    
+    def on_data_changed(self, event):
+        """Update the rows affected by a database change"""
+        if event.collection != 'distribution_requests':
+            if event.op == 'reload':
+                self.refresh_requests()
+                return
+            
+            # Only requests that show the changed products or sales points need new rows
+            position = 0 if event.collection == 'sales_points' else 1
+            changed = set(event.ids)
+            affected = tuple(request_id for request_id, dependencies in self.row_dependencies.items()
+                             if changed & dependencies[position] and self.requests_tree.exists(str(request_id)))
+            if not affected:
+                return
+            event = event._replace(collection='distribution_requests', op='update', ids=affected)
+        
+        patch_rows(self.requests_tree, event,
+                   lambda request_id: self.request_row_values(self.db.get_request(request_id)),
+                   self.refresh_requests)
+    
+    def request_row_values(self, request):
+        """Get the requests list row of a request, remembering the products and sales point it shows"""
+        if not request:
+            return None
+        
+        self.row_dependencies[request['id']] = (
+            {request.get('sales_point_id')},
+            set(request.get('product_ids', []))
+        )
+        
+        # Format products list
+        product_names = []
+        quantities = []
+        
+        for product_detail in request.get('product_details', []):
+            product_names.append(product_detail.get('product_name', 'N/A'))
+            quantities.append(str(product_detail.get('quantity', 0)))
+        
+        products_str = ', '.join(product_names)
+        quantities_str = ', '.join(quantities)
+        
+        # Truncate if too long
+        if len(products_str) > 30:
+            products_str = products_str[:30] + "..."
+        if len(quantities_str) > 20:
+            quantities_str = quantities_str[:20] + "..."
+        
+        return (
+            request['id'],
+            request.get('sales_point_name', 'N/A'),
+            products_str,
+            quantities_str,
+            f"${request.get('total_amount', 0):.2f}",
+            request.get('requested_date', 'N/A'),
+            request.get('priority', 'N/A'),
+            request.get('status', 'N/A')
+        )
     
     def create_distribution_interface(self):
         """Create the distribution coordination interface"""
@@ -461,10 +522,7 @@ class DistributionModule:
             request_id = self.db.add_distribution_request_with_auto_assignment(request_data)
             messagebox.showinfo("Éxito", f"Solicitud creada con ID: {request_id}\nTotal a pagar: ${total_price:.2f}\nInventario actualizado automáticamente")
             
-            # Close modal and refresh
-            self.refresh_requests()
-            
-            # Find and close the modal window
+            # Find and close the modal window (the requests list updates itself)
             for widget in self.parent.winfo_children():
                 if isinstance(widget, tk.Toplevel) and widget.winfo_exists():
                     widget.destroy()
@@ -486,8 +544,7 @@ class DistributionModule:
         request_id = int(self.requests_tree.item(selection[0])['values'][0])
         
         try:
-            requests = self.db.get_distribution_requests()
-            request = next((r for r in requests if r['id'] == request_id), None)
+            request = self.db.get_request(request_id)
             if not request:
                 messagebox.showerror("Error", "Solicitud no encontrada")
                 return
@@ -520,7 +577,6 @@ class DistributionModule:
             try:
                 self.db.cancel_distribution_request(request_id)
                 messagebox.showinfo("Éxito", "Solicitud cancelada correctamente")
-                self.refresh_requests()
                 
             except Exception as e:
                 messagebox.showerror("Error", f"Error cancelando solicitud: {str(e)}")
@@ -539,8 +595,7 @@ class DistributionModule:
         request_id = int(item['values'][0])
         
         try:
-            requests = self.db.get_distribution_requests()
-            request = next((r for r in requests if r['id'] == request_id), None)
+            request = self.db.get_request(request_id)
             if not request:
                 messagebox.showerror("Error", "Solicitud no encontrada")
                 return
@@ -639,38 +694,13 @@ class DistributionModule:
             # Clear existing items
             for item in self.requests_tree.get_children():
                 self.requests_tree.delete(item)
+            self.row_dependencies.clear()
             
             # Load requests with up-to-date status information
             requests = self.db.get_distribution_requests()
             
             for request in requests:
-                # Format products list
-                product_names = []
-                quantities = []
-                
-                for product_detail in request.get('product_details', []):
-                    product_names.append(product_detail.get('product_name', 'N/A'))
-                    quantities.append(str(product_detail.get('quantity', 0)))
-                
-                products_str = ', '.join(product_names)
-                quantities_str = ', '.join(quantities)
-                
-                # Truncate if too long
-                if len(products_str) > 30:
-                    products_str = products_str[:30] + "..."
-                if len(quantities_str) > 20:
-                    quantities_str = quantities_str[:20] + "..."
-                
-                self.requests_tree.insert('', 'end', values=(
-                    request['id'],
-                    request.get('sales_point_name', 'N/A'),
-                    products_str,
-                    quantities_str,
-                    f"${request.get('total_amount', 0):.2f}",
-                    request.get('requested_date', 'N/A'),
-                    request.get('priority', 'N/A'),
-                    request.get('status', 'N/A')
-                ))
+                self.requests_tree.insert('', 'end', iid=str(request['id']), values=self.request_row_values(request))
                 
         except Exception as e:
             messagebox.showerror("Error", f"Error cargando solicitudes: {str(e)}")
@@ -712,8 +742,7 @@ class DistributionModule:
         request_id = int(self.requests_tree.item(selection[0])['values'][0])
         
         try:
-            requests = self.db.get_distribution_requests()
-            request = next((r for r in requests if r['id'] == request_id), None)
+            request = self.db.get_request(request_id)
             if not request:
                 messagebox.showerror("Error", "Solicitud no encontrada")
                 return
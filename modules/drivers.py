@@ -1,5 +1,6 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
+from utils.tree_rows import ModuleView, patch_rows
 from typing import Optional
 
 class DriversModule:
@@ -12,17 +13,39 @@ class DriversModule:
         self.form_vars = {}
         self.selected_driver_id = None
         
+        self.view = ModuleView(self.db, self.on_data_changed, lambda event: (self.filter_drivers,), ('drivers',))
+        
     def show(self):
         """Show the drivers module"""
-        if self.frame:
-            self.frame.pack(fill='both', expand=True)
-        else:
+        if not self.view.show(self.frame):
             self.create_drivers_interface()
     
     def hide(self):
         """Hide the drivers module"""
-        if self.frame:
-            self.frame.pack_forget()
+        self.view.hide(self.frame)
+    
+    def on_data_changed(self, event):
+        """Update the rows affected by a database change"""
+        if self.search_var.get():
+            self.filter_drivers()
+        else:
+            patch_rows(self.drivers_tree, event,
+                       lambda driver_id: self.driver_row_values(self.db.get_driver(driver_id)),
+                       self.filter_drivers)
+    
+    def driver_row_values(self, driver):
+        """Get the list row of a driver, or None if it isn't listed"""
+        if not driver or not driver.get('active', True):
+            return None
+        return (
+            driver['id'],
+            driver['name'],
+            driver['phone'],
+            driver['license_number'],
+            driver['vehicle_type'],
+            driver['vehicle_plate'],
+            driver.get('vehicle_capacity', 'N/A')
+        )
     
     def create_drivers_interface(self):
         """Create the drivers management interface"""
@@ -265,7 +288,6 @@ class DriversModule:
                     self.db.add_driver(driver_info)
                     messagebox.showinfo("Éxito", "Conductor agregado correctamente")
                 
-                self.refresh_drivers()
                 modal.destroy()
                 
             except Exception as e:
@@ -291,8 +313,7 @@ class DriversModule:
             return
         
         try:
-            drivers = self.db.get_drivers(active_only=False)
-            driver = next((d for d in drivers if d['id'] == self.selected_driver_id), None)
+            driver = self.db.get_driver(self.selected_driver_id)
             
             if driver:
                 self.show_driver_form(driver)
@@ -313,7 +334,6 @@ class DriversModule:
             try:
                 self.db.update_driver(self.selected_driver_id, {'active': False})
                 messagebox.showinfo("Éxito", "Conductor desactivado correctamente")
-                self.refresh_drivers()
                 
             except Exception as e:
                 messagebox.showerror("Error", f"Error al desactivar conductor: {str(e)}")
@@ -329,15 +349,7 @@ class DriversModule:
             drivers = self.db.get_drivers(active_only=True)
             
             for driver in drivers:
-                self.drivers_tree.insert('', 'end', values=(
-                    driver['id'],
-                    driver['name'],
-                    driver['phone'],
-                    driver['license_number'],
-                    driver['vehicle_type'],
-                    driver['vehicle_plate'],
-                    driver.get('vehicle_capacity', 'N/A')
-                ))
+                self.drivers_tree.insert('', 'end', iid=str(driver['id']), values=self.driver_row_values(driver))
                 
         except Exception as e:
             messagebox.showerror("Error", f"Error al cargar conductores: {str(e)}")
@@ -366,26 +378,14 @@ class DriversModule:
             for item in self.drivers_tree.get_children():
                 self.drivers_tree.delete(item)
             
-            # Load and filter drivers
-            drivers = self.db.get_drivers(active_only=True)
+            # Load drivers matching the search through the database search index
+            if search_term:
+                drivers = [self.db.get_driver(driver_id) for driver_id in self.db.search('drivers', search_term)]
+            else:
+                drivers = self.db.get_drivers(active_only=True)
             
             for driver in drivers:
-                # Check if search term matches any field
-                if (search_term in driver['name'].lower() or
-                    search_term in driver['phone'].lower() or
-                    search_term in driver['license_number'].lower() or
-                    search_term in driver['vehicle_type'].lower() or
-                    search_term in driver['vehicle_plate'].lower()):
-                    
-                    self.drivers_tree.insert('', 'end', values=(
-                        driver['id'],
-                        driver['name'],
-                        driver['phone'],
-                        driver['license_number'],
-                        driver['vehicle_type'],
-                        driver['vehicle_plate'],
-                        driver.get('vehicle_capacity', 'N/A')
-                    ))
+                self.drivers_tree.insert('', 'end', iid=str(driver['id']), values=self.driver_row_values(driver))
                     
         except Exception as e:
             messagebox.showerror("Error", f"Error al filtrar conductores: {str(e)}")
\ No newline at end of file
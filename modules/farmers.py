@@ -1,5 +1,6 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
+from utils.tree_rows import ModuleView, patch_rows
 from utils.validators import Validator
 from datetime import datetime
 
@@ -10,21 +11,92 @@ class FarmersModule:
         self.frame = None
         self.current_farmer_id = None
         
+        self.view = ModuleView(self.db, self.on_data_changed, self.stale_refreshes, ('farmers', 'products'))
+        
     def show(self):
         """Show the farmers module"""
-        if self.frame:
-            self.frame.destroy()
-        
-        self.frame = ttk.Frame(self.parent, style='Card.TFrame')
-        self.frame.pack(fill='both', expand=True, padx=10, pady=10)
-        
-        self.create_farmers_interface()
+        if not self.view.show(self.frame):
+            self.frame = ttk.Frame(self.parent, style='Card.TFrame')
+            self.frame.pack(fill='both', expand=True, padx=10, pady=10)
+            
+            self.create_farmers_interface()
         
     def hide(self):
         """Hide the farmers module"""
-        if self.frame:
-            self.frame.destroy()
-            self.frame = None
+        self.view.hide(self.frame)
+    
+    def stale_refreshes(self, event):
+        """Get the lists to refresh on show() after a change made while hidden"""
+        if event.collection == 'farmers':
+            # Farmer names also show up in the products list and its filter
+            return (self.filter_farmers, self.update_farmer_filter, self.filter_products)
+        return (self.filter_products,)
+    
+    def on_data_changed(self, event):
+        """Update the rows affected by a database change"""
+        if event.collection == 'farmers':
+            if self.farmer_search_var.get():
+                self.filter_farmers()
+            else:
+                patch_rows(self.farmers_tree, event,
+                           lambda farmer_id: self.farmer_row_values(self.db.get_farmer(farmer_id)),
+                           self.filter_farmers)
+            self.update_farmer_filter()
+            self.patch_farmer_products(event)
+        elif self.products_filtered():
+            self.filter_products()
+        else:
+            patch_rows(self.products_tree, event,
+                       lambda product_id: self.product_row_values(self.db.get_product(product_id)),
+                       self.filter_products)
+    
+    def patch_farmer_products(self, event):
+        """Update the products rows that show the farmers changed by an event"""
+        if event.op == 'insert':
+            # A new farmer has no products yet
+            return
+        if event.op == 'reload' or self.product_search_var.get():
+            # The search text is also matched against farmer names, so other products may match now
+            self.filter_products()
+            return
+        
+        listed = tuple(product['id'] for farmer_id in event.ids
+                       for product in self.db.iter_products(True, farmer_id)
+                       if self.products_tree.exists(str(product['id'])))
+        patch_rows(self.products_tree, event._replace(collection='products', op='update', ids=listed),
+                   lambda product_id: self.product_row_values(self.db.get_product(product_id)),
+                   self.filter_products)
+    
+    def farmer_row_values(self, farmer):
+        """Get the farmers list row of a farmer, or None if it isn't listed"""
+        if not farmer or not farmer.get('active', True):
+            return None
+        return (
+            farmer['id'],
+            farmer['name'],
+            farmer['email'] or '',
+            farmer['phone'] or '',
+            farmer['registration_date'][:10] if farmer['registration_date'] else ''
+        )
+    
+    def product_row_values(self, product):
+        """Get the products list row of a product, or None if it isn't listed"""
+        if not product or not product.get('available', True):
+            return None
+        return (
+            product['id'],
+            product['name'],
+            product['category'],
+            f"{product['quantity']} {product['unit']}",
+            f"${product['price_per_unit']:.2f}",
+            product['farmer_name'],
+            product['expiry_date'] or 'N/A'
+        )
+    
+    def products_filtered(self):
+        """Check whether the products list is narrowed by farmer or search text"""
+        farmer_filter = self.product_farmer_filter.get()
+        return bool(self.product_search_var.get()) or (farmer_filter and farmer_filter != 'Todos')
     
     def create_farmers_interface(self):
         """Create the farmers management interface"""
@@ -389,7 +461,6 @@ class FarmersModule:
                 farmer_id = self.db.add_farmer(farmer_data)
                 messagebox.showinfo("Éxito", f"Agricultor agregado con ID: {farmer_id}")
             
-            self.refresh_farmers()
             self.clear_farmer_form()
             
         except Exception as e:
@@ -464,7 +535,6 @@ class FarmersModule:
             messagebox.showinfo("Éxito", f"Producto agregado con ID: {product_id}")
             
             self.product_form_window.destroy()
-            self.refresh_products()
             
         except Exception as e:
             messagebox.showerror("Error", f"Error guardando producto: {str(e)}")
@@ -479,13 +549,7 @@ class FarmersModule:
             # Load farmers
             farmers = self.db.get_farmers()
             for farmer in farmers:
-                self.farmers_tree.insert('', 'end', values=(
-                    farmer['id'],
-                    farmer['name'],
-                    farmer['email'] or '',
-                    farmer['phone'] or '',
-                    farmer['registration_date'][:10] if farmer['registration_date'] else ''
-                ))
+                self.farmers_tree.insert('', 'end', iid=str(farmer['id']), values=self.farmer_row_values(farmer))
                 
         except Exception as e:
             messagebox.showerror("Error", f"Error cargando agricultores: {str(e)}")
@@ -497,29 +561,24 @@ class FarmersModule:
             for item in self.products_tree.get_children():
                 self.products_tree.delete(item)
             
-            # Update farmer filter combobox
-            farmers = self.db.get_farmers()
-            farmer_values = ['Todos'] + [f"{farmer['id']} - {farmer['name']}" for farmer in farmers]
-            self.product_farmer_filter['values'] = farmer_values
-            if not self.product_farmer_filter.get():
-                self.product_farmer_filter.set('Todos')
+            self.update_farmer_filter()
             
             # Load products
             products = self.db.get_products()
             for product in products:
-                self.products_tree.insert('', 'end', values=(
-                    product['id'],
-                    product['name'],
-                    product['category'],
-                    f"{product['quantity']} {product['unit']}",
-                    f"${product['price_per_unit']:.2f}",
-                    product['farmer_name'],
-                    product['expiry_date'] or 'N/A'
-                ))
+                self.products_tree.insert('', 'end', iid=str(product['id']), values=self.product_row_values(product))
                 
         except Exception as e:
             messagebox.showerror("Error", f"Error cargando productos: {str(e)}")
     
+    def update_farmer_filter(self):
+        """Update the farmer choices of the products filter"""
+        farmers = self.db.get_farmers()
+        farmer_values = ['Todos'] + [f"{farmer['id']} - {farmer['name']}" for farmer in farmers]
+        self.product_farmer_filter['values'] = farmer_values
+        if not self.product_farmer_filter.get():
+            self.product_farmer_filter.set('Todos')
+    
     def on_farmer_select(self, event):
         """Handle farmer selection"""
         selection = self.farmers_tree.selection()
@@ -535,8 +594,7 @@ class FarmersModule:
                 
                 # Load full farmer data for address
                 try:
-                    farmers = self.db.get_farmers()
-                    selected_farmer = next((f for f in farmers if f['id'] == self.current_farmer_id), None)
+                    selected_farmer = self.db.get_farmer(self.current_farmer_id)
                     if selected_farmer:
                         self.farmer_address_text.delete(1.0, tk.END)
                         if selected_farmer['address']:
@@ -571,20 +629,14 @@ class FarmersModule:
             self.farmers_tree.delete(item)
         
         try:
-            farmers = self.db.get_farmers()
+            # Search the name, email and phone through the database search index
+            if search_term:
+                farmers = [self.db.get_farmer(farmer_id) for farmer_id in self.db.search('farmers', search_term)]
+            else:
+                farmers = self.db.get_farmers()
+            
             for farmer in farmers:
-                # Check if search term matches any field
-                if (search_term in farmer['name'].lower() or 
-                    (farmer['email'] and search_term in farmer['email'].lower()) or
-                    (farmer['phone'] and search_term in farmer['phone'].lower())):
-                    
-                    self.farmers_tree.insert('', 'end', values=(
-                        farmer['id'],
-                        farmer['name'],
-                        farmer['email'] or '',
-                        farmer['phone'] or '',
-                        farmer['registration_date'][:10] if farmer['registration_date'] else ''
-                    ))
+                self.farmers_tree.insert('', 'end', iid=str(farmer['id']), values=self.farmer_row_values(farmer))
         except Exception as e:
             messagebox.showerror("Error", f"Error filtrando agricultores: {str(e)}")
     
@@ -602,31 +654,14 @@ class FarmersModule:
             self.products_tree.delete(item)
         
         try:
-            products = self.db.get_products()
+            farmer_id = None
+            if farmer_filter and farmer_filter != 'Todos':
+                farmer_id = int(farmer_filter.split(' - ')[0])
+            
+            products = self.db.query_products(farmer_id=farmer_id, text=search_term)
             
             for product in products:
-                # Apply farmer filter
-                if farmer_filter and farmer_filter != 'Todos':
-                    farmer_id_from_filter = int(farmer_filter.split(' - ')[0])
-                    if product['farmer_id'] != farmer_id_from_filter:
-                        continue
-                
-                # Apply search filter
-                if search_term:
-                    if not (search_term in product['name'].lower() or 
-                           search_term in product['category'].lower() or
-                           search_term in product['farmer_name'].lower()):
-                        continue
-                
-                self.products_tree.insert('', 'end', values=(
-                    product['id'],
-                    product['name'],
-                    product['category'],
-                    f"{product['quantity']} {product['unit']}",
-                    f"${product['price_per_unit']:.2f}",
-                    product['farmer_name'],
-                    product['expiry_date'] or 'N/A'
-                ))
+                self.products_tree.insert('', 'end', iid=str(product['id']), values=self.product_row_values(product))
                 
         except Exception as e:
             messagebox.showerror("Error", f"Error filtrando productos: {str(e)}")
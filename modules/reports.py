@@ -2,6 +2,11 @@ import tkinter as tk
 from tkinter import ttk, messagebox, filedialog
 from datetime import datetime, timedelta
 import sqlite3
+from utils.tree_rows import ModuleView
+from utils.validators import Validator
+
+# End date of a range covering all history, so list calls also read archived records
+HISTORY_END = '9999-12-31'
 
 class ReportsModule:
     def __init__(self, parent, db_manager):
@@ -9,21 +14,35 @@ class ReportsModule:
         self.db = db_manager
         self.frame = None
         
+        # Recompute only the reports whose data changed
+        self.view = ModuleView(self.db, self.on_data_changed, self.changed_reports)
+        
     def show(self):
         """Show the reports module"""
-        if self.frame:
-            self.frame.destroy()
-        
-        self.frame = ttk.Frame(self.parent, style='Card.TFrame')
-        self.frame.pack(fill='both', expand=True, padx=10, pady=10)
-        
-        self.create_reports_interface()
+        if not self.view.show(self.frame):
+            self.frame = ttk.Frame(self.parent, style='Card.TFrame')
+            self.frame.pack(fill='both', expand=True, padx=10, pady=10)
+            
+            self.create_reports_interface()
         
     def hide(self):
         """Hide the reports module"""
-        if self.frame:
-            self.frame.destroy()
-            self.frame = None
+        self.view.hide(self.frame)
+    
+    def changed_reports(self, event):
+        """Get the refreshes of the reports built from the changed collection"""
+        report_sources = {
+            self.refresh_inventory_report: ('products', 'farmers'),
+            self.refresh_activity_report: ('distribution_requests', 'deliveries', 'products', 'sales_points', 'farmers'),
+            self.refresh_performance_analysis: ('products', 'farmers', 'distribution_requests'),
+            self.refresh_financial_summary: ('products', 'distribution_requests', 'deliveries')
+        }
+        return [refresh for refresh, collections in report_sources.items() if event.collection in collections]
+    
+    def on_data_changed(self, event):
+        """Recompute the reports built from the changed collection"""
+        for refresh in self.changed_reports(event):
+            refresh()
     
     def create_reports_interface(self):
         """Create the reports and analytics interface"""
@@ -359,19 +378,20 @@ class ReportsModule:
                 widget.destroy()
             
             # Get products data
-            products = self.db.get_products(available_only=True)
+            category = self.inv_category_var.get()
+            if not category or category == 'Todas':
+                category = None
+            products = self.db.query_products(category=category)
             
             # Calculate statistics
-            total_products = len(products)
-            total_value = sum(p['quantity'] * p['price_per_unit'] for p in products)
-            categories = set(p['category'] for p in products)
+            totals = self.db.product_aggregates(category, expiring_by=self.expiry_cutoff(7))
             
             # Create stats cards
             stats_data = [
-                ("📦", "Total Productos", total_products),
-                ("💰", "Valor Total", f"${total_value:.2f}"),
-                ("📂", "Categorías", len(categories)),
-                ("⚠️", "Por Vencer", self.count_expiring_products(products))
+                ("📦", "Total Productos", totals['products']),
+                ("💰", "Valor Total", f"${totals['value']:.2f}"),
+                ("📂", "Categorías", len(totals['categories'])),
+                ("⚠️", "Por Vencer", totals['expiring'])
             ]
             
             for i, (icon, label, value) in enumerate(stats_data):
@@ -386,9 +406,10 @@ class ReportsModule:
                 ttk.Label(icon_frame, text=label, style='StatLabel.TLabel').pack()
             
             # Populate inventory tree
+            cutoffs = self.expiry_cutoffs()
             for product in products:
                 # Determine status based on expiry date
-                status = self.get_product_status(product)
+                status = self.get_product_status(product, cutoffs)
                 total_value = product['quantity'] * product['price_per_unit']
                 
                 self.inventory_tree.insert('', 'end', values=(
@@ -409,6 +430,14 @@ class ReportsModule:
     def refresh_activity_report(self):
         """Refresh activity report data"""
         try:
+            # Filter by the "Rango de Fechas" fields; an empty field leaves that end open
+            start_date = self.start_date_var.get().strip() or None if hasattr(self, 'start_date_var') else None
+            end_date = (self.end_date_var.get().strip() if hasattr(self, 'end_date_var') else '') or HISTORY_END
+            for label, value in (("inicial", start_date), ("final", end_date)):
+                if value and not Validator.is_valid_date(value):
+                    messagebox.showerror("Error", f"Formato de fecha {label} inválido, use AAAA-MM-DD")
+                    return
+            
             # Clear existing data
             for item in self.transactions_tree.get_children():
                 self.transactions_tree.delete(item)
@@ -417,27 +446,26 @@ class ReportsModule:
             for widget in self.activity_summary_frame.winfo_children():
                 widget.destroy()
             
-            # Get distribution requests and deliveries data
-            requests = self.db.get_distribution_requests()
-            deliveries = self.db.get_deliveries()
-            
-            # Filter by date range if specified
-            start_date = self.start_date_var.get() if hasattr(self, 'start_date_var') else None
-            end_date = self.end_date_var.get() if hasattr(self, 'end_date_var') else None
+            # Get distribution requests and deliveries data (a date range also reads archived ones)
+            requests = self.db.get_distribution_requests(start_date=start_date, end_date=end_date)
+            deliveries = self.db.get_deliveries(start_date=start_date, end_date=end_date)
             
             # Count requests by status (case insensitive)
-            active_requests = len([r for r in requests if r['status'].lower() in ['pendiente', 'confirmado']])
-            completed_requests = len([r for r in requests if r['status'].lower() == 'entregado'])
-            in_transit = len([d for d in deliveries if d['status'].lower() == 'en tránsito'])
+            request_counts = self.status_counts('distribution_requests', start_date, end_date)
+            delivery_counts = self.status_counts('deliveries', start_date, end_date)
+            active_requests = request_counts.get('pendiente', 0) + request_counts.get('confirmado', 0)
+            completed_requests = request_counts.get('entregado', 0)
+            in_transit = delivery_counts.get('en tránsito', 0)
             
             # Calculate total value of completed sales (delivered orders)
             total_sales_value = 0
             completed_sales = []
+            request_lookup = {r['id']: r for r in requests}
             
             for delivery in deliveries:
                 if delivery['status'].lower() == 'entregado':
                     # Find the corresponding request
-                    request = next((r for r in requests if r['id'] == delivery['request_id']), None)
+                    request = request_lookup.get(delivery['request_id'])
                     if request:
                         # Calculate value from products in the request
                         request_value = 0
@@ -446,14 +474,11 @@ class ReportsModule:
                         product_ids = request.get('product_ids', [])
                         quantities = request.get('quantities', [])
                         
-                        # Get all products for lookup
-                        products = self.db.get_products()
-                        
                         for i, product_id in enumerate(product_ids):
                             if i < len(quantities):
                                 quantity = quantities[i]
-                                product = next((p for p in products if p['id'] == product_id), None)
-                                if product:
+                                product = self.db.get_product(product_id)
+                                if product and product.get('available', True):
                                     item_value = quantity * product.get('price_per_unit', 0)
                                     request_value += item_value
                         
@@ -494,29 +519,21 @@ class ReportsModule:
                 product_ids = request.get('product_ids', [])
                 quantities = request.get('quantities', [])
                 
-                if product_ids:
-                    all_products = self.db.get_products()
-                    first_product_id = product_ids[0]
-                    product = next((p for p in all_products if p['id'] == first_product_id), None)
-                    if product:
-                        main_product = product['name']
-                        if len(product_ids) > 1:
-                            main_product += f" (+{len(product_ids)-1} más)"
+                first_product = self.db.get_product(product_ids[0]) if product_ids else None
+                if first_product:
+                    main_product = first_product['name']
+                    if len(product_ids) > 1:
+                        main_product += f" (+{len(product_ids)-1} más)"
                 
                 # Get sales point and farmer names
-                sales_points = self.db.get_sales_points()
-                sales_point = next((sp for sp in sales_points if sp['id'] == request.get('sales_point_id')), None)
+                sales_point = self.db.get_sales_point(request.get('sales_point_id'))
                 sales_point_name = sales_point['name'] if sales_point else 'N/A'
                 
                 # Get farmer name from first product
                 farmer_name = 'N/A'
-                if product_ids:
-                    all_products = self.db.get_products()
-                    first_product = next((p for p in all_products if p['id'] == product_ids[0]), None)
-                    if first_product:
-                        farmers = self.db.get_farmers()
-                        farmer = next((f for f in farmers if f['id'] == first_product.get('farmer_id')), None)
-                        farmer_name = farmer['name'] if farmer else 'N/A'
+                if first_product:
+                    farmer = self.db.get_farmer(first_product.get('farmer_id'))
+                    farmer_name = farmer['name'] if farmer else 'N/A'
                 
                 total_quantity = sum(quantities) if quantities else 0
                 
@@ -552,20 +569,20 @@ class ReportsModule:
             for widget in self.performance_metrics_frame.winfo_children():
                 widget.destroy()
             
-            # Get data
-            products = self.db.get_products(available_only=True)
+            # Get data (requests of all time, archived ones included)
             farmers = self.db.get_farmers(active_only=True)
-            requests = self.db.get_distribution_requests()
+            requests = self.db.get_distribution_requests(end_date=HISTORY_END)
+            farmer_totals = self.db.product_aggregates()['farmers']
             
             # Analyze farmer performance
             farmer_performance = {}
             for farmer in farmers:
                 farmer_id = farmer['id']
-                farmer_products = [p for p in products if p['farmer_id'] == farmer_id]
+                totals = farmer_totals.get(farmer_id, {'products': 0, 'quantity': 0, 'value': 0})
                 
-                total_quantity = sum(p['quantity'] for p in farmer_products)
-                total_value = sum(p['quantity'] * p['price_per_unit'] for p in farmer_products)
-                product_count = len(farmer_products)
+                total_quantity = totals['quantity']
+                total_value = totals['value']
+                product_count = totals['products']
                 
                 # Calculate rating based on products and value
                 rating = min(5, max(1, (product_count / 5) + (total_value / 1000)))
@@ -629,10 +646,9 @@ class ReportsModule:
                 ))
             
             # Populate product popularity tree
-            product_lookup = {p['id']: p for p in products}
             for product_id, pop_data in sorted(product_popularity.items(), key=lambda x: x[1]['requests'], reverse=True)[:10]:
-                product = product_lookup.get(product_id)
-                if product:
+                product = self.db.get_product(product_id)
+                if product and product.get('available', True):
                     popularity_score = pop_data['requests'] * 10 + pop_data['total_quantity']
                     popularity_level = "🔥 Muy Alta" if popularity_score > 50 else "📈 Alta" if popularity_score > 20 else "📊 Media"
                     
@@ -682,19 +698,18 @@ class ReportsModule:
             for widget in self.financial_metrics_frame.winfo_children():
                 widget.destroy()
             
-            # Get financial data from actual sales (delivered orders)
-            products = self.db.get_products(available_only=True)
-            requests = self.db.get_distribution_requests()
-            deliveries = self.db.get_deliveries()
+            # Get financial data from actual sales (delivered orders), archived ones included
+            requests = self.db.get_distribution_requests(end_date=HISTORY_END)
+            deliveries = self.db.get_deliveries(end_date=HISTORY_END)
             
-            # Calculate sales revenue from delivered orders
-            total_sales_revenue = 0
-            category_sales = {}
+            request_lookup = {r['id']: r for r in requests}
             
+            # Quantities sold per product in delivered orders
+            sold_quantities = {}
             for delivery in deliveries:
                 if delivery['status'].lower() == 'entregado':
                     # Find the corresponding request
-                    request = next((r for r in requests if r['id'] == delivery['request_id']), None)
+                    request = request_lookup.get(delivery['request_id'])
                     if request:
                         # Handle the actual data structure: product_ids and quantities arrays
                         product_ids = request.get('product_ids', [])
@@ -702,31 +717,41 @@ class ReportsModule:
                         
                         for i, product_id in enumerate(product_ids):
                             if i < len(quantities):
-                                quantity = quantities[i]
-                                product = next((p for p in products if p['id'] == product_id), None)
-                                if product:
-                                    item_value = quantity * product.get('price_per_unit', 0)
-                                    total_sales_revenue += item_value
-                                    
-                                    # Track by category
-                                    category = product['category']
-                                    if category not in category_sales:
-                                        category_sales[category] = {
-                                            'products_sold': 0,
-                                            'quantity_sold': 0,
-                                            'revenue': 0,
-                                            'prices': []
-                                        }
-                                    
-                                    category_sales[category]['products_sold'] += 1
-                                    category_sales[category]['quantity_sold'] += quantity
-                                    category_sales[category]['revenue'] += item_value
-                                    category_sales[category]['prices'].append(product['price_per_unit'])
+                                sold_quantities.setdefault(product_id, []).append(quantities[i])
+            
+            # Calculate sales revenue from the products sold, looked up by id
+            total_sales_revenue = 0
+            category_sales = {}
+            
+            for product_id, quantities in sold_quantities.items():
+                product = self.db.get_product(product_id)
+                if not product or not product.get('available', True):
+                    continue
+                
+                for quantity in quantities:
+                    item_value = quantity * product.get('price_per_unit', 0)
+                    total_sales_revenue += item_value
+                    
+                    # Track by category
+                    category = product['category']
+                    if category not in category_sales:
+                        category_sales[category] = {
+                            'products_sold': 0,
+                            'quantity_sold': 0,
+                            'revenue': 0,
+                            'prices': []
+                        }
+                    
+                    category_sales[category]['products_sold'] += 1
+                    category_sales[category]['quantity_sold'] += quantity
+                    category_sales[category]['revenue'] += item_value
+                    category_sales[category]['prices'].append(product['price_per_unit'])
             
             # Calculate inventory value
-            total_inventory_value = sum(p['quantity'] * p['price_per_unit'] for p in products)
-            total_products = len(products)
-            avg_price = sum(p['price_per_unit'] for p in products) / len(products) if products else 0
+            totals = self.db.product_aggregates()
+            total_inventory_value = totals['value']
+            total_products = totals['products']
+            avg_price = totals['price_sum'] / total_products if total_products else 0
             
             # Create financial metrics cards
             financial_data = [
@@ -796,39 +821,39 @@ class ReportsModule:
         except Exception as e:
             messagebox.showerror("Error", f"Error cargando resumen financiero: {str(e)}")
     
-    def count_expiring_products(self, products):
-        """Count products expiring within 7 days"""
-        count = 0
-        for product in products:
-            if product['expiry_date']:
-                try:
-                    expiry_date = datetime.strptime(product['expiry_date'], '%Y-%m-%d')
-                    days_remaining = (expiry_date - datetime.now()).days
-                    if days_remaining <= 7:
-                        count += 1
-                except ValueError:
-                    continue
-        return count
+    def expiry_cutoff(self, days):
+        """Get the last expiry date (YYYY-MM-DD) with at most `days` days remaining"""
+        # Days remaining are counted from now to midnight of the expiry date, rounded down
+        return (datetime.now() + timedelta(days=days + 1)).strftime('%Y-%m-%d')
     
-    def get_product_status(self, product):
+    def expiry_cutoffs(self):
+        """Get the expiry cutoffs of the vencido, crítico and alerta statuses"""
+        return self.expiry_cutoff(0), self.expiry_cutoff(2), self.expiry_cutoff(7)
+    
+    def status_counts(self, collection, start_date=None, end_date=None):
+        """Count a collection's records per lowercased status"""
+        counts = {}
+        for status, count in self.db.count_by(collection, 'status', start_date, end_date).items():
+            status = (status or '').lower()
+            counts[status] = counts.get(status, 0) + count
+        return counts
+    
+    def get_product_status(self, product, cutoffs=None):
         """Get product status based on expiry date"""
         if not product['expiry_date']:
             return "🟢 Bueno"
-        
-        try:
-            expiry_date = datetime.strptime(product['expiry_date'], '%Y-%m-%d')
-            days_remaining = (expiry_date - datetime.now()).days
-            
-            if days_remaining <= 0:
-                return "🔴 Vencido"
-            elif days_remaining <= 2:
-                return "🔴 Crítico"
-            elif days_remaining <= 7:
-                return "🟡 Alerta"
-            else:
-                return "🟢 Bueno"
-        except ValueError:
+        if not Validator.is_iso_date(product['expiry_date']):
             return "❓ Desconocido"
+        
+        expired, critical, alert = cutoffs or self.expiry_cutoffs()
+        if product['expiry_date'] <= expired:
+            return "🔴 Vencido"
+        elif product['expiry_date'] <= critical:
+            return "🔴 Crítico"
+        elif product['expiry_date'] <= alert:
+            return "🟡 Alerta"
+        else:
+            return "🟢 Bueno"
     
     def apply_inventory_filters(self):
         """Apply filters to inventory report"""
@@ -853,12 +878,14 @@ class ReportsModule:
                     f.write("=" * 50 + "\n")
                     f.write(f"Generado: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n\n")
                     
-                    # Export inventory data
-                    products = self.db.get_products(available_only=True)
-                    for product in products:
+                    # Export inventory data, streamed so a large inventory is never loaded at once
+                    farmer_names = {farmer['id']: farmer['name'] for farmer in self.db.get_farmers(active_only=False)}
+                    for product in self.db.stream_records('products'):
+                        if not product.get('available', True):
+                            continue
                         f.write(f"Producto: {product['name']}\n")
                         f.write(f"Categoría: {product['category']}\n")
-                        f.write(f"Agricultor: {product['farmer_name']}\n")
+                        f.write(f"Agricultor: {farmer_names.get(product.get('farmer_id'), 'Desconocido')}\n")
                         f.write(f"Cantidad: {product['quantity']} {product['unit']}\n")
                         f.write(f"Precio: ${product['price_per_unit']:.2f}\n")
                         f.write(f"Vencimiento: {product['expiry_date'] or 'N/A'}\n")
@@ -1,5 +1,6 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
+from utils.tree_rows import ModuleView, patch_rows
 from utils.validators import Validator
 
 class SalesPointsModule:
@@ -12,19 +13,47 @@ class SalesPointsModule:
         self.search_var = None
         self.type_filter_var = None
         
+        self.view = ModuleView(self.db, self.on_data_changed, lambda event: (self.filter_sales_points,),
+                               ('sales_points',))
+        
     def show(self):
         """Show the sales points module"""
-        if self.frame:
-            self.frame.pack(fill='both', expand=True)
-        else:
+        if not self.view.show(self.frame):
             self.frame = ttk.Frame(self.parent, style='Card.TFrame')
             self.frame.pack(fill='both', expand=True, padx=10, pady=10)
             self.create_sales_points_interface()
         
     def hide(self):
         """Hide the sales points module"""
-        if self.frame:
-            self.frame.pack_forget()
+        self.view.hide(self.frame)
+    
+    def on_data_changed(self, event):
+        """Update the rows affected by a database change"""
+        if self.search_var.get():
+            self.filter_sales_points()
+        else:
+            patch_rows(self.sales_points_tree, event,
+                       lambda sales_point_id: self.sales_point_row_values(self.db.get_sales_point(sales_point_id)),
+                       self.filter_sales_points)
+    
+    def sales_point_row_values(self, sp):
+        """Get the list row of a sales point, or None if it isn't listed"""
+        if not sp or not sp.get('active', True):
+            return None
+        
+        type_filter = self.type_filter_var.get() if self.type_filter_var else None
+        if type_filter and type_filter != 'Todos' and sp['type'] != type_filter:
+            return None
+        
+        return (
+            sp['id'],
+            sp['name'],
+            sp['type'],
+            sp['contact_person'] or '',
+            sp['phone'] or '',
+            sp['email'] or '',
+            sp['address']
+        )
     
     def create_sales_points_interface(self):
         """Create the sales points management interface"""
@@ -313,7 +342,6 @@ class SalesPointsModule:
                     sales_point_id = self.db.add_sales_point(sp_data)
                     messagebox.showinfo("Éxito", f"Punto de venta agregado con ID: {sales_point_id}", parent=modal)
                 
-                self.refresh_sales_points()
                 modal.destroy()
                 
             except Exception as e:
@@ -373,8 +401,7 @@ class SalesPointsModule:
         
         # Get full sales point data
         try:
-            sales_points = self.db.get_sales_points()
-            selected_sp = next((sp for sp in sales_points if sp['id'] == sales_point_id), None)
+            selected_sp = self.db.get_sales_point(sales_point_id)
             
             if selected_sp:
                 self.show_sales_point_modal(selected_sp)
@@ -425,7 +452,7 @@ class SalesPointsModule:
             # Load sales points
             sales_points = self.db.get_sales_points()
             for sp in sales_points:
-                self.sales_points_tree.insert('', 'end', values=(
+                self.sales_points_tree.insert('', 'end', iid=str(sp['id']), values=(
                     sp['id'],
                     sp['name'],
                     sp['type'],
@@ -470,27 +497,19 @@ class SalesPointsModule:
             self.sales_points_tree.delete(item)
         
         try:
-            sales_points = self.db.get_sales_points()
+            # Apply search filter through the database search index
+            if search_term:
+                sales_points = [self.db.get_sales_point(sp_id) for sp_id in self.db.search('sales_points', search_term)]
+            else:
+                sales_points = self.db.get_sales_points()
+            
             for sp in sales_points:
                 # Apply type filter
-                if type_filter and type_filter != 'Todos' and sp['type'] != type_filter:
+                values = self.sales_point_row_values(sp)
+                if values is None:
                     continue
                 
-                # Apply search filter
-                if search_term:
-                    searchable_text = f"{sp['name']} {sp['type']} {sp['contact_person'] or ''} {sp['address']} {sp['email'] or ''}".lower()
-                    if search_term not in searchable_text:
-                        continue
-                
-                self.sales_points_tree.insert('', 'end', values=(
-                    sp['id'],
-                    sp['name'],
-                    sp['type'],
-                    sp['contact_person'] or '',
-                    sp['phone'] or '',
-                    sp['email'] or '',
-                    sp['address']
-                ))
+                self.sales_points_tree.insert('', 'end', iid=str(sp['id']), values=values)
                 
         except Exception as e:
             messagebox.showerror("Error", f"Error filtrando puntos de venta: {str(e)}")
\ No newline at end of file
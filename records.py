@@ -0,0 +1,283 @@
+import threading
+from collections.abc import MutableMapping
+from typing import Any, Dict, Hashable, Iterator, List, Tuple
+
+_MISSING = object()
+
+class Vocabulary:
+    """Two-way mapping between the values of a categorical field and small-int codes.
+    
+    Codes are assigned on first sight and stay stable for the life of the process;
+    they are never written to disk, where the values stay readable strings.
+    """
+    
+    def __init__(self, name: str):
+        self.name = name
+        self.values: List[Hashable] = []
+        self._codes: Dict[Hashable, int] = {}
+        self._lock = threading.Lock()
+    
+    def encode(self, value: Hashable) -> int:
+        """Get the code of a value, assigning the next one if it is new"""
+        code = self._codes.get(value)
+        if code is None:
+            with self._lock:
+                code = self._codes.get(value)
+                if code is None:
+                    code = len(self.values)
+                    self.values.append(value)
+                    self._codes[value] = code
+        return code
+    
+    def code(self, value: Hashable) -> int:
+        """Get the code of a value, or -1 if no record has used it"""
+        return self._codes.get(value, -1)
+    
+    def decode(self, code: int) -> Hashable:
+        """Get the value of a code"""
+        return self.values[code]
+    
+    def __len__(self) -> int:
+        return len(self.values)
+
+# Shared by every record type with the field, so e.g. statuses of requests and
+# deliveries share codes
+VOCABULARIES = {
+    field: Vocabulary(field)
+    for field in ('category', 'unit', 'status', 'priority', 'vehicle_type', 'type')
+}
+
+class Record(MutableMapping):
+    """Compact in-memory record: known fields live in slots, anything else in a small dict.
+    
+    Records behave like the dicts they replace (record['name'], record.get(...),
+    'email' in record, record.update(...), dict(record)), so code written for
+    dict records keeps working. An unset slot is a missing key. CODED_FIELDS
+    hold small-int codes of a shared Vocabulary instead of their own string
+    objects and are decoded when read through the mapping interface; code()
+    gets the raw code for integer comparisons and group-bys.
+    """
+    
+    __slots__ = ('_extra',)
+    FIELDS: Tuple[str, ...] = ()
+    CODED_FIELDS: Tuple[str, ...] = ()
+    _field_set = frozenset()
+    _vocabularies: Dict[str, Vocabulary] = {}
+    
+    # Compared by identity: the caches find records with list.index() and remove(), and
+    # Mapping's __eq__ would build a dict of every record compared along the way
+    __eq__ = object.__eq__
+    __hash__ = object.__hash__
+    
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls.FIELDS = cls.__slots__
+        cls._field_set = frozenset(cls.__slots__)
+        cls._vocabularies = {field: VOCABULARIES[field] for field in cls.CODED_FIELDS}
+    
+    def __init__(self, data: Dict[str, Any] = (), **fields):
+        self._extra = None
+        self.update(data, **fields)
+    
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'Record':
+        """Build a record from a parsed JSON object"""
+        record = cls.__new__(cls)
+        extra = None
+        field_set = cls._field_set
+        vocabularies = cls._vocabularies
+        for key, value in data.items():
+            if key in field_set:
+                vocabulary = vocabularies.get(key)
+                setattr(record, key, value if vocabulary is None else vocabulary.encode(value))
+            else:
+                if extra is None:
+                    extra = {}
+                extra[key] = value
+        record._extra = extra
+        return record
+    
+    @classmethod
+    def from_row(cls, fields: Tuple[str, ...], values: Tuple[Any, ...], extra: Dict[str, Any] = None) -> 'Record':
+        """Build a record from a binary snapshot row (values in fields order, Ellipsis if missing)"""
+        record = cls.__new__(cls)
+        extra = dict(extra) if extra else None
+        field_set = cls._field_set
+        vocabularies = cls._vocabularies
+        for field, value in zip(fields, values):
+            if value is ...:
+                continue
+            if field in field_set:
+                vocabulary = vocabularies.get(field)
+                setattr(record, field, value if vocabulary is None else vocabulary.encode(value))
+            else:
+                if extra is None:
+                    extra = {}
+                extra[field] = value
+        record._extra = extra
+        return record
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Get the record as a plain dict (fields in FIELDS order, then extra keys)"""
+        data = {}
+        vocabularies = self._vocabularies
+        for field in self.FIELDS:
+            value = getattr(self, field, _MISSING)
+            if value is not _MISSING:
+                data[field] = value if field not in vocabularies else vocabularies[field].values[value]
+        if self._extra:
+            data.update(self._extra)
+        return data
+    
+    def code(self, field: str) -> int:
+        """Get the vocabulary code of a coded field (-1 if the record lacks it)"""
+        return getattr(self, field, -1)
+    
+    def __getitem__(self, key: str) -> Any:
+        if key in self._field_set:
+            value = getattr(self, key, _MISSING)
+            if value is not _MISSING:
+                vocabulary = self._vocabularies.get(key)
+                return value if vocabulary is None else vocabulary.values[value]
+        elif self._extra is not None and key in self._extra:
+            return self._extra[key]
+        raise KeyError(key)
+    
+    def get(self, key: str, default: Any = None) -> Any:
+        if key in self._field_set:
+            value = getattr(self, key, _MISSING)
+            if value is _MISSING:
+                return default
+            vocabulary = self._vocabularies.get(key)
+            return value if vocabulary is None else vocabulary.values[value]
+        if self._extra is not None:
+            return self._extra.get(key, default)
+        return default
+    
+    def __contains__(self, key: object) -> bool:
+        if key in self._field_set:
+            return hasattr(self, key)
+        return self._extra is not None and key in self._extra
+    
+    def __setitem__(self, key: str, value: Any):
+        if key in self._field_set:
+            vocabulary = self._vocabularies.get(key)
+            setattr(self, key, value if vocabulary is None else vocabulary.encode(value))
+        else:
+            if self._extra is None:
+                self._extra = {}
+            self._extra[key] = value
+    
+    def __delitem__(self, key: str):
+        if key in self._field_set:
+            try:
+                delattr(self, key)
+            except AttributeError:
+                raise KeyError(key) from None
+        elif self._extra is not None and key in self._extra:
+            del self._extra[key]
+        else:
+            raise KeyError(key)
+    
+    def __iter__(self) -> Iterator[str]:
+        for field in self.FIELDS:
+            if hasattr(self, field):
+                yield field
+        if self._extra:
+            yield from self._extra
+    
+    def __len__(self) -> int:
+        return sum(1 for field in self.FIELDS if hasattr(self, field)) + len(self._extra or ())
+    
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({self.to_dict()!r})"
+
+class Farmer(Record):
+    """A farmer (collection 'farmers')"""
+    __slots__ = ('id', 'name', 'contact_person', 'email', 'phone', 'address', 'farm_size',
+                 'specialization', 'certification', 'active', 'registration_date', 'updated_date')
+
+class Product(Record):
+    """A product lot offered by a farmer (collection 'products')"""
+    CODED_FIELDS = ('category', 'unit')
+    __slots__ = ('id', 'name', 'category', 'farmer_id', 'quantity', 'unit', 'price_per_unit', 'quality_grade',
+                 'harvest_date', 'expiry_date', 'storage_conditions', 'description', 'available',
+                 'created_date', 'updated_date')
+
+class SalesPoint(Record):
+    """A sales point (collection 'sales_points')"""
+    CODED_FIELDS = ('type',)
+    __slots__ = ('id', 'name', 'type', 'contact_person', 'email', 'phone', 'address', 'capacity_info',
+                 'active', 'registration_date', 'updated_date')
+
+class Driver(Record):
+    """A driver and their vehicle (collection 'drivers')"""
+    CODED_FIELDS = ('vehicle_type',)
+    __slots__ = ('id', 'name', 'phone', 'email', 'license_number', 'vehicle_type', 'vehicle_plate',
+                 'vehicle_capacity', 'active', 'registration_date', 'updated_date')
+
+class DistributionRequest(Record):
+    """A sales point's request for products (collection 'distribution_requests')"""
+    CODED_FIELDS = ('status', 'priority')
+    __slots__ = ('id', 'sales_point_id', 'product_ids', 'quantities', 'requested_date', 'priority',
+                 'special_instructions', 'status', 'total_amount', 'created_date', 'status_updated_date',
+                 'cancelled_date', 'updated_date')
+
+class Delivery(Record):
+    """A delivery of a request by a driver (collection 'deliveries')"""
+    CODED_FIELDS = ('status',)
+    __slots__ = ('id', 'request_id', 'driver_id', 'scheduled_date', 'delivery_address', 'estimated_time',
+                 'special_instructions', 'status', 'created_date', 'status_updated_date', 'delivered_date',
+                 'cancelled_date', 'notes', 'updated_date')
+
+RECORD_TYPES = {
+    'farmers': Farmer,
+    'products': Product,
+    'sales_points': SalesPoint,
+    'drivers': Driver,
+    'distribution_requests': DistributionRequest,
+    'deliveries': Delivery
+}
+
+def json_default(value: Any) -> Dict[str, Any]:
+    """json.dump default= hook that writes records as plain objects"""
+    if isinstance(value, Record):
+        return value.to_dict()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+if __name__ == "__main__":
+    # Memory benchmark: bytes per product record parsed from JSON, as dicts and as Product records
+    import json
+    import tracemalloc
+    
+    COUNT = 100_000
+    
+    def make_product(i: int) -> Dict[str, Any]:
+        return {
+            'id': i,
+            'name': f"Producto {i}",
+            'category': 'Verduras',
+            'farmer_id': i % 500 + 1,
+            'quantity': float(i % 1000),
+            'unit': 'kg',
+            'price_per_unit': 2500.0,
+            'quality_grade': 'A',
+            'harvest_date': '2025-06-01',
+            'expiry_date': '2025-06-15',
+            'storage_conditions': None,
+            'description': None,
+            'available': True,
+            'created_date': '2025-06-01T08:00:00'
+        }
+    
+    # Like json.load of a collection file, every record gets its own value strings
+    text = json.dumps([make_product(i) for i in range(COUNT)])
+    for label, build in [('dict', None), ('Product', Product.from_dict)]:
+        tracemalloc.start()
+        parsed = json.loads(text)
+        records = parsed if build is None else [build(data) for data in parsed]
+        del parsed
+        size = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        print(f"{label:>8}: {size / COUNT:7.1f} bytes/record ({size / 1024 / 1024:.1f} MB for {COUNT} records)")
+        del records
@@ -0,0 +1,112 @@
+"""Multi-process stress test of the JSON backend's file locking.
+
+Concurrent writers on one data directory must not lose updates or oversell
+stock, even when a peer dies mid-append to a journal. Run it directly
+(python tests/stress_flock.py); it exits 1 if any check fails. Needs fcntl
+and the fork start method, so it doesn't run on Windows.
+"""
+import multiprocessing
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import database
+from database import DatabaseManager
+
+PROCESSES = 6
+ROUNDS = 40
+STOCK = 150
+
+def writer(data_dir: str, worker: int, results):
+    """Place competing orders, add farmers and bump a shared counter"""
+    # Small journals so checkpoints race with appends too
+    db = DatabaseManager(data_dir, journal_max_bytes=4096)
+    confirmed = 0
+    for i in range(ROUNDS):
+        # Competing orders for the same product: only STOCK of them can be confirmed
+        try:
+            db.add_distribution_request_with_auto_assignment({
+                'sales_point_id': 1, 'product_ids': [1], 'quantities': [1],
+                'requested_date': '2030-01-01', 'priority': 'normal'
+            })
+            confirmed += 1
+        except Exception as e:
+            if 'insuficiente' not in str(e):
+                raise
+        
+        # Concurrent inserts, and a read-modify-write of one shared counter
+        db.add_farmer({'name': f"Agricultor {worker}-{i}", 'phone': '3001234567'})
+        with db.transaction():
+            counter = db._get_by_id(db.farmers_file, 1).get('counter', 0)
+            db._update_record(db.farmers_file, 1, {'counter': counter + 1})
+    results.put(confirmed)
+    db.close()
+
+def crash_mid_append(data_dir: str):
+    """Die leaving a torn line in a journal, as a process killed during a write would"""
+    # Wait until the writers are past their startup journal recovery
+    db = DatabaseManager(data_dir)
+    while len(db.get_farmers(active_only=False)) < PROCESSES * ROUNDS // 4:
+        time.sleep(0.01)
+    with db._locked(exclusive=True):
+        with open(db._journal_path(db.farmers_file), 'a', encoding='utf-8') as f:
+            f.write('{"op": "insert", "record": {"id": ')
+            f.flush()
+        os._exit(1)
+
+def main() -> int:
+    """Run the writers and a crashing peer, then check what was persisted"""
+    if database.fcntl is None:
+        print("La prueba de estrés necesita fcntl (no disponible en Windows)")
+        return 1
+    
+    context = multiprocessing.get_context('fork')
+    data_dir = tempfile.mkdtemp()
+    try:
+        db = DatabaseManager(data_dir)
+        db.add_farmer({'name': 'Agricultor', 'phone': '3001234567'})
+        db.add_sales_point({'name': 'Tienda', 'type': 'tienda', 'address': 'Calle 1'})
+        db.add_product({'farmer_id': 1, 'name': 'Papa', 'category': 'Tubérculos', 'quantity': STOCK,
+                        'unit': 'kg', 'price_per_unit': 1})
+        db.close()
+        
+        results = context.Queue()
+        processes = [context.Process(target=writer, args=(data_dir, worker, results)) for worker in range(PROCESSES)]
+        processes.insert(PROCESSES // 2, context.Process(target=crash_mid_append, args=(data_dir,)))
+        for process in processes:
+            process.start()
+        confirmed = sum(results.get() for _ in range(PROCESSES))
+        for process in processes:
+            process.join()
+        
+        db = DatabaseManager(data_dir)
+        product = db.get_product(1)
+        requests = db.get_distribution_requests()
+        farmers = db.get_farmers(active_only=False)
+        checks = {
+            'pedidos confirmados': (confirmed, min(PROCESSES * ROUNDS, STOCK)),
+            'existencias restantes': (product['quantity'], STOCK - confirmed),
+            'solicitudes guardadas': (len(requests), confirmed),
+            'ids de solicitudes únicos': (len({r['id'] for r in requests}), len(requests)),
+            'agricultores guardados': (len(farmers), PROCESSES * ROUNDS + 1),
+            'ids de agricultores únicos': (len({f['id'] for f in farmers}), len(farmers)),
+            'contador compartido': (db.get_farmer(1).get('counter'), PROCESSES * ROUNDS),
+            'estadísticas': (db.get_dashboard_stats(), db.rebuild_dashboard_stats())
+        }
+        db.close()
+        
+        failed = False
+        for label, (actual, expected) in checks.items():
+            ok = actual == expected
+            failed = failed or not ok
+            print(f"{'OK   ' if ok else 'FALLO'} {label}: {actual if ok else f'{actual} != {expected}'}")
+        return 1 if failed else 0
+    finally:
+        shutil.rmtree(data_dir, ignore_errors=True)
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,72 @@
+import json
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import DatabaseManager
+from database_sqlite import SQLiteDatabaseManager
+
+# Legacy lots: add_product rejects malformed dates now, but older data files can hold them
+LOTS = [
+    ('Pera', '2026-11-10'),
+    ('Uva', '15/11/2026'),
+    ('Kiwi', 'pronto'),
+    ('Mango', None),
+    ('Limón', '2027-03-01')
+]
+
+class ExpiryDatesTest(unittest.TestCase):
+    """Malformed expiry dates must never count as expiring"""
+    
+    def setUp(self):
+        self.data_dir = tempfile.mkdtemp()
+    
+    def tearDown(self):
+        shutil.rmtree(self.data_dir)
+    
+    def json_db(self):
+        """Get a JSON database whose product file holds the legacy lots"""
+        db = DatabaseManager(self.data_dir)
+        farmer_id = db.add_farmer({'name': 'Ana', 'phone': '3001234567'})
+        products = [{
+            'id': product_id, 'name': name, 'category': 'Frutas', 'farmer_id': farmer_id, 'quantity': 10,
+            'unit': 'kg', 'price_per_unit': 1.0, 'harvest_date': None, 'expiry_date': expiry_date,
+            'available': True, 'created_date': '2026-01-01T00:00:00'
+        } for product_id, (name, expiry_date) in enumerate(LOTS, 1)]
+        with open(db.products_file, 'w', encoding='utf-8') as f:
+            json.dump(products, f)
+        return DatabaseManager(self.data_dir), farmer_id
+    
+    def sqlite_db(self):
+        """Get a SQLite database whose products table holds the legacy lots"""
+        db = SQLiteDatabaseManager(os.path.join(self.data_dir, 'campobca.db'))
+        farmer_id = db.add_farmer({'name': 'Ana', 'phone': '3001234567'})
+        product_ids = [db.add_product({'name': name, 'category': 'Frutas', 'farmer_id': farmer_id, 'quantity': 10,
+                                       'unit': 'kg', 'price_per_unit': 1.0}) for name, _ in LOTS]
+        db.conn.executemany("UPDATE products SET expiry_date = ? WHERE id = ?",
+                            [(expiry_date, product_id) for (_, expiry_date), product_id in zip(LOTS, product_ids)])
+        db.conn.commit()
+        return db, farmer_id
+    
+    def check(self, db, farmer_id):
+        """Only the well-formed dates up to the cutoff count, whichever query path runs"""
+        names = lambda rows: sorted(row['name'] for row in rows)
+        self.assertEqual(names(db.query_products(expiry_before='2026-12-31')), ['Pera'])
+        self.assertEqual(names(db.query_products(expiry_before='2027-12-31', farmer_id=farmer_id)), ['Limón', 'Pera'])
+        self.assertEqual(names(db.query_products(expiry_before='2026-12-31', text='a')), ['Pera'])
+        self.assertEqual(names(db.products_expiring_between('2026-01-01', '2026-12-31')), ['Pera'])
+        self.assertEqual(db.product_aggregates(expiring_by='2026-12-31')['expiring'], 1)
+        self.assertEqual(db.product_aggregates()['products'], len(LOTS))
+    
+    def test_json_backend(self):
+        self.check(*self.json_db())
+    
+    def test_sqlite_backend(self):
+        self.check(*self.sqlite_db())
+
+if __name__ == '__main__':
+    unittest.main()
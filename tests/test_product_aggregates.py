@@ -0,0 +1,45 @@
+import json
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from columns import HAS_NUMPY
+from database import DatabaseManager
+
+# Legacy or badly imported farmer ids next to a valid one
+FARMER_IDS = [1, -5, 0, '7', None, True]
+
+class ProductAggregatesTest(unittest.TestCase):
+    """Invalid farmer ids count in the totals but under no farmer, with or without numpy"""
+    
+    def setUp(self):
+        self.data_dir = tempfile.mkdtemp()
+        products = [{
+            'id': product_id, 'name': f"Producto {product_id}", 'category': 'Frutas', 'farmer_id': farmer_id,
+            'quantity': 10, 'unit': 'kg', 'price_per_unit': 2.0, 'available': True,
+            'created_date': '2026-01-01T00:00:00'
+        } for product_id, farmer_id in enumerate(FARMER_IDS, 1)]
+        with open(DatabaseManager(self.data_dir).products_file, 'w', encoding='utf-8') as f:
+            json.dump(products, f)
+    
+    def tearDown(self):
+        shutil.rmtree(self.data_dir)
+    
+    def check(self, totals):
+        self.assertEqual(totals['products'], len(FARMER_IDS))
+        self.assertEqual(totals['quantity'], 10 * len(FARMER_IDS))
+        self.assertEqual(totals['farmers'], {1: {'products': 1, 'quantity': 10, 'value': 20}})
+    
+    def test_fallback(self):
+        self.check(DatabaseManager(self.data_dir, columnar_products=False).product_aggregates())
+    
+    @unittest.skipUnless(HAS_NUMPY, "necesita numpy")
+    def test_columnar(self):
+        self.check(DatabaseManager(self.data_dir).product_aggregates())
+
+if __name__ == "__main__":
+    unittest.main()
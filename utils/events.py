@@ -0,0 +1,66 @@
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional, Set, Tuple
+
+class ChangeEvent(NamedTuple):
+    """A committed change to a collection.
+    
+    op is 'insert', 'update', 'delete' or 'reload'; a reload has no ids and means
+    any record of the collection may have changed (e.g. another process wrote it).
+    """
+    collection: str
+    op: str
+    ids: Tuple[int, ...]
+
+class ChangeNotifier:
+    """Publish change events to subscribers once writes are committed.
+    
+    Writers record changes as they make them, take them when the outermost write
+    commits (or discard them if it is rolled back) and publish them once their
+    locks are released. Callbacks run on the thread that made the write.
+    """
+    
+    def _init_notifier(self):
+        """Initialize the subscriber list and the changes waiting to be published"""
+        self._subscribers: List[Tuple[Callable[[ChangeEvent], None], Optional[Set[str]]]] = []
+        self._changes: Dict[Tuple[str, str], Dict[int, None]] = {}
+    
+    def subscribe(self, callback: Callable[[ChangeEvent], None],
+                  collections: Optional[Iterable[str]] = None) -> Callable[[], None]:
+        """Call callback(event) after each committed change, optionally only for some collections.
+        
+        Returns a function that cancels the subscription.
+        """
+        subscription = (callback, set(collections) if collections is not None else None)
+        self._subscribers.append(subscription)
+        
+        def unsubscribe():
+            if subscription in self._subscribers:
+                self._subscribers.remove(subscription)
+        return unsubscribe
+    
+    def _record_change(self, collection: str, op: str, ids: Iterable[int] = ()):
+        """Remember a change to publish when the write commits"""
+        changed = self._changes.setdefault((collection, op), {})
+        for record_id in ids:
+            changed[record_id] = None
+    
+    def _discard_changes(self):
+        """Forget the changes of a rolled back write"""
+        self._changes = {}
+    
+    def _take_changes(self) -> Dict[Tuple[str, str], Dict[int, None]]:
+        """Take the recorded changes of a committed write (while still holding its locks)"""
+        changes, self._changes = self._changes, {}
+        return changes
+    
+    def _publish_changes(self, changes: Dict[Tuple[str, str], Dict[int, None]]):
+        """Send changes taken from a committed write to the subscribers of their collections"""
+        for (collection, op), ids in changes.items():
+            event = ChangeEvent(collection, op, tuple(ids))
+            for callback, collections in list(self._subscribers):
+                if collections is not None and collection not in collections:
+                    continue
+                try:
+                    callback(event)
+                except Exception as e:
+                    # The write already landed; a failing subscriber must not undo or hide it
+                    print(f"Error notificando cambios en {collection}: {e}")
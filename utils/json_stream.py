@@ -0,0 +1,75 @@
+import json
+from typing import Any, IO, Iterator
+
+CHUNK_SIZE = 64 * 1024
+
+_decoder = json.JSONDecoder()
+_WHITESPACE = ' \t\n\r'
+
+def iter_json_array(f: IO[str], chunk_size: int = CHUNK_SIZE) -> Iterator[Any]:
+    """Yield the elements of a JSON array file one at a time.
+    
+    Only the element being decoded and one chunk are held in memory, so a
+    collection file can be scanned in constant memory whatever its size.
+    Raises ValueError if the file isn't a JSON array.
+    """
+    buffer = ''
+    position = 0
+    eof = False
+    
+    def fill() -> bool:
+        """Drop the consumed part of the buffer and read the next chunk"""
+        nonlocal buffer, position, eof
+        if eof:
+            return False
+        chunk = f.read(chunk_size)
+        buffer = buffer[position:] + chunk
+        position = 0
+        eof = not chunk
+        return bool(chunk)
+    
+    def skip_whitespace():
+        """Move past whitespace, reading more of the file as needed"""
+        nonlocal position
+        while True:
+            while position < len(buffer) and buffer[position] in _WHITESPACE:
+                position += 1
+            if position < len(buffer) or not fill():
+                return
+    
+    skip_whitespace()
+    if position >= len(buffer) or buffer[position] != '[':
+        raise ValueError("Se esperaba un arreglo JSON")
+    position += 1
+    
+    first = True
+    while True:
+        skip_whitespace()
+        if position >= len(buffer):
+            raise ValueError("Arreglo JSON incompleto")
+        
+        if buffer[position] == ']':
+            return
+        if not first:
+            if buffer[position] != ',':
+                raise ValueError(f"Se esperaba ',' en la posición {position}")
+            position += 1
+            skip_whitespace()
+        
+        # Decode the next element, reading more whenever it is cut off by the buffer end
+        while True:
+            try:
+                value, end = _decoder.raw_decode(buffer, position)
+            except json.JSONDecodeError:
+                if not fill():
+                    raise
+                continue
+            if end == len(buffer) and not eof:
+                # A number may continue in the next chunk
+                fill()
+                continue
+            break
+        
+        position = end
+        first = False
+        yield value
@@ -0,0 +1,74 @@
+import threading
+from contextlib import contextmanager
+
+class ReadWriteLock:
+    """Reader/writer lock: many readers or one writer, with waiting writers served first.
+    
+    The writing thread may re-enter as a writer or take read locks; a thread that
+    only holds a read lock cannot upgrade to a write lock.
+    """
+    
+    def __init__(self):
+        self._cond = threading.Condition(threading.Lock())
+        self._readers = 0
+        self._writer = None
+        self._writer_depth = 0
+        self._writers_waiting = 0
+        self._local = threading.local()
+    
+    def is_writer(self) -> bool:
+        """Check whether the current thread holds the write lock"""
+        return self._writer == threading.get_ident()
+    
+    def is_reader(self) -> bool:
+        """Check whether the current thread holds a read lock"""
+        return getattr(self._local, 'depth', 0) > 0
+    
+    @contextmanager
+    def read(self):
+        """Hold a shared read lock"""
+        with self._cond:
+            depth = getattr(self._local, 'depth', 0)
+            if depth == 0:
+                # The writer reads under its own write lock without counting as a reader
+                self._local.counted = not self.is_writer()
+                if self._local.counted:
+                    while self._writer is not None or self._writers_waiting:
+                        self._cond.wait()
+                    self._readers += 1
+            self._local.depth = depth + 1
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._local.depth -= 1
+                if self._local.depth == 0 and self._local.counted:
+                    self._readers -= 1
+                    if self._readers == 0:
+                        self._cond.notify_all()
+    
+    @contextmanager
+    def write(self):
+        """Hold the exclusive write lock"""
+        with self._cond:
+            if self.is_writer():
+                self._writer_depth += 1
+            else:
+                if self.is_reader():
+                    raise RuntimeError("No se puede pasar de un bloqueo de lectura a uno de escritura")
+                self._writers_waiting += 1
+                try:
+                    while self._writer is not None or self._readers:
+                        self._cond.wait()
+                finally:
+                    self._writers_waiting -= 1
+                self._writer = threading.get_ident()
+                self._writer_depth = 1
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._writer_depth -= 1
+                if self._writer_depth == 0:
+                    self._writer = None
+                    self._cond.notify_all()
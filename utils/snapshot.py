@@ -0,0 +1,189 @@
+import json
+import marshal
+import mmap
+import os
+import struct
+import sys
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Sequence, Tuple
+
+# Binary collection snapshots.
+#
+# Layout (little endian):
+#   header   MAGIC, marshal version, source signature (mtime_ns, size, inode of the
+#            JSON file the snapshot matches, -1 if none), record count, fields length
+#   fields   marshal of the field names tuple
+#   index    record count x (id, offset), sorted by id, for point lookups
+#   records  per record: u32 length + marshal of (values in fields order, extra keys
+#            dict or None); a missing key is stored as Ellipsis
+#
+# marshal is only stable within a Python version, so the marshal version is part
+# of the header and snapshots written by another version are rejected.
+
+MAGIC = b'CBSNAP01'
+HEADER = struct.Struct('<8sBqqqII')
+INDEX_ENTRY = struct.Struct('<qQ')
+LENGTH = struct.Struct('<I')
+
+Row = Tuple[Tuple[Any, ...], Optional[Dict[str, Any]]]
+
+class SnapshotError(ValueError):
+    """A snapshot file is corrupt or was written by an incompatible version"""
+
+def write_snapshot(path: str, records: Iterable[Mapping], fields: Sequence[str],
+                   source: Optional[Tuple[int, int, int]] = None):
+    """Atomically write records to a snapshot file"""
+    fields = tuple(fields)
+    field_set = frozenset(fields)
+    blobs = []
+    ids = []
+    for record in records:
+        values = tuple(record.get(field, ...) for field in fields)
+        extra = {key: record[key] for key in record if key not in field_set} or None
+        blobs.append(marshal.dumps((values, extra)))
+        ids.append(record.get('id', 0))
+    
+    fields_blob = marshal.dumps(fields)
+    source = source or (-1, -1, -1)
+    offset = HEADER.size + len(fields_blob) + INDEX_ENTRY.size * len(blobs)
+    index = []
+    for record_id, blob in zip(ids, blobs):
+        index.append((record_id, offset))
+        offset += LENGTH.size + len(blob)
+    index.sort()
+    
+    tmp_path = path + ".tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, marshal.version, *source, len(blobs), len(fields_blob)))
+        f.write(fields_blob)
+        f.write(b''.join(INDEX_ENTRY.pack(record_id, record_offset) for record_id, record_offset in index))
+        f.write(b''.join(LENGTH.pack(len(blob)) + blob for blob in blobs))
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+def _read_header(data) -> Tuple[Optional[Tuple[int, int, int]], Tuple[str, ...], int, int]:
+    """Parse the header of snapshot bytes: (source, fields, record count, offset of the index)"""
+    try:
+        magic, version, mtime_ns, size, inode, count, fields_length = HEADER.unpack_from(data, 0)
+        if magic != MAGIC:
+            raise SnapshotError("No es un archivo de snapshot")
+        if version != marshal.version:
+            raise SnapshotError(f"Snapshot de otra versión de formato: {version}")
+        fields = marshal.loads(data[HEADER.size:HEADER.size + fields_length])
+    except (struct.error, EOFError, TypeError) as e:
+        raise SnapshotError(f"Snapshot dañado: {e}")
+    source = None if mtime_ns == -1 else (mtime_ns, size, inode)
+    return source, fields, count, HEADER.size + fields_length
+
+def read_source(path: str) -> Optional[Tuple[int, int, int]]:
+    """Get the signature of the JSON file a snapshot was written from"""
+    with open(path, 'rb') as f:
+        header = f.read(HEADER.size)
+    if len(header) < HEADER.size:
+        raise SnapshotError("No es un archivo de snapshot")
+    
+    magic, version, mtime_ns, size, inode = HEADER.unpack(header)[:5]
+    if magic != MAGIC or version != marshal.version:
+        raise SnapshotError("No es un snapshot de esta versión")
+    return None if mtime_ns == -1 else (mtime_ns, size, inode)
+
+def read_snapshot(path: str) -> Tuple[Optional[Tuple[int, int, int]], Tuple[str, ...], List[Row]]:
+    """Read every row of a snapshot in its stored order: (source, fields, rows)"""
+    with open(path, 'rb') as f:
+        data = f.read()
+    source, fields, count, index_offset = _read_header(data)
+    
+    rows = []
+    offset = index_offset + INDEX_ENTRY.size * count
+    view = memoryview(data)
+    try:
+        for _ in range(count):
+            length = LENGTH.unpack_from(data, offset)[0]
+            offset += LENGTH.size
+            rows.append(marshal.loads(view[offset:offset + length]))
+            offset += length
+    except (struct.error, EOFError, ValueError, TypeError) as e:
+        raise SnapshotError(f"Snapshot dañado: {e}")
+    return source, fields, rows
+
+def read_record(path: str, record_id: int) -> Optional[Dict[str, Any]]:
+    """Read a single record by id through the header index, without loading the others"""
+    with open(path, 'rb') as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            _, fields, count, index_offset = _read_header(data)
+            low, high = 0, count
+            while low < high:
+                middle = (low + high) // 2
+                middle_id, offset = INDEX_ENTRY.unpack_from(data, index_offset + middle * INDEX_ENTRY.size)
+                if middle_id < record_id:
+                    low = middle + 1
+                elif middle_id > record_id:
+                    high = middle
+                else:
+                    length = LENGTH.unpack_from(data, offset)[0]
+                    start = offset + LENGTH.size
+                    return row_to_dict(fields, marshal.loads(data[start:start + length]))
+    return None
+
+def row_to_dict(fields: Sequence[str], row: Row) -> Dict[str, Any]:
+    """Turn a snapshot row back into a record dict"""
+    values, extra = row
+    record = {field: value for field, value in zip(fields, values) if value is not ...}
+    if extra:
+        record.update(extra)
+    return record
+
+def _stat_signature(path: str) -> Tuple[int, int, int]:
+    """Get the (mtime, size, inode) signature DatabaseManager uses for a file"""
+    st = os.stat(path)
+    return (st.st_mtime_ns, st.st_size, st.st_ino)
+
+def json_to_snapshot(json_path: str, snapshot_path: Optional[str] = None) -> str:
+    """Convert a JSON collection file to a snapshot that matches it"""
+    snapshot_path = snapshot_path or os.path.splitext(json_path)[0] + ".snap"
+    with open(json_path, 'r', encoding='utf-8') as f:
+        records = json.load(f)
+    
+    # Every key any record has, in order of first appearance
+    fields = {}
+    for record in records:
+        for key in record:
+            fields.setdefault(key, None)
+    
+    write_snapshot(snapshot_path, records, list(fields), _stat_signature(json_path))
+    return snapshot_path
+
+def snapshot_to_json(snapshot_path: str, json_path: Optional[str] = None) -> str:
+    """Convert a snapshot to a readable JSON collection file"""
+    json_path = json_path or os.path.splitext(snapshot_path)[0] + ".json"
+    _, fields, rows = read_snapshot(snapshot_path)
+    
+    tmp_path = json_path + ".tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump([row_to_dict(fields, row) for row in rows], f, indent=2, ensure_ascii=False)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, json_path)
+    return json_path
+
+if __name__ == "__main__":
+    USAGE = (
+        "Uso: python -m utils.snapshot to-snapshot ARCHIVO.json [SALIDA.snap]\n"
+        "     python -m utils.snapshot to-json ARCHIVO.snap [SALIDA.json]\n"
+        "     python -m utils.snapshot get ARCHIVO.snap ID"
+    )
+    if len(sys.argv) < 3:
+        print(USAGE)
+        sys.exit(1)
+    
+    command, path = sys.argv[1], sys.argv[2]
+    target = sys.argv[3] if len(sys.argv) > 3 else None
+    if command == 'to-snapshot':
+        print(json_to_snapshot(path, target))
+    elif command == 'to-json':
+        print(snapshot_to_json(path, target))
+    elif command == 'get' and target:
+        print(json.dumps(read_record(path, int(target)), indent=2, ensure_ascii=False))
+    else:
+        print(USAGE)
+        sys.exit(1)
@@ -0,0 +1,71 @@
+def patch_rows(tree, event, row_values, refresh):
+    """Apply a database change event to a Treeview whose row iids are record ids.
+    
+    Updates of listed records are patched in place with row_values(record_id),
+    which returns the new values or None if the record should no longer be listed,
+    and deleted records lose their rows. Anything else (inserts, reloads, updates
+    of records that aren't listed) calls refresh(), since it can change which rows
+    are listed and their order.
+    """
+    if tree is None:
+        return
+    
+    listed = [record_id for record_id in event.ids if tree.exists(str(record_id))]
+    if event.op == 'delete':
+        for record_id in listed:
+            tree.delete(str(record_id))
+        return
+    
+    if event.op != 'update' or len(listed) != len(event.ids):
+        refresh()
+        return
+    
+    for record_id in listed:
+        values = row_values(record_id)
+        if values is None:
+            tree.delete(str(record_id))
+        else:
+            tree.item(str(record_id), values=values)
+
+class ModuleView:
+    """Show/hide state of a module whose widgets follow database changes.
+    
+    Changes that arrive while the module is shown go to on_change(event). While
+    it is hidden, stale(event) names the refresh functions the change calls for,
+    and each of them runs once when the module is shown again.
+    """
+    
+    def __init__(self, db, on_change, stale, collections=None):
+        self.on_change = on_change
+        self.stale = stale
+        self.visible = False
+        self.pending = {}
+        self.pack_options = None
+        db.subscribe(self.changed, collections)
+    
+    def show(self, frame) -> bool:
+        """Mark the module shown, packing frame again and running the refreshes deferred while hidden.
+        
+        Returns False if there is no frame yet, so the module must build its interface.
+        """
+        if frame is not None and not self.visible:
+            frame.pack(**self.pack_options)
+            for refresh in list(self.pending):
+                refresh()
+        self.pending.clear()
+        self.visible = True
+        return frame is not None
+    
+    def hide(self, frame):
+        """Mark the module hidden, remembering how frame was packed"""
+        if frame is not None and self.visible:
+            self.pack_options = frame.pack_info()
+            frame.pack_forget()
+        self.visible = False
+    
+    def changed(self, event):
+        """Pass a database change on to the module, or defer its refreshes while hidden"""
+        if self.visible:
+            self.on_change(event)
+        else:
+            self.pending.update(dict.fromkeys(self.stale(event)))
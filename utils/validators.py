@@ -1,5 +1,5 @@
 import re
-from datetime import datetime
+from datetime import date, datetime
 from typing import Optional
 
 class Validator:
@@ -64,6 +64,26 @@ class Validator:
         except ValueError:
             return False
     
+    @staticmethod
+    def is_iso_date(date_string: str) -> bool:
+        """
+        Fast check for a YYYY-MM-DD date, for per-record use on large collections
+        
+        Args:
+            date_string (str): Date string to check
+            
+        Returns:
+            bool: True if it is a real date in YYYY-MM-DD format, False otherwise
+        """
+        if not isinstance(date_string, str) or len(date_string) != 10 or date_string[4] != '-' or date_string[7] != '-':
+            return False
+        
+        try:
+            date.fromisoformat(date_string)
+            return True
+        except ValueError:
+            return False
+    
     @staticmethod
     def is_valid_positive_number(value: str) -> bool:
         """
@@ -314,6 +334,37 @@ class Validator:
         
         return True, ""
     
+    @staticmethod
+    def validate_driver_data(driver_data: dict) -> tuple[bool, str]:
+        """
+        Validate driver data specifically
+        
+        Args:
+            driver_data (dict): Dictionary containing driver data
+            
+        Returns:
+            tuple[bool, str]: (is_valid, error_message)
+        """
+        # Check required fields
+        required_fields = ['name', 'phone', 'license_number', 'vehicle_type', 'vehicle_plate']
+        is_valid, error_msg = Validator.validate_required_fields(driver_data, required_fields)
+        if not is_valid:
+            return is_valid, error_msg
+        
+        # Validate name length
+        if not Validator.is_valid_text_length(driver_data['name'], min_length=2, max_length=100):
+            return False, "El nombre debe tener entre 2 y 100 caracteres"
+        
+        # Validate phone
+        if not Validator.is_valid_phone(driver_data['phone']):
+            return False, "El formato del teléfono no es válido"
+        
+        # Validate email if provided
+        if driver_data.get('email') and not Validator.is_valid_email(driver_data['email']):
+            return False, "El formato del email no es válido"
+        
+        return True, ""
+    
     @staticmethod
     def validate_distribution_request_data(request_data: dict) -> tuple[bool, str]:
         """